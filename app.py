@@ -1,8 +1,200 @@
-import streamlit as st
+import logging
+from functools import partial
+
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-import os
+import streamlit as st
+
+from exports import EXPORT_FORMATS, FAST_FORMATS, export_file_name, export_mime
+from history import HISTORY_DB, invoice_history, list_runs, save_report_run, status_streaks
+from incremental import DELTA_REPORT_FILE, reconcile_gst_incremental
+from jobs import CANCELLED, DONE, FAILED, copy_upload, get_job, submit_job
+from periods import PERIOD_REPORT_FILE, check_period, period_from_name, reconcile_periods
+from reports import (
+    COMBINED_REPORT_FILE, DEBIT_NOTE_REPORT_FILE, GST_REPORT_FILE,
+    reconcile_combined, reconcile_debit_notes, reconcile_gst,
+)
+from status import MISSING_IN_GSTR, MISSING_IN_TALLY, MISMATCH, TOLERANCE
+from suppliers import SUPPLIER_DB
+
+# Stage records are logged as JSON lines next to the server log
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+# Rows per page of the result preview
+PAGE_SIZES = [25, 100, 500]
+
+REPORT_TITLES = {
+    "gst": "GST Reconciliation Report",
+    "debit_note": "Debit Note Reconciliation Report",
+    "combined": "Combined GST Reconciliation Report",
+    "periods": "Multi-Period GST Reconciliation Report",
+}
+
+
+def show_profile(records):
+    """Show the stage records of a run in a collapsed panel."""
+    with st.expander("Run profile"):
+        profile = pd.DataFrame(records)
+        st.dataframe(profile, hide_index=True)
+        st.caption(f"Total {profile['seconds'].sum():.2f}s; peak RSS is the highest memory use of the server process so far.")
+
+
+def amount_options(report_name):
+    """Show the tolerance and exact arithmetic options of a report and return (tolerance, paise)."""
+    tolerance = st.number_input("Tolerance (₹)", min_value=0.0, value=TOLERANCE, step=0.5, key=f"{report_name}-tolerance",
+                                help="Amounts differing by more than this are a Mismatch.")
+    paise = st.checkbox("Exact arithmetic (compare amounts in whole paise)", key=f"{report_name}-paise")
+    return tolerance, paise
+
+
+def export_options(report_name):
+    """Show the export format options of a report and return (formats, styled_later)."""
+    formats = st.multiselect("Download formats", list(EXPORT_FORMATS), default=["xlsx"], key=f"{report_name}-formats",
+                             format_func=lambda fmt: EXPORT_FORMATS[fmt][0])
+    styled_later = st.checkbox("Build the styled XLSX in the background after the other formats",
+                               key=f"{report_name}-styled-later",
+                               disabled="xlsx" not in formats or not set(formats) & set(FAST_FORMATS))
+    return formats or ["xlsx"], styled_later
+
+
+def history_options(report_name, gstr_file=None, ask_client=True):
+    """Show the option to save a run to the history and return (save, client, period).
+
+    The period is prefilled from the GSTR-2B file name; the GST and
+    combined pages ask for the client name themselves, as incremental runs
+    and the supplier master need it too.
+    """
+    save = st.checkbox("Save this run to the history", key=f"{report_name}-history",
+                       help=f"Keeps its inputs and classified rows in {HISTORY_DB} for the History page.")
+    client = st.text_input("Client name", key=f"{report_name}-client", disabled=not save) if ask_client else None
+    period = None
+    if report_name != "periods":
+        default = period_from_name(gstr_file.name) if gstr_file else None
+        period = st.text_input("Period (YYYY-MM)", value=default or "", key=f"{report_name}-period", disabled=not save)
+    return save, client, period
+
+
+def check_history(save, client, period):
+    """Return the error preventing a run from being saved to the history, or None."""
+    if not save:
+        return None
+    if not client:
+        return "Please enter the client name to save the run under."
+    try:
+        if period:
+            check_period(period)
+    except ValueError as e:
+        return f"{e}."
+    return None
+
+
+def filter_rows(df, status_col, statuses, gstin):
+    """Return the positions of the rows with one of ``statuses`` and a GSTIN starting with ``gstin``."""
+    mask = np.ones(len(df), dtype=bool)
+    if statuses:
+        mask &= df[status_col].isin(statuses).to_numpy()
+    if gstin:
+        mask &= df["GSTIN"].str.startswith(gstin.upper()).fillna(False).to_numpy(dtype=bool)
+    return np.flatnonzero(mask)
+
+
+def show_preview(job):
+    """Show one page at a time of a finished job's reports, filtered by status and GSTIN.
+
+    Only the rows of the current page are sent to the browser. The
+    filtered row positions are kept in the session, so the filters only
+    run again when they change, not on every refresh of the job list.
+    """
+    reports = [report for _, download_reports, _ in job.downloads for report in download_reports]
+    index = 0
+    if len(reports) > 1:
+        index = st.selectbox("Sheet", range(len(reports)), format_func=lambda i: reports[i].sheet_name,
+                             key=f"preview-sheet-{job.id}")
+    report = reports[index]
+    df = report.df
+
+    filter_cols = st.columns(2)
+    statuses = []
+    if report.status_col in df.columns:
+        statuses = filter_cols[0].multiselect(report.status_col, sorted(df[report.status_col].dropna().unique()),
+                                              key=f"preview-status-{job.id}-{index}")
+    gstin = ""
+    if "GSTIN" in df.columns:
+        gstin = filter_cols[1].text_input("GSTIN starts with", key=f"preview-gstin-{job.id}-{index}").strip()
+
+    filters = (index, tuple(statuses), gstin)
+    cached = st.session_state.get(f"preview-rows-{job.id}")
+    if cached is None or cached[0] != filters:
+        cached = (filters, filter_rows(df, report.status_col, statuses, gstin))
+        st.session_state[f"preview-rows-{job.id}"] = cached
+    rows = cached[1]
+
+    page_cols = st.columns(2)
+    page_size = page_cols[0].selectbox("Rows per page", PAGE_SIZES, key=f"preview-size-{job.id}")
+    pages = max(1, -(-len(rows) // page_size))
+    page = page_cols[1].number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1,
+                                     key=f"preview-page-{job.id}-{filters}-{page_size}")
+    start = (page - 1) * page_size
+    st.dataframe(df.iloc[rows[start:start + page_size]], hide_index=True)
+    st.caption(f"Rows {min(start + 1, len(rows))}–{min(start + page_size, len(rows))} of {len(rows)}"
+               + (f", filtered from {len(df)}" if len(rows) < len(df) else ""))
+
+
+def queue_report(report_name, work, formats=("xlsx",), styled_later=False):
+    """Run ``work`` as a background job and remember its ID in the session and the page URL."""
+    job = submit_job(report_name, work, formats, styled_later)
+    st.session_state.job_ids.append(job.id)
+    st.query_params["jobs"] = ",".join(st.session_state.job_ids)
+    st.info(f"Report queued as job `{job.id}`. Its progress is shown below.")
+
+
+def jobs_pending():
+    """Return whether any job of this session is still running or writing its styled workbook."""
+    return any(job is not None and job.pending for job in map(get_job, st.session_state.job_ids))
+
+
+def show_jobs(refreshing=False):
+    """Show the jobs of this session, newest first.
+
+    While ``refreshing`` this runs every second as a fragment; once no job
+    is pending anymore the whole page is rerun, which shows the jobs again
+    without the timer.
+    """
+    if refreshing and not jobs_pending():
+        st.rerun()
+    job_ids = st.session_state.job_ids
+    if not job_ids:
+        return
+    st.subheader("Report jobs")
+    for job_id in reversed(job_ids):
+        job = get_job(job_id)
+        with st.container(border=True):
+            if job is None:
+                st.caption(f"Job `{job_id}` has expired.")
+                continue
+            st.markdown(f"**{REPORT_TITLES[job.report_name]}** · job `{job.id}`")
+            if job.active:
+                st.progress(job.progress, text=job.status_text)
+                st.button("Cancel", key=f"cancel-{job.id}", on_click=job.cancel)
+            elif job.state == DONE:
+                st.success(f"✅ {REPORT_TITLES[job.report_name]} Generated Successfully!")
+                for i, (label, reports, file_name) in enumerate(job.downloads):
+                    for fmt in job.formats:
+                        if fmt == "xlsx" and job.styled_later and not job.is_exported(i, fmt):
+                            st.caption(f"{label} ({EXPORT_FORMATS[fmt][0]}): building the styled workbook…")
+                            continue
+                        st.download_button(label=f"{label} ({EXPORT_FORMATS[fmt][0]})", data=partial(job.export, i, fmt),
+                                           file_name=export_file_name(file_name, reports, fmt), mime=export_mime(reports, fmt),
+                                           key=f"download-{job.id}-{i}-{fmt}", on_click="ignore")
+                if st.toggle("Preview results", key=f"preview-{job.id}"):
+                    show_preview(job)
+                if job.records:
+                    show_profile(job.records)
+            elif job.state == CANCELLED:
+                st.warning("Cancelled.")
+            elif job.state == FAILED:
+                st.error(f"Report generation failed: {job.error}")
+
 
 # Set page title and favicon
 st.set_page_config(page_title="Reconciliation Tool")
@@ -10,199 +202,51 @@ st.set_page_config(page_title="Reconciliation Tool")
 # Streamlit app title
 st.title("Reconciliation Report Generator")
 
-# Sidebar for selecting the report type
-report_type = st.sidebar.selectbox("Select Report Type", ["GST Reconciliation", "Debit Note Reconciliation", "Combined GST Reconciliation"])
+# Jobs of this session survive reruns in the session state and page reloads in the URL
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = [job_id for job_id in st.query_params.get("jobs", "").split(",") if job_id]
 
-# Define color for highlighting "Mismatch" and "Debit Note"
-mismatch_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
-debit_note_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-red_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")  # Define red_fill
-yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")  # Define yellow_fill
+# Sidebar for selecting the report type
+report_type = st.sidebar.selectbox("Select Report Type", ["GST Reconciliation", "Debit Note Reconciliation", "Combined GST Reconciliation",
+                                                           "Multi-Period GST Reconciliation", "Reconciliation History"])
 
 # GST Reconciliation Report
 if report_type == "GST Reconciliation":
     st.header("GST Reconciliation Report Generator")
     tally_file = st.file_uploader("Upload Tally Purchase Register", type=["xlsx"])
     gstr_file = st.file_uploader("Upload GSTR-2B Data", type=["xlsx"])
-
-    def generate_gst_report(tally_file, gstr_file):
-        # Read Tally Purchase Register
-        tally_df = pd.read_excel(tally_file, skiprows=9, dtype=str)
-
-        # Read GSTR-2B data
-        gstr_df = pd.read_excel(gstr_file, skiprows=4, dtype=str)
-
-        # Read GSTR-CDNR data
-        gstr_cdnr_df = pd.read_excel(gstr_file, sheet_name="B2B-CDNR", skiprows=3, dtype=str)
-
-        # Define correct column names for Tally Purchase Register
-        tally_df.columns = [
-            "Date", "Particulars", "Voucher_Type", "Voucher_No", "Supplier_Invoice_No",
-            "Supplier_Invoice_Date", "GSTIN", "Gross_Total", "Purchase_Accounts",
-            "Fixed_Assets", "Direct_Expenses", "Indirect_Expenses", "IGST", "CGST", "SGST"
-        ]
-
-        # Define correct column names for GSTR-2B
-        gstr_df.columns = [
-            "GSTIN", "Trade_Name", "Invoice_No", "Invoice_Type", "Invoice_Date",
-            "Invoice_Value", "Place_of_Supply", "Reverse_Charge", "Taxable_Value", "Integrated_Tax",
-            "Central_Tax", "State_UT_Tax", "Cess", "GSTR_IFF_Period", "GSTR_IFF_Filing_Date",
-            "ITC_Availability", "Reason", "Applicable_Tax_Rate", "Source", "IRN", "IRN_Date"
-        ]
-
-        # Define correct column names for GSTR-CDNR
-        gstr_cdnr_df.columns = [
-            "GSTIN", "Trade_Legal_Name", "Invoice_No", "Note_Type", "Note_Supply_Type",
-            "Note_Date", "Invoice_Value", "Place_of_Supply", "Supply_Attract_Reverse_Charge", "Taxable_Value",
-            "Integrated_Tax", "Central_Tax", "State_UT_Tax", "Cess", "GSTR_1_IFF_GSTR_5_Period",
-            "GSTR_1_IFF_GSTR_5_Filing_Date", "ITC_Availability", "Reason", "Applicable_Tax_Rate",
-            "Source", "IRN", "IRN_Date"
-        ]
-
-        # Ensure 'Note_Type' exists and filter only "Debit Note" records
-        if "Note_Type" in gstr_cdnr_df.columns:
-            debit_note_df = gstr_cdnr_df[gstr_cdnr_df["Note_Type"].str.contains("Debit Note", case=False, na=False)]
-        else:
-            debit_note_df = pd.DataFrame(columns=gstr_cdnr_df.columns)
-
-        # Remove entries where both GSTIN and Invoice No are missing
-        tally_df.dropna(subset=["GSTIN", "Supplier_Invoice_No"], how="all", inplace=True)
-        gstr_df.dropna(subset=["GSTIN", "Invoice_No"], how="all", inplace=True)
-        debit_note_df.dropna(subset=["GSTIN", "Invoice_No"], how="all", inplace=True)
-
-        # Convert relevant numeric columns to float
-        tally_numeric_cols = ["Gross_Total", "Purchase_Accounts", "Fixed_Assets",
-                              "Direct_Expenses", "Indirect_Expenses", "IGST", "CGST", "SGST"]
-        gstr_numeric_cols = ["Invoice_Value", "Taxable_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"]
-
-        for col in tally_numeric_cols:
-            tally_df[col] = pd.to_numeric(tally_df[col], errors="coerce").fillna(0)
-
-        for col in gstr_numeric_cols:
-            gstr_df[col] = pd.to_numeric(gstr_df[col], errors="coerce").fillna(0)
-            if col in debit_note_df.columns:
-                debit_note_df[col] = pd.to_numeric(debit_note_df[col], errors="coerce").fillna(0)
-
-        # Compute total expense in Tally
-        tally_df["Total_Expense"] = tally_df[["Purchase_Accounts", "Fixed_Assets", "Direct_Expenses", "Indirect_Expenses"]].sum(axis=1)
-
-        # Merge Tally with GSTR-2B
-        reconciliation_df_b2b = pd.merge(
-            tally_df, gstr_df,
-            left_on=["Supplier_Invoice_No", "GSTIN"],
-            right_on=["Invoice_No", "GSTIN"],
-            how="outer",
-            suffixes=("_Tally", "_GSTR"),
-            indicator=True
-        )
-
-        # Merge Tally with GSTR-CDNR (Debit Note Only)
-        reconciliation_df_cdnr = pd.merge(
-            tally_df, debit_note_df,
-            left_on=["Supplier_Invoice_No", "GSTIN"],
-            right_on=["Invoice_No", "GSTIN"],
-            how="outer",
-            suffixes=("_Tally", "_GSTR"),
-            indicator=True
-        )
-
-        # Ensure B2B-CDNR (Debit Note) records are retained
-        if "Note_Type" in reconciliation_df_cdnr.columns:
-            reconciliation_df_cdnr = reconciliation_df_cdnr[reconciliation_df_cdnr["Note_Type"].str.contains("Debit Note", case=False, na=False)]
-
-        # Define ₹2 tolerance threshold
-        tolerance = 2.00
-
-        # Identify Reconciliation Status
-        def get_status(row):
-            if row["_merge"] == "right_only":  # Exists only in GSTR (Missing in Tally)
-                return "Missing in Tally"
-            elif row["_merge"] == "left_only":  # Exists only in Tally (Missing in GSTR)
-                return "Missing in GSTR"
-            # Convert to numeric before comparison, handling potential errors
-            gross_total = pd.to_numeric(row["Gross_Total"], errors="coerce")
-            invoice_value = pd.to_numeric(row["Invoice_Value"], errors="coerce")
-            total_expense = pd.to_numeric(row["Total_Expense"], errors="coerce")
-            taxable_value = pd.to_numeric(row["Taxable_Value"], errors="coerce")
-            igst = pd.to_numeric(row["IGST"], errors="coerce")
-            integrated_tax = pd.to_numeric(row["Integrated_Tax"], errors="coerce")
-            cgst = pd.to_numeric(row["CGST"], errors="coerce")
-            central_tax = pd.to_numeric(row["Central_Tax"], errors="coerce")
-            sgst = pd.to_numeric(row["SGST"], errors="coerce")
-            state_ut_tax = pd.to_numeric(row["State_UT_Tax"], errors="coerce")
-
-            # Perform the comparisons after conversion
-            if (abs(gross_total - invoice_value) > tolerance or
-                  abs(total_expense - taxable_value) > tolerance or
-                  abs(igst - integrated_tax) > tolerance or
-                  abs(cgst - central_tax) > tolerance or
-                  abs(sgst - state_ut_tax) > tolerance):
-                return "Mismatch"
-            else:
-                return "Matched"
-
-        # Apply reconciliation logic
-        reconciliation_df_b2b["Status"] = reconciliation_df_b2b.apply(get_status, axis=1)
-        reconciliation_df_cdnr["Status"] = reconciliation_df_cdnr.apply(get_status, axis=1)
-
-        # Remove rows where "Invoice_No" is "invoice number" and status is "Missing in Tally"
-        reconciliation_df_b2b = reconciliation_df_b2b[~((reconciliation_df_b2b["Invoice_No"].str.lower() == "invoice number") & (reconciliation_df_b2b["Status"] == "Missing in Tally"))]
-        
-        # Drop merge indicator column
-        reconciliation_df_b2b.drop(columns=["_merge"], inplace=True)
-        reconciliation_df_cdnr.drop(columns=["_merge"], inplace=True)
-
-        # Select only required columns
-        output_df_b2b = reconciliation_df_b2b[[
-            "GSTIN", "Supplier_Invoice_No", "Gross_Total",
-             "Total_Expense", "IGST", "CGST",  "SGST", "Invoice_No",
-             "Invoice_Value","Taxable_Value","Integrated_Tax","Central_Tax","State_UT_Tax", "Status"
-        ]]
-
-        output_df_cdnr = reconciliation_df_cdnr[[
-            "GSTIN", "Supplier_Invoice_No", "Gross_Total",
-             "Total_Expense", "IGST", "CGST",  "SGST", "Invoice_No",
-             "Invoice_Value","Taxable_Value","Integrated_Tax","Central_Tax","State_UT_Tax", "Status"
-        ]]
-
-        # Combine both DataFrames into one for GSTR-2B + CDNR (Debit Note)
-        combined_df = pd.concat([output_df_b2b, output_df_cdnr], ignore_index=True)
-
-        # Save to Excel with formatting
-        output_file = "GST_Reconciliation_Report_Combined.xlsx"
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            combined_df.to_excel(writer, sheet_name="GSTR-2B", index=False)
-
-            # Access the workbook and the sheet
-            workbook = writer.book
-            sheet_b2b = workbook["GSTR-2B"]
-
-            # Function to apply red highlight to mismatch rows and yellow for Debit Notes
-            def highlight_rows(sheet, df):
-                for i, row in df.iterrows():
-                    if row["Status"] == "Mismatch":
-                        for col in sheet.iter_cols(min_row=i+2, max_row=i+2, min_col=1, max_col=len(df.columns)):
-                            col[0].fill = mismatch_fill
-                    # Highlight Debit Note rows in yellow
-                    if i >= len(output_df_b2b):  # These rows come from B2B-CDNR (Debit Note)
-                        for col in sheet.iter_cols(min_row=i+2, max_row=i+2, min_col=1, max_col=len(df.columns)):
-                            col[0].fill = debit_note_fill
-
-            # Highlight mismatches and debit note rows
-            highlight_rows(sheet_b2b, combined_df)
-
-        return output_file
+    tolerance, paise_mode = amount_options("gst")
+    formats, styled_later = export_options("gst")
+    fuzzy_mode = st.checkbox("Pair invoice numbers that differ only in formatting (Probable Match)")
+    aggregate_mode = st.checkbox("Sum invoices booked over several lines and match invoices split in parts (Split Match)")
+    incremental_mode = st.checkbox("Only re-match invoices changed since the previous run",
+                                   disabled=fuzzy_mode or paise_mode or aggregate_mode)
+    incremental_mode = incremental_mode and not (fuzzy_mode or paise_mode or aggregate_mode)
+    save_history, _, period = history_options("gst", gstr_file, ask_client=False)
+    client_name = st.text_input("Client name", disabled=not (incremental_mode or save_history))
+    history_error = check_history(save_history, client_name, period)
 
     if st.button("Generate GST Report"):
-        if tally_file and gstr_file:
-            output_file = generate_gst_report(tally_file, gstr_file)
-            st.success("✅ GST Reconciliation Report Generated Successfully!")
-            st.download_button(
-                label="Download Report",
-                data=open(output_file, "rb"),
-                file_name=output_file,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+        if incremental_mode and not client_name:
+            st.error("Please enter the client name to compare against its previous run.")
+        elif history_error:
+            st.error(history_error)
+        elif tally_file and gstr_file:
+            tally_copy, gstr_copy = copy_upload(tally_file), copy_upload(gstr_file)
+
+            def work():
+                downloads = []
+                if incremental_mode:
+                    report, delta = reconcile_gst_incremental(tally_copy, gstr_copy, client_name, tolerance)
+                    downloads.append(("Download Changes Since Previous Run", [delta], DELTA_REPORT_FILE))
+                else:
+                    report = reconcile_gst(tally_copy, gstr_copy, fuzzy=fuzzy_mode, tolerance=tolerance, paise=paise_mode,
+                                           aggregate=aggregate_mode)
+                if save_history:
+                    save_report_run("gst", [report], client_name, period or None, tolerance,
+                                    tally_file=tally_copy, gstr_file=gstr_copy)
+                return [("Download Report", [report], GST_REPORT_FILE)] + downloads
+            queue_report("gst", work, formats, styled_later)
         else:
             st.error("Please upload both Tally Purchase Register and GSTR-2B Data files.")
 
@@ -211,135 +255,25 @@ elif report_type == "Debit Note Reconciliation":
     st.header("Debit Note Reconciliation Report Generator")
     debit_file = st.file_uploader("Upload Debit Note Register", type=["xlsx"])
     gstr_file = st.file_uploader("Upload GSTR-2B Data", type=["xlsx"])
-
-    def generate_debit_note_report(debit_file, gstr_file):
-        # Read Debit Note Register
-        debit_df = pd.read_excel(debit_file, skiprows=9, dtype=str).iloc[:-1]
-
-        # Read GSTR-CDNR data with correct header row
-        gstr_cdnr_df = pd.read_excel(gstr_file, sheet_name="B2B-CDNR", skiprows=5, dtype=str)
-
-        # Define correct column names for Debit Note Register
-        debit_df.columns = [
-            "Date", "Particulars", "Supplier_Invoice_No", "Credit Note Date", "Voucher Type", "Voucher_No",
-            "Voucher Ref. No.", "Voucher Ref. Date", "GSTIN", "Gross_Total", "Purchase_Accounts",
-            "Fixed_Assets", "IGST", "CGST", "SGST", "Round Off"
-        ]
-
-        # Define correct column names for GSTR-CDNR
-        gstr_cdnr_df.columns = [
-            "GSTIN_of_Supplier", "Trade_Legal_Name", "Invoice_Number", "Note_Type", "Note_Supply_Type",
-            "Note_Date", "Invoice_Value", "Place_of_Supply", "Supply_Attract_Reverse_Charge", "Taxable_Value",
-            "Integrated_Tax", "Central_Tax", "State_UT_Tax", "Cess", "GSTR_1_IFF_GSTR_5_Period",
-            "GSTR_1_IFF_GSTR_5_Filing_Date", "ITC_Availability", "Reason", "Applicable_Tax_Rate",
-            "Source", "IRN", "IRN_Date"
-        ]
-
-        # Filter records where Note_Type contains 'Credit Note' (case insensitive)
-        credit_note_df = gstr_cdnr_df[gstr_cdnr_df["Note_Type"].str.contains("Credit Note", case=False, na=False)]
-
-        # Convert only relevant numeric columns to float in debit_df
-        debit_numeric_cols = ["Gross_Total", "Purchase_Accounts", "Fixed_Assets", "IGST", "CGST", "SGST"]
-        debit_df[debit_numeric_cols] = debit_df[debit_numeric_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
-
-        # Convert only relevant numeric columns to float in gstr_cdnr_df
-        gstr_numeric_cols = ["Invoice_Value", "Taxable_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"]
-        gstr_cdnr_df[gstr_numeric_cols] = gstr_cdnr_df[gstr_numeric_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
-
-        # Remove entries where Gross_Total and Purchase_Accounts are exactly 1.00
-        debit_df = debit_df[~((debit_df['Gross_Total'] == 1.00) & (debit_df['Purchase_Accounts'] == 1.00))]
-
-        # Calculate Total_Expense in Debit Note Register
-        debit_df["Total_Expense"] = debit_df[['Purchase_Accounts', 'Fixed_Assets']].sum(axis=1)
-
-        # Perform a full outer merge based on GSTIN + Invoice No.
-        reconciliation_df = pd.merge(
-            debit_df, gstr_cdnr_df,
-            left_on=['Supplier_Invoice_No', 'GSTIN'],
-            right_on=['Invoice_Number', 'GSTIN_of_Supplier'],
-            how='outer',
-            suffixes=('_DEBIT', '_GSTR'),
-            indicator=True
-        )
-
-        # Fill NaN values with 0 for numeric columns
-        comparison_cols = ["Gross_Total", "Invoice_Value", "Total_Expense", "Taxable_Value",
-                           "IGST", "Integrated_Tax", "CGST", "Central_Tax", "SGST", "State_UT_Tax"]
-        reconciliation_df[comparison_cols] = reconciliation_df[comparison_cols].fillna(0)
-
-        # Define ₹2 tolerance threshold
-        tolerance = 2.00
-
-        # Identify Reconciliation Status with ₹2 tolerance
-        def get_status(row):
-            if row["_merge"] == "right_only":  # Exists only in GSTR (Missing in Tally)
-                return "Missing in Tally"
-            elif row["_merge"] == "left_only":  # Exists only in Tally (Missing in GSTR)
-                return "Missing in GSTR"
-            elif (abs(row["Gross_Total"] - row["Invoice_Value"]) > tolerance or
-                  abs(row["Total_Expense"] - row["Taxable_Value"]) > tolerance or
-                  abs(row["IGST"] - row["Integrated_Tax"]) > tolerance or
-                  abs(row["CGST"] - row["Central_Tax"]) > tolerance or
-                  abs(row["SGST"] - row["State_UT_Tax"]) > tolerance):
-                return "Mismatch"
-            else:
-                return "Matched"
-
-        reconciliation_df["Status"] = reconciliation_df.apply(get_status, axis=1)
-
-        # Drop the merge indicator column
-        reconciliation_df.drop(columns=["_merge"], inplace=True)
-
-        # Select only required columns
-        output_df = reconciliation_df[[ 
-            "GSTIN", "Supplier_Invoice_No",  "Gross_Total",
-             "Total_Expense", "IGST",
-            "CGST",  "SGST", "Invoice_Number", "Invoice_Value","Taxable_Value", 
-            "Integrated_Tax","Central_Tax","State_UT_Tax", "Status"
-        ]]
-
-        # Save the report
-        output_file = "DebitNoteReconciliation_Report.xlsx"
-        output_df.to_excel(output_file, index=False)
-
-        # Load workbook for highlighting mismatches
-        wb = load_workbook(output_file)
-        ws = wb.active
-
-        # Columns to check for mismatch highlighting
-        columns_to_check = {
-            "Invoice_Value": "Gross_Total",
-            "Taxable_Value": "Total_Expense",
-            "Integrated_Tax": "IGST",
-            "Central_Tax": "CGST",
-            "State_UT_Tax": "SGST"
-        }
-        status_col_idx = output_df.columns.get_loc("Status") + 1
-
-        # Apply highlighting for mismatches
-        for row in range(2, ws.max_row + 1):  # Skip header
-            if ws.cell(row, status_col_idx).value == "Mismatch":
-                for col_gstr, col_tally in columns_to_check.items():
-                    gstr_col_idx = output_df.columns.get_loc(col_gstr) + 1
-                    tally_col_idx = output_df.columns.get_loc(col_tally) + 1
-                    ws.cell(row, gstr_col_idx).fill = red_fill
-                    ws.cell(row, tally_col_idx).fill = red_fill
-
-        # Save final file
-        wb.save(output_file)
-
-        return output_file
+    tolerance, paise_mode = amount_options("debit_note")
+    formats, styled_later = export_options("debit_note")
+    fuzzy_mode = st.checkbox("Pair note numbers that differ only in formatting (Probable Match)")
+    save_history, client_name, period = history_options("debit_note", gstr_file)
+    history_error = check_history(save_history, client_name, period)
 
     if st.button("Generate Debit Note Report"):
-        if debit_file and gstr_file:
-            output_file = generate_debit_note_report(debit_file, gstr_file)
-            st.success("✅ Debit Note Reconciliation Report Generated Successfully!")
-            st.download_button(
-                label="Download Report",
-                data=open(output_file, "rb"),
-                file_name=output_file,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+        if history_error:
+            st.error(history_error)
+        elif debit_file and gstr_file:
+            debit_copy, gstr_copy = copy_upload(debit_file), copy_upload(gstr_file)
+
+            def work():
+                report = reconcile_debit_notes(debit_copy, gstr_copy, fuzzy=fuzzy_mode, tolerance=tolerance, paise=paise_mode)
+                if save_history:
+                    save_report_run("debit_note", [report], client_name, period or None, tolerance,
+                                    debit_file=debit_copy, gstr_file=gstr_copy)
+                return [("Download Report", [report], DEBIT_NOTE_REPORT_FILE)]
+            queue_report("debit_note", work, formats, styled_later)
         else:
             st.error("Please upload both Debit Note Register and GSTR-2B Data files.")
 
@@ -349,311 +283,105 @@ elif report_type == "Combined GST Reconciliation":
     tally_file = st.file_uploader("Upload Tally Purchase Register", type=["xlsx"])
     gstr_file = st.file_uploader("Upload GSTR-2B Data", type=["xlsx"])
     debit_file = st.file_uploader("Upload Debit Note Register", type=["xlsx"])
-
-    def generate_combined_report(tally_file, gstr_file, debit_file):
-        # Read Tally Purchase Register
-        tally_df = pd.read_excel(tally_file, skiprows=9, dtype=str)
-
-        # Read GSTR-2B data
-        gstr_df = pd.read_excel(gstr_file, skiprows=5, dtype=str)
-
-        # Read Debit Note Register
-        debit_df = pd.read_excel(debit_file, skiprows=9, dtype=str)
-
-        # Read GSTR-CDNR data with correct header row
-        gstr_cdnr_df = pd.read_excel(gstr_file, sheet_name="B2B-CDNR", skiprows=5, dtype=str)
-
-        # Define correct column names for Tally Purchase Register
-        tally_df.columns = [
-            "Date", "Particulars", "Voucher_Type", "Voucher_No", "Supplier_Invoice_No",
-            "Supplier_Invoice_Date", "GSTIN", "Gross_Total", "Purchase_Accounts",
-            "Fixed_Assets", "Direct_Expenses", "Indirect_Expenses", "IGST", "CGST", "SGST"
-        ]
-
-        # Define correct column names for GSTR-2B
-        gstr_df.columns = [
-            "GSTIN", "Trade_Name", "Invoice_No", "Invoice_Type", "Invoice_Date",
-            "Invoice_Value", "Place_of_Supply", "Reverse_Charge", "Taxable_Value", "Integrated_Tax",
-            "Central_Tax", "State_UT_Tax", "Cess", "GSTR_IFF_Period", "GSTR_IFF_Filing_Date",
-            "ITC_Availability", "Reason", "Applicable_Tax_Rate", "Source", "IRN", "IRN_Date"
-        ]
-
-        # Define correct column names for Debit Note Register
-        debit_df.columns = [
-            "Date", "Particulars", "Supplier_Invoice_No", "Credit Note Date", "Voucher Type", "Voucher_No",
-            "Voucher Ref. No.", "Voucher Ref. Date", "GSTIN", "Gross_Total", "Purchase_Accounts",
-            "Fixed_Assets", "IGST", "CGST", "SGST", "Round Off"
-        ]
-
-        # Define correct column names for GSTR-CDNR
-        gstr_cdnr_df.columns = [
-            "GSTIN_of_Supplier", "Trade_Legal_Name", "Invoice_Number", "Note_Type", "Note_Supply_Type",
-            "Note_Date", "Invoice_Value", "Place_of_Supply", "Supply_Attract_Reverse_Charge", "Taxable_Value",
-            "Integrated_Tax", "Central_Tax", "State_UT_Tax", "Cess", "GSTR_1_IFF_GSTR_5_Period",
-            "GSTR_1_IFF_GSTR_5_Filing_Date", "ITC_Availability", "Reason", "Applicable_Tax_Rate",
-            "Source", "IRN", "IRN_Date"
-        ]
-
-        # Convert numeric columns to float
-        numeric_cols_tally = ["Gross_Total", "Purchase_Accounts", "Fixed_Assets", "Direct_Expenses", 
-                              "Indirect_Expenses", "IGST", "CGST", "SGST"]
-        numeric_cols_gstr = ["Invoice_Value", "Taxable_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"]
-        numeric_cols_debit = ["Gross_Total", "IGST", "CGST", "SGST"]
-
-        for col in numeric_cols_tally:
-            tally_df[col] = pd.to_numeric(tally_df[col], errors='coerce').fillna(0)
-
-        for col in numeric_cols_gstr:
-            gstr_df[col] = pd.to_numeric(gstr_df[col], errors='coerce').fillna(0)
-
-        for col in numeric_cols_debit:
-            debit_df[col] = pd.to_numeric(debit_df[col], errors='coerce').fillna(0)
-
-        # Aggregate Data by GSTIN & Trade Name
-        tally_agg = tally_df.groupby("GSTIN").agg({
-            "Particulars": lambda x: ', '.join(x.dropna().unique()),  # Concatenate unique names
-            "Gross_Total": "sum",
-            "IGST": "sum",
-            "CGST": "sum",
-            "SGST": "sum"
-        }).reset_index()
-
-        # Aggregate GSTR data by GSTIN while concatenating multiple Trade Names
-        gstr_agg = gstr_df.groupby("GSTIN").agg({
-            "Trade_Name": lambda x: ', '.join(x.dropna().unique()),  # Concatenate unique names
-            "Invoice_Value": "sum",
-            "Integrated_Tax": "sum",
-            "Central_Tax": "sum",
-            "State_UT_Tax": "sum"
-        }).reset_index()
-
-        # Aggregate Debit Note data by GSTIN while concatenating multiple Particulars
-        debit_agg = debit_df.groupby("GSTIN").agg({
-            "Particulars": lambda x: ', '.join(set(x)),  # Combine different Particulars
-            "Gross_Total": "sum",
-            "IGST": "sum",
-            "CGST": "sum",
-            "SGST": "sum",
-        }).reset_index()
-
-        # Aggregate GSTR-CDNR data by GSTIN while concatenating multiple Trade Names
-        gstr_cdnr_agg = gstr_cdnr_df.groupby("GSTIN_of_Supplier").agg({
-            "Trade_Legal_Name": lambda x: ', '.join(set(x)),  # Combine different Trade Names
-            "Invoice_Value": "sum",
-            "Integrated_Tax": "sum",
-            "Central_Tax": "sum",
-            "State_UT_Tax": "sum",
-        }).reset_index()
-
-        # Perform reconciliation based on GSTIN
-        reconciliation_df = pd.merge(
-            tally_agg, gstr_agg,
-            left_on=["GSTIN"],
-            right_on=["GSTIN"],
-            how="outer",
-            suffixes=("_Tally", "_GSTR"),
-            indicator=True
-        )
-
-        # List of columns to fill NaN with 0 (excluding "Particulars" and "Trade Name")
-        columns_to_fill = ["IGST", "CGST", "SGST", "Integrated_Tax", "Central_Tax", "State_UT_Tax"]
-
-        # Fill NaN only for selected numeric columns
-        reconciliation_df[columns_to_fill] = reconciliation_df[columns_to_fill].fillna(0)
-
-        # Define ₹2 tolerance
-        tolerance = 2.00
-
-        # Calculate Differences
-        reconciliation_df["Diff_IGST"] = reconciliation_df["IGST"] - reconciliation_df["Integrated_Tax"]
-        reconciliation_df["Diff_CGST"] = reconciliation_df["CGST"] - reconciliation_df["Central_Tax"]
-        reconciliation_df["Diff_SGST"] = reconciliation_df["SGST"] - reconciliation_df["State_UT_Tax"]
-
-        # Determine Status
-        def get_status(row):
-            if row["_merge"] == "right_only":
-                return "Missing in Tally"
-            elif row["_merge"] == "left_only":
-                return "Missing in GSTR"
-            elif (abs(row["Diff_IGST"]) > tolerance or abs(row["Diff_CGST"]) > tolerance or abs(row["Diff_SGST"]) > tolerance):
-                return "Mismatch"
-            else:
-                return "Matched"
-
-        reconciliation_df["Remarks"] = reconciliation_df.apply(get_status, axis=1)
-
-        # Drop unnecessary columns
-        reconciliation_df.drop(columns=["_merge"], inplace=True)
-
-        # Reorder columns to match output format
-        final_dfg = reconciliation_df[
-            [
-                "GSTIN",
-                "Particulars",
-                "IGST",
-                "CGST",
-                "SGST",
-                "Trade_Name",
-                "Integrated_Tax",
-                "Central_Tax",
-                "State_UT_Tax",
-                "Diff_IGST",
-                "Diff_CGST",
-                "Diff_SGST",
-                "Remarks",
-            ]
-        ]
-        # Sort entries alphabetically by Particulars (Tally) and Trade Name (GSTR)
-        # Convert Particulars to string and sort alphabetically
-        final_dfg["Particulars"] = final_dfg["Particulars"].astype(str)
-        final_dfg = final_dfg.sort_values(by=["Particulars"], ascending=True)
-
-        # Perform reconciliation for Debit Note Register
-        reconciliation_df_debit = pd.merge(
-            debit_agg,
-            gstr_cdnr_agg,
-            left_on="GSTIN",
-            right_on="GSTIN_of_Supplier",
-            how="outer",
-            suffixes=("_DEBIT", "_GSTR"),
-            indicator=True,
-        )
-
-        # Convert relevant columns to numeric before calculating differences
-        reconciliation_df_debit["IGST"] = pd.to_numeric(
-            reconciliation_df_debit["IGST"], errors="coerce"
-        ).fillna(0)
-        reconciliation_df_debit["Integrated_Tax"] = pd.to_numeric(
-            reconciliation_df_debit["Integrated_Tax"], errors="coerce"
-        ).fillna(0)
-        reconciliation_df_debit["CGST"] = pd.to_numeric(
-            reconciliation_df_debit["CGST"], errors="coerce"
-        ).fillna(0)
-        reconciliation_df_debit["Central_Tax"] = pd.to_numeric(
-            reconciliation_df_debit["Central_Tax"], errors="coerce"
-        ).fillna(0)
-        reconciliation_df_debit["SGST"] = pd.to_numeric(
-            reconciliation_df_debit["SGST"], errors="coerce"
-        ).fillna(0)
-        reconciliation_df_debit["State_UT_Tax"] = pd.to_numeric(
-            reconciliation_df_debit["State_UT_Tax"], errors="coerce"
-        ).fillna(0)
-
-        # Calculate differences
-        reconciliation_df_debit["Diff_IGST"] = (
-            reconciliation_df_debit["IGST"] - reconciliation_df_debit["Integrated_Tax"]
-        )
-        reconciliation_df_debit["Diff_CGST"] = (
-            reconciliation_df_debit["CGST"] - reconciliation_df_debit["Central_Tax"]
-        )
-        reconciliation_df_debit["Diff_SGST"] = (
-            reconciliation_df_debit["SGST"] - reconciliation_df_debit["State_UT_Tax"]
-        )
-
-        def get_status_debit(row):
-            if row["_merge"] == "right_only":
-                return "Missing in Tally"
-            elif row["_merge"] == "left_only":
-                return "Missing in GSTR"
-            elif (
-                abs(row["Diff_IGST"]) > tolerance
-                or abs(row["Diff_CGST"]) > tolerance
-                or abs(row["Diff_SGST"]) > tolerance
-            ):
-                return "Mismatch"
-            else:
-                return "Matched"
-
-        reconciliation_df_debit["Status"] = reconciliation_df_debit.apply(
-            get_status_debit, axis=1
-        )
-        reconciliation_df_debit.drop(columns=["_merge"], inplace=True)
-
-        # Reorder columns
-        final_dfd = reconciliation_df_debit[
-            [
-                "GSTIN",
-                "Particulars",
-                "IGST",
-                "CGST",
-                "SGST",
-                "Trade_Legal_Name",
-                "Integrated_Tax",
-                "Central_Tax",
-                "State_UT_Tax",
-                "Diff_IGST",
-                "Diff_CGST",
-                "Diff_SGST",
-                "Status",
-            ]
-        ]
-
-        # Convert numeric columns to float and negate debit values
-        numeric_cols = [
-            "IGST",
-            "CGST",
-            "SGST",
-            "Integrated_Tax",
-            "Central_Tax",
-            "State_UT_Tax",
-            "Diff_IGST",
-            "Diff_CGST",
-            "Diff_SGST",
-        ]
-        for col in numeric_cols:
-            final_dfg[col] = pd.to_numeric(final_dfg[col], errors="coerce").fillna(0)
-            final_dfd[col] = -pd.to_numeric(final_dfd[col], errors="coerce").fillna(0)
-
-        # Ensure column names match
-        column_mapping = {
-            "GSTIN_of_Supplier": "GSTIN",
-            "Trade_Legal_Name": "Trade_Name",
-            "Invoice_Value": "Integrated_Tax",
-            "Gross_Total": "IGST",
-        }
-        final_dfd.rename(columns=column_mapping, inplace=True)
-
-        # Add remarks for debit notes
-        final_dfd["Remarks"] = "Debit Note"
-
-        # Combine both dataframes
-        combined_df = pd.concat([final_dfg, final_dfd], ignore_index=True)
-
-        # Sort so that debit notes appear immediately after their respective purchase entries
-        combined_df = combined_df.sort_values(by=["Particulars"], ascending=[True])
-
-        # Save to Excel
-        output_file = "GST_Reconciliation_Summary.xlsx"
-        combined_df.to_excel(output_file, index=False)
-
-        # Load workbook for highlighting
-        wb = load_workbook(output_file)
-        ws = wb.active
-
-        # Apply highlighting for debit notes
-        status_col_idx = combined_df.columns.get_loc("Remarks") + 1
-        for row in range(2, ws.max_row + 1):  # Skip header
-            if ws.cell(row, status_col_idx).value == "Debit Note":
-                for col in numeric_cols:
-                    col_idx = combined_df.columns.get_loc(col) + 1
-                    ws.cell(row, col_idx).fill = yellow_fill
-
-        # Save final file
-        wb.save(output_file)
-
-        return output_file
+    tolerance, paise_mode = amount_options("combined")
+    formats, styled_later = export_options("combined")
+    use_master = st.checkbox("Name and sort suppliers from the client's supplier master, adding this upload's suppliers to it",
+                             help=f"Supplier master: {SUPPLIER_DB}")
+    save_history, _, period = history_options("combined", gstr_file, ask_client=False)
+    client_name = st.text_input("Client name", key="combined-client", disabled=not (use_master or save_history))
+    history_error = check_history(save_history, client_name, period)
 
     if st.button("Generate Combined Report"):
-        if tally_file and gstr_file and debit_file:
-            output_file = generate_combined_report(tally_file, gstr_file, debit_file)
-            st.success("✅ Combined GST Reconciliation Report Generated Successfully!")
-            st.download_button(
-                label="Download Report",
-                data=open(output_file, "rb"),
-                file_name=output_file,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
+        if use_master and not client_name:
+            st.error("Please enter the client name whose supplier master to use.")
+        elif history_error:
+            st.error(history_error)
+        elif tally_file and gstr_file and debit_file:
+            tally_copy, gstr_copy, debit_copy = copy_upload(tally_file), copy_upload(gstr_file), copy_upload(debit_file)
+
+            def work():
+                report = reconcile_combined(tally_copy, gstr_copy, debit_copy, tolerance=tolerance, paise=paise_mode,
+                                            suppliers_db=SUPPLIER_DB if use_master else None, client=client_name)
+                if save_history:
+                    save_report_run("combined", [report], client_name, period or None, tolerance,
+                                    tally_file=tally_copy, gstr_file=gstr_copy, debit_file=debit_copy)
+                return [("Download Report", [report], COMBINED_REPORT_FILE)]
+            queue_report("combined", work, formats, styled_later)
         else:
             st.error(
                 "Please upload Tally Purchase Register, GSTR-2B Data, and Debit Note Register files."
-            )
\ No newline at end of file
+            )
+
+# Multi-Period GST Reconciliation Report
+elif report_type == "Multi-Period GST Reconciliation":
+    st.header("Multi-Period GST Reconciliation Report Generator")
+    tally_file = st.file_uploader("Upload Tally Purchase Register for the whole year", type=["xlsx"])
+    gstr_uploads = st.file_uploader("Upload the GSTR-2B of every period", type=["xlsx"], accept_multiple_files=True)
+    gstr_periods = [
+        st.text_input(f"Period of {upload.name} (YYYY-MM)", value=period_from_name(upload.name) or "", key=f"period-{upload.name}")
+        for upload in gstr_uploads
+    ]
+    tolerance, paise_mode = amount_options("periods")
+    formats, styled_later = export_options("periods")
+    fuzzy_mode = st.checkbox("Pair invoice numbers that differ only in formatting (Probable Match)")
+    save_history, client_name, _ = history_options("periods")
+    history_error = check_history(save_history, client_name, None)
+
+    if st.button("Generate Multi-Period Report"):
+        try:
+            for period in gstr_periods:
+                check_period(period)
+        except ValueError as e:
+            st.error(f"{e}.")
+        else:
+            if len(set(gstr_periods)) < len(gstr_periods):
+                st.error("Please upload only one GSTR-2B file per period.")
+            elif history_error:
+                st.error(history_error)
+            elif tally_file and gstr_uploads:
+                tally_copy = copy_upload(tally_file)
+                gstr_copies = {period: copy_upload(upload) for period, upload in zip(gstr_periods, gstr_uploads)}
+
+                def work():
+                    period_reports = reconcile_periods(tally_copy, gstr_copies, fuzzy=fuzzy_mode, tolerance=tolerance, paise=paise_mode)
+                    if save_history:
+                        save_report_run("periods", period_reports, client_name, None, tolerance,
+                                        tally_file=tally_copy, gstr_files=gstr_copies)
+                    return [("Download Report", period_reports, PERIOD_REPORT_FILE)]
+                queue_report("periods", work, formats, styled_later)
+            else:
+                st.error("Please upload the Tally Purchase Register and at least one GSTR-2B Data file.")
+
+# Queries over the runs saved to the history
+elif report_type == "Reconciliation History":
+    st.header("Reconciliation History")
+    st.caption(f"Runs saved from every report page, stored in {HISTORY_DB}.")
+    client_filter = st.text_input("Client name (blank for every client)").strip() or None
+    streak_tab, invoice_tab, runs_tab = st.tabs(["Recurring status", "Invoice lookup", "Saved runs"])
+
+    with streak_tab:
+        status = st.selectbox("Status", [MISSING_IN_GSTR, MISSING_IN_TALLY, MISMATCH])
+        months = st.number_input("For at least this many months running", min_value=1, value=3, step=1)
+        gstin = st.text_input("GSTIN (blank for every supplier)", key="streak-gstin").strip() or None
+        result, seconds = status_streaks(status, int(months), client_filter, gstin)
+        st.caption(f"{len(result)} invoices in {seconds * 1000:.1f} ms")
+        st.dataframe(result, hide_index=True)
+
+    with invoice_tab:
+        gstin = st.text_input("GSTIN", key="lookup-gstin").strip() or None
+        invoice_no = st.text_input("Invoice number").strip() or None
+        if gstin or invoice_no:
+            result, seconds = invoice_history(gstin, invoice_no, client_filter)
+            st.caption(f"{len(result)} rows in {seconds * 1000:.1f} ms")
+            st.dataframe(result, hide_index=True)
+        else:
+            st.info("Enter a GSTIN, an invoice number or both.")
+
+    with runs_tab:
+        result, seconds = list_runs(client_filter)
+        st.caption(f"{len(result)} runs in {seconds * 1000:.1f} ms")
+        st.dataframe(result, hide_index=True)
+
+# Jobs of this session, on every page, refreshing themselves only while there is something to wait for
+refreshing = jobs_pending()
+st.fragment(show_jobs, run_every=1 if refreshing else None)(refreshing)
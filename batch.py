@@ -0,0 +1,195 @@
+"""Reconcile many entities or periods from the command line.
+
+The manifest is a CSV file with a ``name`` column and ``tally``, ``gstr``
+and ``debit`` columns holding paths to the Tally Purchase Register,
+GSTR-2B and Debit Note Register of each job (relative paths are resolved
+against the manifest). Every report whose inputs are present is generated
+into ``<output-dir>/<name>/`` and a summary of status counts and wall time
+per report is written to ``<output-dir>/summary.json``, along with the
+wall time, rows and peak memory of every stage. Reports are written in
+each of ``--formats``, the styled workbook last, so the fast exports are
+available first. An optional ``period``
+column (YYYY-MM) tags the runs saved with ``--history``.
+
+    python batch.py manifest.csv --output-dir reports --workers 4
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import time
+from concurrent.futures import as_completed
+
+from workers import process_pool, quiet_cache_warnings
+
+quiet_cache_warnings()
+
+import reports  # noqa: E402
+from exports import EXPORT_FORMATS, export_file_name, export_reports  # noqa: E402
+from history import HISTORY_DB, save_report_run  # noqa: E402
+from incremental import reconcile_gst_incremental  # noqa: E402
+from profiling import log_stages, record_stages  # noqa: E402
+from status import TOLERANCE  # noqa: E402
+from suppliers import SUPPLIER_DB  # noqa: E402
+
+# Reports that can be run for a job, and the manifest columns each one needs
+REPORTS = {
+    "gst": (reports.reconcile_gst, ["tally", "gstr"]),
+    "debit_note": (reports.reconcile_debit_notes, ["debit", "gstr"]),
+    "combined": (reports.reconcile_combined, ["tally", "gstr", "debit"]),
+}
+
+# Invoice-level reports that support fuzzy invoice number matching
+FUZZY_REPORTS = {"gst", "debit_note"}
+
+logger = logging.getLogger("batch")
+
+
+def read_manifest(manifest_file):
+    """Return the jobs of a manifest as dicts of name and input paths."""
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    with open(manifest_file, newline="") as f:
+        jobs = []
+        for row in csv.DictReader(f):
+            job = {"name": row["name"].strip(), "period": (row.get("period") or "").strip() or None}
+            for key in ("tally", "gstr", "debit"):
+                path = (row.get(key) or "").strip()
+                job[key] = os.path.join(base_dir, path) if path else None
+            jobs.append(job)
+    return jobs
+
+
+def write_outputs(report, job_dir, formats):
+    """Write ``report`` in every format, the styled workbook last, and return the path per format."""
+    return {
+        fmt: export_reports([report], fmt, os.path.join(job_dir, export_file_name(report.file_name, [report], fmt)))
+        for fmt in sorted(formats, key=lambda fmt: fmt == "xlsx")
+    }
+
+
+def run_report(job, report_name, output_dir, incremental=False, fuzzy=False, tolerance=TOLERANCE, paise=False,
+               history_db=None, formats=("xlsx",), shards=1, aggregate=False, suppliers_db=None):
+    """Generate one report of a job and return its summary record.
+
+    With ``incremental`` the GST report only re-matches invoices changed
+    since the job's previous run and also writes a delta report. With
+    ``fuzzy`` invoice-level reports pair near-identical invoice numbers.
+    Amounts differing by more than ``tolerance`` rupees are a mismatch;
+    with ``paise`` they are compared exactly in integer paise. With
+    ``aggregate`` the GST report sums the lines of each invoice and
+    matches split invoices. ``fuzzy``, ``paise`` and ``aggregate`` take
+    precedence over ``incremental``. With ``suppliers_db`` the combined
+    report names and sorts suppliers from the job's supplier master. With
+    ``history_db`` the run is also saved to that history database. The
+    report is written in each export format of ``formats``. With more
+    than one of ``shards`` the GST report is matched in that many GSTIN
+    shards, on as many processes.
+    """
+    reconcile, inputs = REPORTS[report_name]
+    start = time.perf_counter()
+    job_dir = os.path.join(output_dir, job["name"])
+    os.makedirs(job_dir, exist_ok=True)
+
+    record = {"name": job["name"], "report": report_name}
+    with record_stages() as stages:
+        if incremental and not (fuzzy or paise or aggregate) and report_name == "gst":
+            report, delta = reconcile_gst_incremental(*[job[key] for key in inputs], state_name=job["name"], tolerance=tolerance)
+            record["delta_outputs"] = write_outputs(delta, job_dir, formats)
+            record["delta_rows"] = len(delta.df)
+        else:
+            kwargs = {"fuzzy": True} if fuzzy and report_name in FUZZY_REPORTS else {}
+            if shards > 1 and report_name == "gst":
+                kwargs.update(shards=shards, workers=shards)
+            if aggregate and report_name == "gst":
+                kwargs["aggregate"] = True
+            if suppliers_db and report_name == "combined":
+                kwargs.update(suppliers_db=suppliers_db, client=job["name"])
+            report = reconcile(*[job[key] for key in inputs], tolerance=tolerance, paise=paise, **kwargs)
+        outputs = write_outputs(report, job_dir, formats)
+    if history_db:
+        record["run_id"] = save_report_run(report_name, [report], job["name"], job["period"], tolerance, history_db,
+                                           tally_file=job["tally"], gstr_file=job["gstr"], debit_file=job["debit"])
+
+    record.update({
+        "outputs": outputs,
+        "rows": len(report.df),
+        "status_counts": {str(k): int(v) for k, v in report.status_counts().items()},
+        "seconds": round(time.perf_counter() - start, 3),
+        "stages": [dict(stage, seconds=round(stage["seconds"], 4)) for stage in stages],
+    })
+    return record
+
+
+def run_batch(jobs, output_dir, report_names=tuple(REPORTS), workers=None, incremental=False, fuzzy=False,
+              tolerance=TOLERANCE, paise=False, history_db=None, formats=("xlsx",), shards=1, aggregate=False,
+              suppliers_db=None):
+    """Run every applicable report of every job across a process pool.
+
+    Returns one summary record per report; failed reports carry an
+    ``error`` instead of status counts.
+    """
+    summary = []
+    with process_pool(workers) as pool:
+        futures = {}
+        for job in jobs:
+            for report_name in report_names:
+                if all(job[key] for key in REPORTS[report_name][1]):
+                    futures[pool.submit(run_report, job, report_name, output_dir, incremental, fuzzy, tolerance, paise,
+                                         history_db, formats, shards, aggregate, suppliers_db)] = (job["name"], report_name)
+
+        for future in as_completed(futures):
+            name, report_name = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                logger.error("%s / %s failed: %s", name, report_name, e)
+                record = {"name": name, "report": report_name, "error": str(e)}
+            else:
+                logger.info("%s / %s done in %.2fs: %s", name, report_name, record["seconds"], record["status_counts"])
+                log_stages(record["stages"], name=name, report=report_name)
+            summary.append(record)
+
+    summary.sort(key=lambda record: (record["name"], record["report"]))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate reconciliation reports for every job in a manifest.")
+    parser.add_argument("manifest", help="CSV file with name, tally, gstr and debit columns")
+    parser.add_argument("--output-dir", default="reports", help="directory to write one folder of reports per job into")
+    parser.add_argument("--reports", nargs="+", choices=list(REPORTS), default=list(REPORTS), help="reports to generate")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="re-match only GST invoices changed since each job's previous run and write a delta report")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="pair unmatched invoices whose numbers differ only in formatting as Probable Match")
+    parser.add_argument("--aggregate", action="store_true",
+                        help="sum the lines of each GST invoice before matching and match invoices split in parts")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="largest difference in rupees still matched")
+    parser.add_argument("--exact", action="store_true",
+                        help="read amounts as integer paise so sums and tolerance checks are exact")
+    parser.add_argument("--history", nargs="?", const=HISTORY_DB, default=None, metavar="DB",
+                        help=f"save every run to a history database (default: {HISTORY_DB})")
+    parser.add_argument("--suppliers", nargs="?", const=SUPPLIER_DB, default=None, metavar="DB",
+                        help=f"name and sort combined report suppliers from each job's supplier master (default: {SUPPLIER_DB})")
+    parser.add_argument("--formats", nargs="+", choices=list(EXPORT_FORMATS), default=["xlsx"],
+                        help="formats to write every report in (default: the styled xlsx workbook)")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="match the GST report of each job in this many GSTIN shards, on as many processes")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary = run_batch(read_manifest(args.manifest), args.output_dir, args.reports, args.workers, args.incremental, args.fuzzy,
+                        args.tolerance, args.exact, args.history, args.formats, args.shards, args.aggregate,
+                        args.suppliers)
+    with open(os.path.join(args.output_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+    return 1 if any("error" in record for record in summary) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
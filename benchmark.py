@@ -0,0 +1,140 @@
+"""Time each stage of the three reports on synthetic inputs of several sizes.
+
+For every size, inputs are generated with synthetic.py and each report is
+reconciled and written in memory with cold caches. The wall time of every
+stage (read, normalize, aggregate, merge, classify, fuzzy, style, write)
+is written as JSON, so runs can be compared to catch regressions.
+
+    python benchmark.py --rows 10000 100000 --output benchmark.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from workers import quiet_cache_warnings
+
+quiet_cache_warnings()
+
+# Normalized inputs are cached on disk; benchmark runs use a private cache they clear
+BENCHMARK_CACHE_DIR = tempfile.mkdtemp(prefix="reconciliation_benchmark_")
+os.environ["RECONCILIATION_CACHE_DIR"] = BENCHMARK_CACHE_DIR
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import loaders  # noqa: E402
+import reports  # noqa: E402
+from profiling import record_stages, stage_totals  # noqa: E402
+from synthetic import generate_inputs  # noqa: E402
+
+# Reports that can be benchmarked, and the inputs each one needs
+REPORTS = {
+    "gst": (reports.reconcile_gst, ["tally", "gstr"]),
+    "debit_note": (reports.reconcile_debit_notes, ["debit", "gstr"]),
+    "combined": (reports.reconcile_combined, ["tally", "gstr", "debit"]),
+}
+
+logger = logging.getLogger("benchmark")
+
+
+def clear_caches():
+    """Drop parsed workbooks and cached normalized frames, so the next run starts cold."""
+    loaders._scan_sheets.clear()
+    loaders._parse_sheet.clear()
+    shutil.rmtree(loaders.CACHE_DIR, ignore_errors=True)
+
+
+def run_report(report_name, paths):
+    """Reconcile and write one report, returning its wall time and per-stage times."""
+    reconcile, inputs = REPORTS[report_name]
+    clear_caches()
+    with record_stages() as records:
+        start = time.perf_counter()
+        report = reconcile(*[paths[key] for key in inputs])
+        reports.write_report(report)
+        seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 4),
+        "stages": {name: round(value, 4) for name, value in stage_totals(records).items()},
+        "output_rows": len(report.df),
+        "status_counts": {str(k): int(v) for k, v in report.status_counts().items()},
+    }
+
+
+def run_benchmark(sizes, report_names=tuple(REPORTS), mismatch_rate=0.05, missing_rate=0.05, repeat=1, seed=0):
+    """Benchmark every report at every size and return one result record per (report, size).
+
+    With ``repeat`` above one each report runs several times and the
+    fastest run is kept.
+    """
+    results = []
+    for rows in sizes:
+        input_dir = tempfile.mkdtemp(prefix="reconciliation_inputs_")
+        try:
+            start = time.perf_counter()
+            paths = generate_inputs(input_dir, rows, mismatch_rate, missing_rate, seed=seed)
+            logger.info("generated %d rows in %.2fs", rows, time.perf_counter() - start)
+
+            for report_name in report_names:
+                runs = [run_report(report_name, paths) for _ in range(repeat)]
+                best = min(runs, key=lambda run: run["seconds"])
+                logger.info("%s / %d rows: %.2fs %s", report_name, rows, best["seconds"], best["stages"])
+                results.append({
+                    "report": report_name,
+                    "rows": rows,
+                    "mismatch_rate": mismatch_rate,
+                    "missing_rate": missing_rate,
+                    "input_bytes": {key: os.path.getsize(paths[key]) for key in REPORTS[report_name][1]},
+                    "repeat": repeat,
+                    **best,
+                })
+        finally:
+            shutil.rmtree(input_dir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the reconciliation reports on synthetic inputs.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000], help="purchase invoices per run")
+    parser.add_argument("--reports", nargs="+", choices=list(REPORTS), default=list(REPORTS), help="reports to benchmark")
+    parser.add_argument("--mismatch-rate", type=float, default=0.05, help="share of matched documents whose amounts differ")
+    parser.add_argument("--missing-rate", type=float, default=0.05, help="share of documents missing on each side")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per report and size; the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the synthetic inputs")
+    parser.add_argument("--output", help="JSON file to write the results to (default: standard output)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    try:
+        results = run_benchmark(args.rows, args.reports, args.mismatch_rate, args.missing_rate, args.repeat, args.seed)
+    finally:
+        shutil.rmtree(BENCHMARK_CACHE_DIR, ignore_errors=True)
+
+    output = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""Local SQLite databases kept under ~/.reconciliation, like the run history and the supplier master."""
+import os
+import sqlite3
+
+
+def connect(db_path, schema):
+    """Open the database at ``db_path``, creating its directory and the tables of ``schema`` on first use."""
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")  # Readers don't wait for a run being saved
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(schema)
+    return conn
@@ -0,0 +1,83 @@
+"""Report exports in the formats downstream systems ingest.
+
+The styled workbook is meant for people; an ERP import only needs the
+report rows, which CSV, Parquet and a plain workbook carry at a fraction
+of the cost of resolving and writing cell fills. A report of several
+sheets is exported as one zip archive holding a CSV or Parquet file per
+sheet.
+"""
+import io
+import os
+import zipfile
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from excel_writer import write_plain_excel_sheets
+from profiling import stage
+from reports import write_reports
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Export formats: label, file name suffix and MIME type
+EXPORT_FORMATS = {
+    "xlsx": ("Styled XLSX", ".xlsx", XLSX_MIME),
+    "xlsx_plain": ("Plain XLSX", "_plain.xlsx", XLSX_MIME),
+    "csv": ("CSV", ".csv", "text/csv"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+}
+
+# Formats written without styling, fast enough to be ready before the styled workbook
+FAST_FORMATS = ["xlsx_plain", "csv", "parquet"]
+
+# Formats written as one file per sheet
+FILE_PER_SHEET_FORMATS = {"csv", "parquet"}
+
+
+def is_archive(reports, fmt):
+    """Return whether ``reports`` are exported in ``fmt`` as a zip archive of one file per sheet."""
+    return fmt in FILE_PER_SHEET_FORMATS and len(reports) > 1
+
+
+def export_file_name(file_name, reports, fmt):
+    """Return the name of the ``fmt`` export of the reports of the workbook ``file_name``."""
+    stem = os.path.splitext(file_name)[0]
+    return f"{stem}.zip" if is_archive(reports, fmt) else stem + EXPORT_FORMATS[fmt][1]
+
+
+def export_mime(reports, fmt):
+    """Return the MIME type of the ``fmt`` export of ``reports``."""
+    return "application/zip" if is_archive(reports, fmt) else EXPORT_FORMATS[fmt][2]
+
+
+def write_table(df, fmt, output_file):
+    """Write one frame as CSV or Parquet to a path or binary file object."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if fmt == "csv":
+        pa_csv.write_csv(table, output_file)
+    else:
+        pq.write_table(table, output_file)
+
+
+def export_reports(reports, fmt, output_file=None):
+    """Export reports in ``fmt``, as bytes unless ``output_file`` is given.
+
+    The styled ``xlsx`` format is the workbook ``write_reports`` builds;
+    the others leave out every highlight.
+    """
+    if fmt == "xlsx":
+        return write_reports(reports, output_file)
+    target = io.BytesIO() if output_file is None else output_file
+    if fmt == "xlsx_plain":
+        write_plain_excel_sheets([(report.df, report.sheet_name) for report in reports], target)
+    else:
+        with stage("write", sum(len(report.df) for report in reports)):
+            if is_archive(reports, fmt):
+                with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+                    for report in reports:
+                        with archive.open(f"{report.sheet_name}{EXPORT_FORMATS[fmt][1]}", "w") as f:
+                            write_table(report.df, fmt, f)
+            else:
+                write_table(reports[0].df, fmt, target)
+    return target.getvalue() if output_file is None else output_file
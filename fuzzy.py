@@ -0,0 +1,102 @@
+"""Second-pass matching of invoice numbers that differ only in formatting.
+
+After the exact merge, a "Missing in GSTR" row and a "Missing in Tally" row
+of the same supplier are often one invoice written two ways, such as
+"INV/001" and "INV-1". Candidate pairs are found through a blocking index
+on (GSTIN, digits of the invoice number), so only rows that share both are
+ever compared and the work stays near-linear. Candidates are scored by the
+similarity of their normalized invoice numbers, and those whose amounts
+agree within the tolerance, as an exact match's must, are paired greedily,
+best score first. Each pair becomes one "Probable Match" row with its
+score.
+"""
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+from status import AMOUNT_PAIRS, MATCHED, MISSING_IN_GSTR, MISSING_IN_TALLY, PROBABLE_MATCH, TOLERANCE, classify_status
+
+# Minimum similarity of normalized invoice numbers for a probable match
+MIN_SCORE = 0.75
+
+
+def normalize_invoice(invoice_no):
+    """Upper-case invoice numbers and drop punctuation and leading zeros of digit runs."""
+    return (
+        invoice_no.astype(object).fillna("").astype(str)
+        .str.upper()
+        .str.replace(r"[^0-9A-Z]", "", regex=True)
+        .str.replace(r"(?<![0-9])0+(?=[0-9])", "", regex=True)
+    )
+
+
+def invoice_digits(normalized):
+    """Return the digits of normalized invoice numbers, used as the blocking key."""
+    return normalized.str.replace(r"[^0-9]", "", regex=True)
+
+
+def similarity(a, b):
+    """Return the similarity of two normalized invoice numbers between 0 and 1."""
+    return 1.0 if a == b else SequenceMatcher(None, a, b).ratio()
+
+
+def residue(df, rows, gstin_col, invoice_col):
+    """Return the blocking keys of the unmatched rows of one side."""
+    normalized = normalize_invoice(df.loc[rows, invoice_col])
+    side = pd.DataFrame({
+        "row": np.flatnonzero(rows),
+        "gstin": df.loc[rows, gstin_col].astype(object).to_numpy(),
+        "invoice": normalized.to_numpy(),
+        "digits": invoice_digits(normalized).to_numpy(),
+    })
+    return side[side["gstin"].notna() & (side["digits"] != "")]
+
+
+def match_residue(df, left_keys, right_keys, right_cols, min_score=MIN_SCORE, tolerance=TOLERANCE, paise=False,
+                  pairs=AMOUNT_PAIRS):
+    """Pair unmatched Tally and GSTR rows of a classified outer merge.
+
+    ``left_keys`` and ``right_keys`` are the (GSTIN, invoice number)
+    columns of the Tally and GSTR sides, and ``right_cols`` the columns
+    that come from the GSTR side. Rows are only paired when
+    ``classify_status`` would call them "Matched", with the amount
+    ``pairs`` agreeing within ``tolerance`` (in paise with ``paise``);
+    others stay unpaired. Each pair is merged into the Tally row, which
+    takes the GSTR values, the "Probable Match" status and a
+    ``Match_Score``; the GSTR row is dropped.
+    """
+    df = df.reset_index(drop=True)
+    df["Match_Score"] = np.nan
+    left = residue(df, (df["Status"] == MISSING_IN_GSTR).to_numpy(), *left_keys)
+    right = residue(df, (df["Status"] == MISSING_IN_TALLY).to_numpy(), *right_keys)
+
+    # Candidate pairs share a GSTIN and the digits of their invoice numbers
+    candidates = left.merge(right, on=["gstin", "digits"], suffixes=("_left", "_right"))
+    candidates["score"] = [similarity(a, b) for a, b in zip(candidates["invoice_left"], candidates["invoice_right"])]
+    candidates = candidates[candidates["score"] >= min_score]
+
+    # A similar number is not enough, the amounts must agree as for an exact match
+    amounts = pd.DataFrame({"_merge": "both"}, index=candidates.index)
+    for left_col, right_col in pairs:
+        amounts[left_col] = df[left_col].iloc[candidates["row_left"].to_numpy()].set_axis(candidates.index)
+        amounts[right_col] = df[right_col].iloc[candidates["row_right"].to_numpy()].set_axis(candidates.index)
+    candidates = candidates[classify_status(amounts, pairs, tolerance, paise=paise) == MATCHED]
+    candidates = candidates.sort_values(["score", "row_left", "row_right"], ascending=[False, True, True])
+
+    # Greedily take the best remaining pair for each row
+    used_left, used_right, pairs = set(), set(), []
+    for row_left, row_right, score in zip(candidates["row_left"], candidates["row_right"], candidates["score"]):
+        if row_left not in used_left and row_right not in used_right:
+            used_left.add(row_left)
+            used_right.add(row_right)
+            pairs.append((row_left, row_right, score))
+    if not pairs:
+        return df
+
+    row_left, row_right, score = (list(values) for values in zip(*pairs))
+    for col in right_cols:
+        df.loc[row_left, col] = df.loc[row_right, col].to_numpy()
+    df.loc[row_left, "Status"] = PROBABLE_MATCH
+    df.loc[row_left, "Match_Score"] = np.round(score, 3)
+    return df.drop(index=row_right).reset_index(drop=True)
@@ -0,0 +1,322 @@
+"""Compare the reports of faster engines against the reference, cell by cell.
+
+The reference is the original app's generators in ``legacy``, which share
+no code with the pipeline, so a change anywhere in the pipeline that
+alters a report is caught, however the engines agree with each other.
+With ``--reference pipeline`` it is instead each report's reconcile
+function with its default options, for inputs the original generators
+cannot read: GSTR-2B workbooks with amendment sheets, or registers whose
+headers are not at the original fixed rows.
+
+Every engine in ``ENGINES`` produces the same report its own way, such as
+the pipeline with its defaults, streaming the registers, reading warm
+cached frames, using integer paise or matching in GSTIN shards. The
+reports are compared row by row and cell by cell: text columns such as
+the status must be equal, and amounts must agree within ``--atol``
+rupees. Engines that match documents differently, such as fuzzy
+matching or summing invoice lines, cannot give the same rows; their
+reports must instead account for every document of the reference, with
+the same amount totals on each side and no more rows. Differences are
+counted per column, with the first few listed, alongside the timing
+ratio of each engine against the reference.
+
+Inputs are synthetic (``--rows``) or real, anonymized uploads listed in
+a batch manifest (``--manifest``). The exit status is 1 when any engine
+differs from the reference, so a speedup can be adopted once it passes.
+
+    python golden.py --rows 10000 --manifest anonymized/manifest.csv --output golden.json
+"""
+import argparse
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from benchmark import BENCHMARK_CACHE_DIR, REPORTS, clear_caches  # Sets up a private cache, so import it first
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import inputs  # noqa: E402
+import legacy  # noqa: E402
+from batch import read_manifest  # noqa: E402
+from status import AMOUNT_PAIRS  # noqa: E402
+from synthetic import generate_inputs  # noqa: E402
+
+
+class Engine(NamedTuple):
+    """A way of producing the reports that must give the reference's output."""
+    reports: tuple  # Reports the engine can produce
+    options: dict = {}  # Keyword arguments of the reports' reconcile functions
+    streaming: bool = False  # Read every register with the streaming reader
+    warm: bool = False  # Time a second run, whose inputs come from the on-disk cache
+    exact: bool = True  # Must give the reference's rows; otherwise only its documents and amounts
+
+
+# Engines compared against the reference; add new fast paths here
+ENGINES = {
+    "pipeline": Engine(tuple(REPORTS)),
+    "streaming": Engine(tuple(REPORTS), streaming=True),
+    "cached": Engine(tuple(REPORTS), warm=True),
+    # The combined report sums B2B-CDNR amounts as read, which only paise mode sums as numbers
+    "paise": Engine(("gst", "debit_note"), {"paise": True}),
+    "sharded": Engine(("gst",), {"shards": 4}),
+    "fuzzy": Engine(("gst", "debit_note"), {"fuzzy": True}, exact=False),
+    "aggregate": Engine(("gst",), {"aggregate": True}, exact=False),
+}
+
+# Original generators of each report, the default reference
+LEGACY_REPORTS = {
+    "gst": legacy.reconcile_gst,
+    "debit_note": legacy.reconcile_debit_notes,
+    "combined": legacy.reconcile_combined,
+}
+
+REFERENCES = ("legacy", "pipeline")
+
+# Columns naming a document of each side of a report, followed by its amounts, for engines that aren't exact
+DOCUMENT_COLUMNS = {
+    "gst": [
+        ["GSTIN", "Supplier_Invoice_No", *(left for left, _ in AMOUNT_PAIRS)],
+        ["GSTIN", "Invoice_No", *(right for _, right in AMOUNT_PAIRS)],
+    ],
+    "debit_note": [
+        ["GSTIN", "Supplier_Invoice_No", *(left for left, _ in AMOUNT_PAIRS)],
+        ["GSTIN", "Invoice_Number", *(right for _, right in AMOUNT_PAIRS)],
+    ],
+}
+
+# Largest difference in rupees between two amounts still counted as equal
+ATOL = 0.005
+
+# Differing cells listed per report and engine
+EXAMPLES = 10
+
+logger = logging.getLogger("golden")
+
+
+@contextmanager
+def streaming(enabled):
+    """Read registers with the streaming reader inside the block, or never with it."""
+    previous = inputs.STREAMING_MIN_BYTES
+    inputs.STREAMING_MIN_BYTES = 0 if enabled else float("inf")
+    try:
+        yield
+    finally:
+        inputs.STREAMING_MIN_BYTES = previous
+
+
+def run_engine(report_name, paths, engine):
+    """Produce one report with ``engine`` and return it with its wall time."""
+    reconcile, keys = REPORTS[report_name]
+    clear_caches()
+    with streaming(engine.streaming):
+        if engine.warm:
+            reconcile(*[paths[key] for key in keys], **engine.options)
+        start = time.perf_counter()
+        report = reconcile(*[paths[key] for key in keys], **engine.options)
+        return report, time.perf_counter() - start
+
+
+def run_legacy(report_name, paths):
+    """Produce one report with its original generator and return it with its wall time."""
+    keys = REPORTS[report_name][1]
+    start = time.perf_counter()
+    report = LEGACY_REPORTS[report_name](*[paths[key] for key in keys])
+    return report, time.perf_counter() - start
+
+
+def cell_text(values):
+    """Return cells as text for an exact comparison, blanks as None."""
+    return values.astype(object).where(values.notna(), None).to_numpy()
+
+
+def compare_reports(expected, actual, atol=ATOL, examples=EXAMPLES):
+    """Compare two reports cell by cell and return the differences.
+
+    Rows are compared by position. Numeric columns of the expected report
+    are compared as amounts within ``atol``, every other column exactly,
+    so a changed status is always a difference. Returns the number of
+    differing cells per column, the columns only one report has and up
+    to ``examples`` differing cells.
+    """
+    expected_df, actual_df = expected.df.reset_index(drop=True), actual.df.reset_index(drop=True)
+    rows = min(len(expected_df), len(actual_df))
+    result = {
+        "rows": [len(expected_df), len(actual_df)],
+        "missing_columns": [col for col in expected_df.columns if col not in actual_df.columns],
+        "extra_columns": [col for col in actual_df.columns if col not in expected_df.columns],
+        "differences": {},
+        "examples": [],
+    }
+    for col in expected_df.columns:
+        if col not in actual_df.columns:
+            continue
+        left, right = expected_df[col].iloc[:rows], actual_df[col].iloc[:rows]
+        if pd.api.types.is_numeric_dtype(left) and not pd.api.types.is_bool_dtype(left):
+            left_values = left.to_numpy(dtype=float)
+            right_values = pd.to_numeric(right, errors="coerce").to_numpy(dtype=float)
+            both_blank = np.isnan(left_values) & np.isnan(right_values)
+            differs = ~(both_blank | (np.abs(left_values - right_values) <= atol))
+        else:
+            left_values, right_values = cell_text(left), cell_text(right)
+            differs = np.array([a != b for a, b in zip(left_values, right_values)], dtype=bool)
+        if differs.any():
+            result["differences"][col] = int(differs.sum())
+            for row in np.flatnonzero(differs)[:max(0, examples - len(result["examples"]))]:
+                result["examples"].append({
+                    "row": int(row), "column": col,
+                    "expected": None if pd.isna(left_values[row]) else str(left_values[row]),
+                    "actual": None if pd.isna(right_values[row]) else str(right_values[row]),
+                })
+    result["equal"] = (
+        len(expected_df) == len(actual_df) and not result["missing_columns"] and not result["extra_columns"]
+        and not result["differences"]
+    )
+    return result
+
+
+def document_totals(df, columns):
+    """Return the amount totals of one side of a report, counting each document once.
+
+    ``columns`` name a document, then hold its amounts. A document
+    repeated over several rows, such as a line merged with every GSTR-2B
+    row of its invoice, counts once.
+    """
+    documents = df[[col for col in columns if col in df.columns]].drop_duplicates()
+    return documents.drop(columns=columns[:2], errors="ignore").apply(pd.to_numeric, errors="coerce").sum()
+
+
+def compare_totals(expected, actual, sides, atol=ATOL, examples=EXAMPLES):
+    """Check that a report accounts for every document of the expected one and return the differences.
+
+    ``sides`` are the document columns of each side, see
+    ``DOCUMENT_COLUMNS``. The amount totals of each side must agree within
+    ``atol``, and the report may merge rows but not have more of them.
+    Returns the same fields as ``compare_reports``.
+    """
+    result = {
+        "rows": [len(expected.df), len(actual.df)],
+        "missing_columns": [col for side in sides for col in side if col not in actual.df.columns],
+        "extra_columns": [],
+        "differences": {},
+        "examples": [],
+    }
+    for columns in sides:
+        expected_totals, actual_totals = document_totals(expected.df, columns), document_totals(actual.df, columns)
+        for col, total in expected_totals.items():
+            if col in actual_totals and abs(total - actual_totals[col]) <= atol:
+                continue
+            result["differences"][col] = 1
+            if len(result["examples"]) < examples:
+                result["examples"].append({
+                    "row": None, "column": col,
+                    "expected": str(total), "actual": str(actual_totals.get(col)),
+                })
+    result["equal"] = (
+        len(actual.df) <= len(expected.df) and not result["missing_columns"] and not result["differences"]
+    )
+    return result
+
+
+def run_golden(input_sets, report_names=tuple(REPORTS), engine_names=tuple(ENGINES), atol=ATOL, reference="legacy"):
+    """Compare every engine against the reference on every input set and return one record per comparison.
+
+    ``input_sets`` maps a name to input paths keyed like a batch manifest.
+    Reports whose inputs are missing from a set are skipped. ``reference``
+    is "legacy" for the original generators or "pipeline" for the
+    pipeline with its default options, which is then not compared against
+    itself.
+    """
+    if reference not in REFERENCES:
+        raise ValueError(f"Unknown reference {reference!r}")
+    results = []
+    for input_name, paths in input_sets.items():
+        for report_name in report_names:
+            if not all(paths.get(key) for key in REPORTS[report_name][1]):
+                continue
+            if reference == "legacy":
+                expected, reference_seconds = run_legacy(report_name, paths)
+            else:
+                expected, reference_seconds = run_engine(report_name, paths, ENGINES["pipeline"])
+            for engine_name in engine_names:
+                engine = ENGINES[engine_name]
+                if report_name not in engine.reports or engine_name == reference:
+                    continue
+                actual, seconds = run_engine(report_name, paths, engine)
+                if engine.exact:
+                    comparison = compare_reports(expected, actual, atol)
+                else:
+                    comparison = compare_totals(expected, actual, DOCUMENT_COLUMNS[report_name], atol)
+                logger.info(
+                    "%s / %s / %s: %s, %.2fs vs %.2fs (%.2fx)", input_name, report_name, engine_name,
+                    "equal" if comparison["equal"] else f"DIFFERS {comparison['differences'] or comparison['rows']}",
+                    seconds, reference_seconds, reference_seconds / seconds,
+                )
+                results.append({
+                    "inputs": input_name,
+                    "report": report_name,
+                    "engine": engine_name,
+                    "reference": reference,
+                    "reference_seconds": round(reference_seconds, 4),
+                    "seconds": round(seconds, 4),
+                    "speedup": round(reference_seconds / seconds, 3),
+                    **comparison,
+                })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare faster report engines against the reference reports.")
+    parser.add_argument("--rows", type=int, nargs="*", default=[10_000], help="purchase invoices per synthetic input set")
+    parser.add_argument("--amendment-rate", type=float, default=0.0,
+                        help="share of synthetic GSTR-2B documents reported as amendments (needs --reference pipeline)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the synthetic inputs")
+    parser.add_argument("--manifest", help="batch manifest of anonymized real inputs to compare on as well")
+    parser.add_argument("--reports", nargs="+", choices=list(REPORTS), default=list(REPORTS), help="reports to compare")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES), help="engines to compare")
+    parser.add_argument("--reference", choices=REFERENCES, default="legacy",
+                        help="original generators, or the pipeline with its default options")
+    parser.add_argument("--atol", type=float, default=ATOL, help="largest difference in rupees between equal amounts")
+    parser.add_argument("--output", help="JSON file to write the results to (default: standard output)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    input_dir = tempfile.mkdtemp(prefix="reconciliation_golden_")
+    try:
+        input_sets = {
+            f"synthetic-{rows}": generate_inputs(f"{input_dir}/{rows}", rows, seed=args.seed,
+                                                 amendment_rate=args.amendment_rate)
+            for rows in args.rows
+        }
+        if args.manifest:
+            input_sets.update({job["name"]: job for job in read_manifest(args.manifest)})
+        results = run_golden(input_sets, args.reports, args.engines, args.atol, args.reference)
+    finally:
+        shutil.rmtree(input_dir, ignore_errors=True)
+        shutil.rmtree(BENCHMARK_CACHE_DIR, ignore_errors=True)
+
+    output = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "reference": args.reference,
+        "atol": args.atol,
+        "equal": all(result["equal"] for result in results),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    return 0 if output["equal"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,285 @@
+"""History of reconciliation runs in a local SQLite database.
+
+Every saved run stores its normalized inputs and its classified report
+rows, tagged with the client and the period (YYYY-MM) they belong to.
+The rows are indexed on GSTIN, invoice number, period and status, so
+questions across many runs, like which invoices of a GSTIN have been
+"Missing in GSTR" for three months running, are answered with one query
+instead of opening a spreadsheet per month.
+"""
+import os
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import database
+from inputs import read_debit_register, read_gstr_b2b, read_gstr_cdnr, read_tally
+from periods import UNDATED
+from reports import read_gstr_documents
+from status import TOLERANCE
+
+# Database file; kept outside the cache directory, which may be cleared at any time
+HISTORY_DB = os.environ.get(
+    "RECONCILIATION_HISTORY_DB", os.path.join(os.path.expanduser("~"), ".reconciliation", "history.sqlite")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    created TEXT NOT NULL,
+    report TEXT NOT NULL,
+    client TEXT NOT NULL DEFAULT '',
+    period TEXT,
+    tolerance REAL,
+    rows INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    period TEXT,
+    gstin TEXT,
+    invoice_no TEXT,
+    status TEXT,
+    tally_amount REAL,
+    gstr_amount REAL
+);
+CREATE TABLE IF NOT EXISTS inputs (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    source TEXT NOT NULL,
+    period TEXT,
+    gstin TEXT,
+    invoice_no TEXT,
+    invoice_date TEXT,
+    amount REAL,
+    igst REAL,
+    cgst REAL,
+    sgst REAL
+);
+CREATE INDEX IF NOT EXISTS runs_client_period ON runs (client, period);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS results_gstin ON results (gstin, invoice_no);
+CREATE INDEX IF NOT EXISTS results_invoice ON results (invoice_no);
+CREATE INDEX IF NOT EXISTS results_status_period ON results (status, period);
+CREATE INDEX IF NOT EXISTS results_period_run ON results (period, run_id);
+CREATE INDEX IF NOT EXISTS inputs_run ON inputs (run_id);
+CREATE INDEX IF NOT EXISTS inputs_gstin ON inputs (gstin, invoice_no);
+CREATE INDEX IF NOT EXISTS inputs_invoice ON inputs (invoice_no);
+"""
+
+# Report columns stored per result row: Tally invoice no., GSTR-2B invoice no., Tally amounts, GSTR-2B amounts, status
+RESULT_COLUMNS = {
+    "gst": ("Supplier_Invoice_No", "Invoice_No", ["Gross_Total"], ["Invoice_Value"], "Status"),
+    "periods": ("Supplier_Invoice_No", "Invoice_No", ["Gross_Total"], ["Invoice_Value"], "Status"),
+    "debit_note": ("Supplier_Invoice_No", "Invoice_Number", ["Gross_Total"], ["Invoice_Value"], "Status"),
+    "combined": (None, None, ["IGST", "CGST", "SGST"], ["Integrated_Tax", "Central_Tax", "State_UT_Tax"], "Remarks"),
+}
+
+# Input columns stored per input row: GSTIN, invoice no., invoice date, amount, IGST, CGST, SGST
+INPUT_COLUMNS = {
+    "tally": ("GSTIN", "Supplier_Invoice_No", "Supplier_Invoice_Date", "Gross_Total", "IGST", "CGST", "SGST"),
+    "debit": ("GSTIN", "Supplier_Invoice_No", None, "Gross_Total", "IGST", "CGST", "SGST"),
+    "gstr": ("GSTIN", "Invoice_No", None, "Invoice_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"),
+    "gstr_notes": ("GSTIN", "Invoice_No", None, "Invoice_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"),
+    "gstr_cdnr": ("GSTIN_of_Supplier", "Invoice_Number", None, "Invoice_Value", "Integrated_Tax", "Central_Tax",
+                  "State_UT_Tax"),
+}
+
+
+def connect(db_path=None):
+    """Open the history database, creating its tables and indexes on first use."""
+    return database.connect(db_path or HISTORY_DB, SCHEMA)
+
+
+def text_values(series):
+    """Return a column as a list of str with blanks as None."""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def amount_values(df, columns):
+    """Return the sum of amount ``columns`` of each row as a list of float, None where all are blank."""
+    amounts = df[columns].apply(pd.to_numeric, errors="coerce")
+    total = amounts.sum(axis=1, min_count=1)
+    return total.astype(object).where(total.notna(), None).tolist()
+
+
+def result_records(run_id, report_name, period, df):
+    """Return the result rows of a report as tuples for the ``results`` table."""
+    tally_no, gstr_no, tally_amounts, gstr_amounts, status_col = RESULT_COLUMNS[report_name]
+    if tally_no is None:
+        invoice_no = [None] * len(df)
+    else:
+        invoice_no = text_values(df[tally_no].astype(object).fillna(df[gstr_no].astype(object)))
+    gstin = df["GSTIN"] if "GSTIN" in df.columns else df["GSTIN_of_Supplier"]
+    return zip(
+        [run_id] * len(df), [period] * len(df), text_values(gstin), invoice_no, text_values(df[status_col]),
+        amount_values(df, tally_amounts), amount_values(df, gstr_amounts),
+    )
+
+
+def input_records(run_id, source, period, df):
+    """Return the rows of a normalized input as tuples for the ``inputs`` table."""
+    gstin, invoice_no, invoice_date, *amounts = INPUT_COLUMNS[source]
+    n = len(df)
+    return zip(
+        [run_id] * n, [source] * n, [period] * n, text_values(df[gstin]), text_values(df[invoice_no]),
+        text_values(df[invoice_date]) if invoice_date else [None] * n,
+        *[amount_values(df, [col]) for col in amounts],
+    )
+
+
+def read_run_inputs(report_name, tally_file=None, gstr_file=None, debit_file=None, gstr_files=None):
+    """Return the normalized inputs of a run as ``(source, period, frame)``, as the report reads them.
+
+    Inputs come from the same cached readers as the report, so reading
+    them again after the run is cheap. ``gstr_files`` maps periods to the
+    GSTR-2B files of a multi-period run.
+    """
+    if report_name == "gst":
+        gstr_df, debit_note_df = read_gstr_documents(gstr_file)
+        return [("tally", None, read_tally(tally_file)), ("gstr", None, gstr_df), ("gstr_notes", None, debit_note_df)]
+    if report_name == "debit_note":
+        return [("debit", None, read_debit_register(debit_file).iloc[:-1]), ("gstr_cdnr", None, read_gstr_cdnr(gstr_file))]
+    if report_name == "combined":
+        return [
+            ("tally", None, read_tally(tally_file)), ("gstr", None, read_gstr_b2b(gstr_file)),
+            ("debit", None, read_debit_register(debit_file)), ("gstr_cdnr", None, read_gstr_cdnr(gstr_file)),
+        ]
+    if report_name == "periods":
+        inputs = [("tally", None, read_tally(tally_file))]
+        for period, file in gstr_files.items():
+            gstr_df, debit_note_df = read_gstr_documents(file)
+            inputs += [("gstr", period, gstr_df), ("gstr_notes", period, debit_note_df)]
+        return inputs
+    raise ValueError(f"Unknown report {report_name!r}")
+
+
+def save_run(report_name, sections, inputs=(), client="", period=None, tolerance=TOLERANCE, db_path=None):
+    """Store a reconciliation run and return its ``run_id``.
+
+    ``sections`` is a sequence of ``(period, frame)`` report rows, where a
+    period of None stands for the run's ``period``; a multi-period run has
+    one section per period. ``inputs`` is a sequence of ``(source, period,
+    frame)`` normalized inputs, see ``read_run_inputs``.
+    """
+    created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with closing(connect(db_path)) as conn, conn:
+        run_id = conn.execute(
+            "INSERT INTO runs (created, report, client, period, tolerance, rows) VALUES (?, ?, ?, ?, ?, ?)",
+            (created, report_name, client or "", period, tolerance, sum(len(df) for _, df in sections)),
+        ).lastrowid
+        for section_period, df in sections:
+            conn.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                result_records(run_id, report_name, section_period or period, df),
+            )
+        for source, input_period, df in inputs:
+            conn.executemany(
+                "INSERT INTO inputs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                input_records(run_id, source, input_period or period, df),
+            )
+    return run_id
+
+
+def save_report_run(report_name, reports, client="", period=None, tolerance=TOLERANCE, db_path=None, **files):
+    """Store the reports of a run, with its inputs read again from ``files``, and return its ``run_id``.
+
+    ``files`` are the keyword arguments of ``read_run_inputs``. The
+    period sheets of a multi-period run are stored under their own period.
+    """
+    if report_name == "periods":
+        sections = [(None if report.sheet_name == UNDATED else report.sheet_name, report.df) for report in reports[1:]]
+    else:
+        sections = [(None, report.df) for report in reports]
+    return save_run(report_name, sections, read_run_inputs(report_name, **files), client, period, tolerance, db_path)
+
+
+def where_clause(filters, always=()):
+    """Return a WHERE clause of the conditions in ``always`` and the given ``filters``, with its parameters.
+
+    ``filters`` are ``(condition, value)`` pairs with one ``?`` each; a
+    pair whose value is None is left out rather than written as
+    ``? IS NULL OR ...``, which would keep SQLite from using its index.
+    """
+    given = [(condition, value) for condition, value in filters if value is not None]
+    conditions = [*always, *(condition for condition, _ in given)]
+    return ("WHERE " + " AND ".join(conditions) if conditions else ""), [value for _, value in given]
+
+
+def query(sql, params=(), db_path=None):
+    """Run a read-only query and return the rows as a frame and the query time in seconds."""
+    with closing(connect(db_path)) as conn:
+        start = time.perf_counter()
+        df = pd.read_sql_query(sql, conn, params=params)
+        return df, time.perf_counter() - start
+
+
+def list_runs(client=None, db_path=None):
+    """Return the saved runs, newest first, with their rows per status."""
+    where, params = where_clause([("r.client = ?", client)])
+    sql = f"""
+        SELECT r.run_id, r.created, r.report, r.client, r.period, r.tolerance, r.rows,
+               SUM(s.status = 'Matched') AS matched, SUM(s.status = 'Mismatch') AS mismatch,
+               SUM(s.status = 'Missing in GSTR') AS missing_in_gstr, SUM(s.status = 'Missing in Tally') AS missing_in_tally
+        FROM runs r LEFT JOIN results s USING (run_id)
+        {where}
+        GROUP BY r.run_id
+        ORDER BY r.run_id DESC
+    """
+    return query(sql, params, db_path)
+
+
+def invoice_history(gstin=None, invoice_no=None, client=None, db_path=None):
+    """Return every saved result of a GSTIN and/or invoice number, oldest period first."""
+    where, params = where_clause([("s.gstin = ?", gstin), ("s.invoice_no = ?", invoice_no), ("r.client = ?", client)])
+    sql = f"""
+        SELECT r.client, s.period, r.report, s.gstin, s.invoice_no, s.status, s.tally_amount, s.gstr_amount,
+               r.run_id, r.created
+        FROM results s JOIN runs r USING (run_id)
+        {where}
+        ORDER BY s.period, r.run_id
+    """
+    return query(sql, params, db_path)
+
+
+def status_streaks(status, months=3, client=None, gstin=None, db_path=None):
+    """Return the invoices that had ``status`` in at least ``months`` consecutive periods of a report.
+
+    Only the latest run of each client, report and period counts. Each
+    row is one streak, with its first and last period and its length in
+    months. The periods are walked on the ``(period, run_id)`` index and
+    each run is probed for them there, so no query reads every result.
+    """
+    invoice_reports = [name for name, (tally_no, *_) in RESULT_COLUMNS.items() if tally_no is not None]
+    run_where, run_params = where_clause(
+        [("r.client = ?", client)], always=[f"r.report IN ({', '.join('?' * len(invoice_reports))})"],
+    )
+    hit_where, hit_params = where_clause([("s.status = ?", status), ("s.gstin = ?", gstin)])
+    sql = f"""
+        WITH RECURSIVE periods (period) AS (
+            SELECT MIN(period) FROM results WHERE period IS NOT NULL
+            UNION ALL
+            SELECT (SELECT MIN(period) FROM results WHERE period > p.period) FROM periods p WHERE p.period IS NOT NULL
+        ), latest AS (
+            SELECT r.client, r.report, p.period, MAX(r.run_id) AS run_id
+            FROM periods p JOIN runs r
+            {run_where} AND p.period IS NOT NULL
+                AND EXISTS (SELECT 1 FROM results s WHERE s.period = p.period AND s.run_id = r.run_id)
+            GROUP BY r.client, r.report, p.period
+        ), hits AS (
+            SELECT DISTINCT l.client, l.report, s.gstin, s.invoice_no, s.period,
+                   CAST(substr(s.period, 1, 4) AS INTEGER) * 12 + CAST(substr(s.period, 6, 2) AS INTEGER) AS month
+            FROM latest l JOIN results s ON s.period = l.period AND s.run_id = l.run_id
+            {hit_where} AND s.invoice_no IS NOT NULL
+        ), streaks AS (
+            SELECT *, month - ROW_NUMBER() OVER (PARTITION BY client, report, gstin, invoice_no ORDER BY month) AS streak
+            FROM hits
+        )
+        SELECT client, report, gstin, invoice_no, MIN(period) AS first_period, MAX(period) AS last_period,
+               COUNT(*) AS months
+        FROM streaks
+        GROUP BY client, report, gstin, invoice_no, streak
+        HAVING COUNT(*) >= ?
+        ORDER BY months DESC, client, report, gstin, invoice_no
+    """
+    return query(sql, (*invoice_reports, *run_params, *hit_params, months), db_path)
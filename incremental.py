@@ -0,0 +1,220 @@
+"""Incremental GST reconciliation against the previous run for the same client.
+
+The last run's matched rows are stored together with a fingerprint of the
+Tally, GSTR-2B B2B and debit note rows of every (GSTIN, invoice number)
+key. On the next run only keys whose rows were added, removed or changed
+on either side are matched and classified again; every other key keeps its
+previous rows. Alongside the full report a delta report lists the rows of
+the changed keys with their previous status.
+
+The state of each client is a directory of Feather files, one per
+fingerprint table and section, with the rest in a small JSON file. It is
+kept next to the run history rather than in the cache directory, which
+may be cleared at any time, and is never unpickled, so a file planted in
+the state directory cannot run code.
+"""
+import json
+import os
+import re
+import shutil
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from reports import (
+    AMENDMENT_SOURCES, Report, gst_report, match_debit_notes, match_invoices, mismatch_fill, read_gst_inputs, sort_rows,
+)
+from status import TOLERANCE
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional; without it no state is kept and every run is a full one
+    feather = None
+
+# Directory holding the last reconciliation state of each client
+STATE_DIR = os.environ.get(
+    "RECONCILIATION_STATE_DIR", os.path.join(os.path.expanduser("~"), ".reconciliation", "state")
+)
+
+# Bump when the stored state or the matching rules change, forcing a full run
+STATE_VERSION = 5
+
+# Fingerprint tables and matched rows of a state, each stored as a Feather file
+FINGERPRINT_TABLES = ("tally", "b2b", "debit_notes")
+ROW_TABLES = ("b2b_rows", "cdnr_rows")
+
+DELTA_REPORT_FILE = "GST_Reconciliation_Delta.xlsx"
+
+
+def invoice_keys(gstin, invoice_no):
+    """Return the (GSTIN, invoice number) key of each row as a single string."""
+    gstin = gstin.astype(object).fillna("").astype(str)
+    invoice_no = invoice_no.astype(object).fillna("").astype(str)
+    return pd.Index(gstin.to_numpy() + "\x1f" + invoice_no.to_numpy())
+
+
+def row_keys(rows):
+    """Return the keys of report rows, taking the invoice number from whichever side has it."""
+    return invoice_keys(rows["GSTIN"], rows["Supplier_Invoice_No"].astype(object).fillna(rows["Invoice_No"].astype(object)))
+
+
+def fingerprints(df, keys):
+    """Return one fingerprint per key over the contents and order of its rows."""
+    if df.empty:
+        return pd.Series([], index=pd.Index([], dtype=object), dtype=np.uint64)
+
+    # Hash a text rendering of each row, so dtypes and blank markers don't matter
+    text = df.astype(object).where(df.notna(), "").astype(str)
+    row_hash = pd.util.hash_pandas_object(text, index=False).to_numpy()
+
+    # Mix in each row's position within its key, then XOR-reduce per key
+    codes, uniques = pd.factorize(keys)
+    position = pd.Series(codes).groupby(codes).cumcount().to_numpy(dtype=np.uint64)
+    row_hash = pd.util.hash_array(row_hash ^ position)
+    order = np.argsort(codes, kind="stable")
+    starts = np.r_[0, np.flatnonzero(np.diff(codes[order])) + 1]
+    return pd.Series(
+        np.bitwise_xor.reduceat(row_hash[order], starts),
+        index=uniques[codes[order][starts]],
+    )
+
+
+def changed_keys(previous, current):
+    """Return the keys added, removed or fingerprinted differently since the previous run."""
+    common = previous.index.intersection(current.index)
+    differ = common[previous[common].to_numpy() != current[common].to_numpy()]
+    return previous.index.symmetric_difference(current.index).union(differ)
+
+
+def rematch(previous_rows, changed, tally_df, tally_keys, gstr_df, gstr_keys, match):
+    """Match the rows of changed keys again and splice them into the previous rows."""
+    current_rows = match(tally_df[tally_keys.isin(changed)], gstr_df[gstr_keys.isin(changed)])
+    kept_rows = previous_rows[~row_keys(previous_rows).isin(changed)]
+    return sort_rows(pd.concat([kept_rows, current_rows], ignore_index=True))
+
+
+def delta_rows(previous_rows, rows, changed, section):
+    """Return the current and removed rows of changed keys with their previous status."""
+    previous_rows = previous_rows[row_keys(previous_rows).isin(changed)]
+    previous_keys = row_keys(previous_rows)
+    previous_status = previous_rows["Status"].groupby(previous_keys).agg(lambda x: ", ".join(x.unique()))
+
+    rows = rows[row_keys(rows).isin(changed)].copy()
+    keys = row_keys(rows)
+    rows["Previous_Status"] = keys.map(previous_status).to_numpy()
+    rows["Change"] = np.where(keys.isin(previous_keys), "Changed", "Added")
+
+    # Keys that no longer have any rows
+    removed = previous_rows[~previous_keys.isin(keys)].copy()
+    removed["Previous_Status"] = removed["Status"]
+    removed["Status"] = None
+    removed["Change"] = "Removed"
+
+    delta = pd.concat([rows, removed], ignore_index=True)
+    delta["Section"] = section
+    return delta
+
+
+def state_path(state_name):
+    """Return the state directory of a client, with the name made safe for the filesystem."""
+    return os.path.join(STATE_DIR, re.sub(r"[^\w.-]", "_", state_name))
+
+
+def load_state(state_name, tolerance=TOLERANCE):
+    """Return the stored state of the last run for ``state_name``, if any was made with ``tolerance``."""
+    path = state_path(state_name)
+    if feather is None or not os.path.exists(os.path.join(path, "state.json")):
+        return None
+    with open(os.path.join(path, "state.json")) as f:
+        state = json.load(f)
+    if state.get("version") != STATE_VERSION or state.get("tolerance") != tolerance:
+        return None
+    for name in FINGERPRINT_TABLES:
+        table = feather.read_feather(os.path.join(path, f"{name}.feather"))
+        state[name] = pd.Series(
+            table["fingerprint"].to_numpy(dtype=np.uint64), index=pd.Index(table["key"].to_numpy(dtype=object)),
+        )
+    for name in ROW_TABLES:
+        state[name] = feather.read_feather(os.path.join(path, f"{name}.feather"))
+    return state
+
+
+def save_state(state_name, state):
+    """Store the state of this run for ``state_name``, replacing the previous one."""
+    if feather is None:
+        return
+    path = state_path(state_name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(tmp_path, mode=0o700)
+    for name in FINGERPRINT_TABLES:
+        table = pd.DataFrame({"key": state[name].index.to_numpy(dtype=object), "fingerprint": state[name].to_numpy()})
+        feather.write_feather(table, os.path.join(tmp_path, f"{name}.feather"))
+    for name in ROW_TABLES:
+        feather.write_feather(state[name].reset_index(drop=True), os.path.join(tmp_path, f"{name}.feather"))
+    metadata = {key: value for key, value in state.items() if key not in FINGERPRINT_TABLES + ROW_TABLES}
+    with open(os.path.join(tmp_path, "state.json"), "w") as f:
+        json.dump(dict(metadata, version=STATE_VERSION), f)
+
+    # Swap the new state in; a run starting in between finds none and runs in full
+    old_path = f"{path}.{os.getpid()}.old"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def reconcile_gst_incremental(tally_file, gstr_file, state_name, tolerance=TOLERANCE):
+    """Reconcile like ``reconcile_gst``, re-matching only keys changed since the last run.
+
+    Returns the full GST Reconciliation Report and a delta report of the
+    changed keys. Without a previous run with the same ``tolerance`` every
+    key counts as added. Whether the report has a ``Source`` column is
+    decided from the whole GSTR-2B, as in a full run, so re-matched keys
+    have the same columns as the rows kept from the previous run.
+    """
+    tally_df, gstr_df, debit_note_df = read_gst_inputs(tally_file, gstr_file)
+    with_source = bool(
+        gstr_df["Source"].isin(AMENDMENT_SOURCES).any() or debit_note_df["Source"].isin(AMENDMENT_SOURCES).any()
+    )
+    match_b2b = partial(match_invoices, tolerance=tolerance, with_source=with_source)
+    match_cdnr = partial(match_debit_notes, tolerance=tolerance, with_source=with_source)
+    tally_keys = invoice_keys(tally_df["GSTIN"], tally_df["Supplier_Invoice_No"])
+    gstr_keys = invoice_keys(gstr_df["GSTIN"], gstr_df["Invoice_No"])
+    debit_note_keys = invoice_keys(debit_note_df["GSTIN"], debit_note_df["Invoice_No"])
+
+    state = {
+        "tally": fingerprints(tally_df, tally_keys),
+        "b2b": fingerprints(gstr_df, gstr_keys),
+        "debit_notes": fingerprints(debit_note_df, debit_note_keys),
+    }
+    previous = load_state(state_name, tolerance)
+    if previous is not None and previous.get("with_source") != with_source:
+        previous = None  # The previous rows have other columns
+
+    if previous is None:
+        output_df_b2b = match_b2b(tally_df, gstr_df)
+        output_df_cdnr = match_cdnr(tally_df, debit_note_df)
+        empty = output_df_b2b.iloc[:0]
+        changed_b2b = row_keys(output_df_b2b).unique()
+        changed_cdnr = row_keys(output_df_cdnr).unique()
+        previous = {"b2b_rows": empty, "cdnr_rows": empty}
+    else:
+        changed_tally = changed_keys(previous["tally"], state["tally"])
+        changed_b2b = changed_tally.union(changed_keys(previous["b2b"], state["b2b"]))
+        changed_cdnr = changed_tally.union(changed_keys(previous["debit_notes"], state["debit_notes"]))
+        output_df_b2b = rematch(previous["b2b_rows"], changed_b2b, tally_df, tally_keys, gstr_df, gstr_keys, match_b2b)
+        output_df_cdnr = rematch(previous["cdnr_rows"], changed_cdnr, tally_df, tally_keys, debit_note_df, debit_note_keys, match_cdnr)
+
+    save_state(state_name, dict(
+        state, tolerance=tolerance, with_source=with_source, b2b_rows=output_df_b2b, cdnr_rows=output_df_cdnr,
+    ))
+
+    delta_df = pd.concat([
+        delta_rows(previous["b2b_rows"], output_df_b2b, changed_b2b, "B2B"),
+        delta_rows(previous["cdnr_rows"], output_df_cdnr, changed_cdnr, "B2B-CDNR"),
+    ], ignore_index=True)
+    delta = Report(delta_df, DELTA_REPORT_FILE, sheet_name="Changes", highlights=[
+        (delta_df["Status"] == "Mismatch", None, mismatch_fill),
+    ])
+    return gst_report(output_df_b2b, output_df_cdnr), delta
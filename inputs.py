@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+
+from loaders import (
+    GSTR_AMENDMENT_SHEETS, STREAMING_MIN_BYTES, cached_frame, file_size, load_sheets, open_workbook, sheet_layouts,
+    stream_sheet,
+)
+from profiling import stage
+from status import to_paise
+
+# Header labels of the columns read from each input, in the order of its schema. Labels are
+# compared ignoring case, spacing and punctuation, so "Invoice Value(₹)" matches "Invoice Value (₹)".
+TALLY_HEADERS = {
+    "Date": ["Date"], "Particulars": ["Particulars"], "Supplier_Invoice_No": ["Supplier Invoice No."],
+    "Supplier_Invoice_Date": ["Supplier Invoice Date"], "GSTIN": ["GSTIN/UIN", "GSTIN"], "Gross_Total": ["Gross Total"],
+    "Purchase_Accounts": ["Purchase Accounts"], "Fixed_Assets": ["Fixed Assets"], "Direct_Expenses": ["Direct Expenses"],
+    "Indirect_Expenses": ["Indirect Expenses"], "IGST": ["IGST"], "CGST": ["CGST"], "SGST": ["SGST", "SGST/UTGST"],
+}
+DEBIT_HEADERS = {
+    "Particulars": ["Particulars"], "Supplier_Invoice_No": ["Supplier Invoice No."], "GSTIN": ["GSTIN/UIN", "GSTIN"],
+    "Gross_Total": ["Gross Total"], "Purchase_Accounts": ["Purchase Accounts"], "Fixed_Assets": ["Fixed Assets"],
+    "IGST": ["IGST"], "CGST": ["CGST"], "SGST": ["SGST", "SGST/UTGST"],
+}
+GSTR_TAX_HEADERS = {
+    "Taxable_Value": ["Taxable Value (₹)"], "Integrated_Tax": ["Integrated Tax (₹)"],
+    "Central_Tax": ["Central Tax (₹)"], "State_UT_Tax": ["State/UT Tax (₹)"],
+}
+B2B_HEADERS = {
+    "GSTIN": ["GSTIN of supplier"], "Trade_Name": ["Trade/Legal name"], "Invoice_No": ["Invoice number"],
+    "Invoice_Value": ["Invoice Value (₹)"], **GSTR_TAX_HEADERS,
+}
+CDNR_HEADERS = {
+    "GSTIN_of_Supplier": ["GSTIN of supplier"], "Trade_Legal_Name": ["Trade/Legal name"], "Invoice_Number": ["Note number"],
+    "Note_Type": ["Note type"], "Invoice_Value": ["Note Value (₹)"], **GSTR_TAX_HEADERS,
+}
+
+# Amendment sheets repeat the labels of the sheet they amend for the revised document
+B2BA_HEADERS = B2B_HEADERS
+CDNRA_HEADERS = CDNR_HEADERS
+
+# Sheets of a GSTR-2B workbook (B2B is the first sheet) and the labels read from each
+GSTR_HEADERS = {0: B2B_HEADERS, "B2B-CDNR": CDNR_HEADERS, "B2BA": B2BA_HEADERS, "B2B-CDNRA": CDNRA_HEADERS}
+
+# Amount columns converted to float
+TALLY_NUMERIC_COLS = ["Gross_Total", "Purchase_Accounts", "Fixed_Assets",
+                      "Direct_Expenses", "Indirect_Expenses", "IGST", "CGST", "SGST"]
+GSTR_NUMERIC_COLS = ["Invoice_Value", "Taxable_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"]
+DEBIT_NUMERIC_COLS = ["Gross_Total", "Purchase_Accounts", "Fixed_Assets", "IGST", "CGST", "SGST"]
+
+# How a column is stored: compact text, a categorical, or an amount (float rupees or int64 paise) with blanks and text as 0
+TEXT = "text"
+CATEGORY = "category"
+AMOUNT = "amount"
+
+try:
+    # Arrow-backed strings with NaN for blanks, so string methods and comparisons behave as on object columns
+    TEXT_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan)
+except (ImportError, TypeError):  # pyarrow missing or pandas < 2.3
+    TEXT_DTYPE = object
+
+# Declared schema of each input: the only columns the reports use, and how each is stored.
+# Categoricals keep their categories sorted, so grouping by them orders groups as text would.
+TALLY_SCHEMA = {
+    "Date": TEXT, "Particulars": TEXT, "Supplier_Invoice_No": TEXT, "Supplier_Invoice_Date": TEXT, "GSTIN": CATEGORY,
+    **dict.fromkeys(TALLY_NUMERIC_COLS, AMOUNT),
+}
+DEBIT_SCHEMA = {
+    "Particulars": TEXT, "Supplier_Invoice_No": TEXT, "GSTIN": CATEGORY,
+    **dict.fromkeys(DEBIT_NUMERIC_COLS, AMOUNT),
+}
+B2B_SCHEMA = {
+    "GSTIN": CATEGORY, "Trade_Name": TEXT, "Invoice_No": TEXT,
+    **dict.fromkeys(GSTR_NUMERIC_COLS, AMOUNT),
+}
+CDNR_SCHEMA = {
+    "GSTIN_of_Supplier": CATEGORY, "Trade_Legal_Name": TEXT, "Invoice_Number": TEXT, "Note_Type": CATEGORY,
+    **dict.fromkeys(GSTR_NUMERIC_COLS, AMOUNT),
+}
+
+# Amendments are reconciled like the documents they revise
+B2BA_SCHEMA = B2B_SCHEMA
+CDNRA_SCHEMA = CDNR_SCHEMA
+
+
+def apply_schema(df, schema, numeric=True, paise=False):
+    """Return the columns of ``schema`` from ``df``, each stored as the schema declares.
+
+    Amounts are float rupees, int64 paise with ``paise``, or left as read
+    when ``numeric`` is False.
+    """
+    data = {}
+    for col, kind in schema.items():
+        values = df[col]
+        if kind == AMOUNT and not numeric:
+            data[col] = values.astype(TEXT_DTYPE)
+        elif kind == AMOUNT:
+            data[col] = pd.Series(to_paise(values), index=values.index) if paise else pd.to_numeric(values, errors="coerce").fillna(0)
+        elif kind == CATEGORY:
+            values = values.astype("category")
+            data[col] = values.cat.reorder_categories(values.cat.categories.sort_values())
+        else:
+            data[col] = values.astype(TEXT_DTYPE)
+    return pd.DataFrame(data)
+
+
+def empty_frame(schema, paise=False):
+    """Return a frame with no rows and the columns and dtypes of ``schema``."""
+    dtypes = {TEXT: TEXT_DTYPE, CATEGORY: "category", AMOUNT: np.int64 if paise else float}
+    return pd.DataFrame({col: pd.Series(dtype=dtypes[kind]) for col, kind in schema.items()})
+
+
+def load_gstr_sheet(gstr_file, sheet):
+    """Parse the mapped columns of one sheet of a GSTR-2B workbook, or return None if it has no such sheet.
+
+    Headers of every sheet are located by one cached scan of their first
+    rows, so a workbook missing B2B or B2B-CDNR is rejected whichever is
+    read first; only ``sheet`` is parsed. Amendment sheets without a
+    header count as missing.
+    """
+    with open_workbook(gstr_file) as reader:
+        layouts = sheet_layouts(gstr_file, GSTR_HEADERS, optional=GSTR_AMENDMENT_SHEETS, reader=reader)
+        if sheet not in layouts:
+            return None
+        return load_sheets(gstr_file, [layouts[sheet]], reader)[sheet]
+
+
+def read_register(register_file, headers, numeric_cols):
+    """Read the columns of ``headers`` from the first sheet of a Tally register, streaming large ones."""
+    with stage("read") as record, open_workbook(register_file) as reader:
+        layout = sheet_layouts(register_file, {0: headers}, reader=reader)[0]
+        if file_size(register_file) >= STREAMING_MIN_BYTES:
+            df = stream_sheet(register_file, layout, numeric_cols, ["GSTIN"])
+        else:
+            df = load_sheets(register_file, [layout], reader)[0]
+        record["rows"] = len(df)
+    return df
+
+
+def read_tally(tally_file, paise=False):
+    """Read the ``TALLY_SCHEMA`` columns of a Tally Purchase Register.
+
+    Large registers are streamed in chunks. Amounts are int64 paise with
+    ``paise``.
+    """
+    def build():
+        tally_df = read_register(tally_file, TALLY_HEADERS, TALLY_NUMERIC_COLS)
+        with stage("normalize", len(tally_df)):
+            return apply_schema(tally_df, TALLY_SCHEMA, paise=paise)
+
+    return cached_frame(f"tally:{paise}", tally_file, build)
+
+
+def read_debit_register(debit_file, paise=False):
+    """Read the ``DEBIT_SCHEMA`` columns of a Debit Note Register.
+
+    Large registers are streamed in chunks. Amounts are int64 paise with
+    ``paise``.
+    """
+    def build():
+        debit_df = read_register(debit_file, DEBIT_HEADERS, DEBIT_NUMERIC_COLS)
+        with stage("normalize", len(debit_df)):
+            return apply_schema(debit_df, DEBIT_SCHEMA, paise=paise)
+
+    return cached_frame(f"debit:{paise}", debit_file, build)
+
+
+def read_gstr_b2b(gstr_file, paise=False):
+    """Read the ``B2B_SCHEMA`` columns of the B2B sheet of a GSTR-2B workbook, in paise with ``paise``."""
+    def build():
+        with stage("read") as record:
+            gstr_df = load_gstr_sheet(gstr_file, 0)
+            record["rows"] = len(gstr_df)
+        with stage("normalize", len(gstr_df)):
+            return apply_schema(gstr_df, B2B_SCHEMA, paise=paise)
+
+    return cached_frame(f"gstr_b2b:{paise}", gstr_file, build)
+
+
+def read_gstr_cdnr(gstr_file, numeric=True, paise=False):
+    """Read the ``CDNR_SCHEMA`` columns of the B2B-CDNR sheet of a GSTR-2B workbook.
+
+    Amounts are converted to float, or to int64 paise with ``paise``,
+    unless ``numeric`` is False.
+    """
+    def build():
+        with stage("read") as record:
+            gstr_cdnr_df = load_gstr_sheet(gstr_file, "B2B-CDNR")
+            record["rows"] = len(gstr_cdnr_df)
+        with stage("normalize", len(gstr_cdnr_df)):
+            return apply_schema(gstr_cdnr_df, CDNR_SCHEMA, numeric, paise)
+
+    return cached_frame(f"gstr_cdnr:{numeric}:{paise}", gstr_file, build)
+
+
+def read_gstr_amendments(gstr_file, sheet, schema, paise=False):
+    """Read the ``schema`` columns of an amendment sheet (B2BA or B2B-CDNRA) of a GSTR-2B workbook.
+
+    Amounts are int64 paise with ``paise``. Workbooks without the sheet,
+    or with an empty one, give an empty frame with the same columns.
+    """
+    def build():
+        with stage("read") as record:
+            amendment_df = load_gstr_sheet(gstr_file, sheet)
+            record["rows"] = 0 if amendment_df is None else len(amendment_df)
+        if amendment_df is None or amendment_df.empty:
+            return empty_frame(schema, paise)
+        with stage("normalize", len(amendment_df)):
+            return apply_schema(amendment_df, schema, paise=paise)
+
+    return cached_frame(f"gstr_amendments:{sheet}:{paise}", gstr_file, build)
@@ -0,0 +1,209 @@
+"""Background report jobs for the Streamlit app.
+
+Generating a report on the script thread blocks the page until the whole
+pipeline has finished. Instead the app submits the work as a job to a
+thread pool shared by every session and keeps only the job ID. Each job
+follows its run through the profiling stages, so the page can show which
+stage is running, and checks for cancellation as every stage starts. The
+finished reports stay in memory until the job expires, so they can be
+previewed and downloaded on any later rerun. Each export of a report is
+only written the first time it is downloaded, except for the styled
+workbook of a job with ``styled_later``, which is built in the background
+as soon as the job is done.
+"""
+import io
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from loaders import file_bytes
+from profiling import log_stages, record_stages
+from exports import export_reports
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# Pipeline stages in the order a report runs them, with their progress labels
+STAGE_LABELS = {
+    "read": "Reading inputs",
+    "normalize": "Normalizing inputs",
+    "partition": "Partitioning by GSTIN",
+    "suppliers": "Updating the supplier master",
+    "aggregate": "Summing amounts",
+    "merge": "Matching documents",
+    "classify": "Classifying differences",
+    "fuzzy": "Pairing probable matches",
+    "splits": "Matching split invoices",
+    "concat": "Combining shards",
+    "style": "Highlighting rows",
+    "write": "Writing workbook",
+}
+STAGE_ORDER = list(STAGE_LABELS)
+
+# Reports run at the same time; further jobs wait in the queue
+JOB_WORKERS = int(os.environ.get("RECONCILIATION_JOB_WORKERS", "2"))
+
+# Finished jobs, and the reports they hold, are dropped after this long
+JOB_TTL_SECONDS = int(os.environ.get("RECONCILIATION_JOB_TTL_SECONDS", str(60 * 60)))
+
+logger = logging.getLogger("jobs")
+
+# Reports use the cached workbook parser from pool threads, which have no script context
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's run when cancellation was requested."""
+
+
+@dataclass
+class Job:
+    """A report generation running, or waiting to run, in the background."""
+
+    id: str
+    report_name: str
+    state: str = QUEUED
+    stage: str = None
+    progress: float = 0.0
+    downloads: list = field(default_factory=list)  # (label, reports, file name)
+    formats: tuple = ("xlsx",)
+    styled_later: bool = False
+    building: bool = False  # Writing the styled workbook after the report is done
+    records: list = field(default_factory=list)
+    error: str = None
+    created: float = field(default_factory=time.time)
+    finished: float = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _exports: dict = field(default_factory=dict, repr=False)
+    _export_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def active(self):
+        return self.state in (QUEUED, RUNNING)
+
+    @property
+    def pending(self):
+        """Whether the job's progress or downloads may still change."""
+        return self.active or self.building
+
+    @property
+    def status_text(self):
+        """Short description of where the job is, for the progress bar."""
+        if self.state == QUEUED:
+            return "Waiting for a free worker…"
+        if self.state == RUNNING:
+            return f"{STAGE_LABELS.get(self.stage, 'Starting')}…"
+        return self.state.capitalize()
+
+    def cancel(self):
+        """Ask the job to stop; it does so as its next stage starts."""
+        self._cancel.set()
+
+    def export(self, index, fmt):
+        """Return download ``index`` exported in ``fmt`` as bytes, writing it on first use."""
+        with self._export_lock:
+            if (index, fmt) not in self._exports:
+                _, reports, _ = self.downloads[index]
+                self._exports[index, fmt] = export_reports(reports, fmt)
+            return self._exports[index, fmt]
+
+    def is_exported(self, index, fmt):
+        """Return whether download ``index`` has already been written in ``fmt``."""
+        return (index, fmt) in self._exports
+
+    def _build_styled(self):
+        try:
+            for index in range(len(self.downloads)):
+                self.export(index, "xlsx")
+        except Exception:
+            logger.exception("job %s (%s) failed to write its styled workbook", self.id, self.report_name)
+        finally:
+            self.building = False
+
+    def _on_stage(self, name):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.stage = name
+        if name in STAGE_ORDER:
+            self.progress = max(self.progress, STAGE_ORDER.index(name) / len(STAGE_ORDER))
+
+
+_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="report-job")
+_jobs = {}
+_lock = threading.Lock()
+
+
+def copy_upload(file):
+    """Return a private in-memory copy of an uploaded file, safe to read from a job thread."""
+    copy = io.BytesIO(file_bytes(file))
+    copy.name = getattr(file, "name", None)
+    return copy
+
+
+def _run(job, work):
+    if job._cancel.is_set():
+        job.state, job.finished = CANCELLED, time.time()
+        return
+    job.state = RUNNING
+    try:
+        with record_stages(on_stage=job._on_stage) as records:
+            job.records = records
+            job.downloads = work()
+    except JobCancelled:
+        job.state = CANCELLED
+        logger.info("job %s (%s) cancelled during %s", job.id, job.report_name, job.stage)
+    except Exception as e:
+        job.state, job.error = FAILED, str(e)
+        logger.exception("job %s (%s) failed", job.id, job.report_name)
+    else:
+        # Marked as building before done, so the job is pending throughout
+        job.building = job.styled_later and "xlsx" in job.formats
+        job.state, job.progress = DONE, 1.0
+        log_stages(records, report=job.report_name, job=job.id)
+        if job.building:
+            threading.Thread(target=job._build_styled, name=f"styled-{job.id}", daemon=True).start()
+    finally:
+        job.finished = time.time()
+
+
+def expire_jobs(now=None):
+    """Forget finished jobs older than ``JOB_TTL_SECONDS``, releasing their reports."""
+    now = time.time() if now is None else now
+    with _lock:
+        for job_id in [job.id for job in _jobs.values()
+                       if job.finished is not None and now - job.finished > JOB_TTL_SECONDS]:
+            del _jobs[job_id]
+
+
+def submit_job(report_name, work, formats=("xlsx",), styled_later=False):
+    """Queue ``work`` as a background job and return it.
+
+    ``work`` takes no arguments and returns the job's downloads as a list
+    of (label, reports, file name) tuples, where the reports are written
+    as the sheets of one workbook. The downloads are offered in the
+    export ``formats``; with ``styled_later`` the styled workbook is
+    written in the background once the job is done, while the other
+    formats can already be downloaded. Uploaded files ``work`` reads
+    should be copied with ``copy_upload`` first.
+    """
+    expire_jobs()
+    job = Job(id=uuid.uuid4().hex[:12], report_name=report_name, formats=tuple(formats), styled_later=styled_later)
+    with _lock:
+        _jobs[job.id] = job
+    _pool.submit(_run, job, work)
+    logger.info("job %s (%s) queued", job.id, report_name)
+    return job
+
+
+def get_job(job_id):
+    """Return the job with ``job_id``, or None once it has expired or never existed."""
+    with _lock:
+        return _jobs.get(job_id)
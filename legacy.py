@@ -0,0 +1,525 @@
+"""The original report generators, kept as the reference of the golden-output harness.
+
+These are the generators of the first version of the app, as they were:
+every workbook is read with ``read_excel`` at its fixed row offsets, the
+status is decided row by row with ``DataFrame.apply`` and the suppliers
+of the combined report are named by joining their names per group. Only
+the Excel writing is left out; each returns the report frame as a
+``Report``. Nothing here shares code with the rest of the app, so a
+change anywhere else that alters a report shows up as a difference from
+these. They know nothing of amendment sheets, header detection or any
+option added since, and should not be changed.
+"""
+import pandas as pd
+
+from reports import COMBINED_REPORT_FILE, DEBIT_NOTE_REPORT_FILE, GST_REPORT_FILE, Report
+
+
+def reconcile_gst(tally_file, gstr_file):
+    """Build the GST Reconciliation Report as the original app did."""
+    # Read Tally Purchase Register
+    tally_df = pd.read_excel(tally_file, skiprows=9, dtype=str)
+
+    # Read GSTR-2B data
+    gstr_df = pd.read_excel(gstr_file, skiprows=4, dtype=str)
+
+    # Read GSTR-CDNR data
+    gstr_cdnr_df = pd.read_excel(gstr_file, sheet_name="B2B-CDNR", skiprows=3, dtype=str)
+
+    # Define correct column names for Tally Purchase Register
+    tally_df.columns = [
+        "Date", "Particulars", "Voucher_Type", "Voucher_No", "Supplier_Invoice_No",
+        "Supplier_Invoice_Date", "GSTIN", "Gross_Total", "Purchase_Accounts",
+        "Fixed_Assets", "Direct_Expenses", "Indirect_Expenses", "IGST", "CGST", "SGST"
+    ]
+
+    # Define correct column names for GSTR-2B
+    gstr_df.columns = [
+        "GSTIN", "Trade_Name", "Invoice_No", "Invoice_Type", "Invoice_Date",
+        "Invoice_Value", "Place_of_Supply", "Reverse_Charge", "Taxable_Value", "Integrated_Tax",
+        "Central_Tax", "State_UT_Tax", "Cess", "GSTR_IFF_Period", "GSTR_IFF_Filing_Date",
+        "ITC_Availability", "Reason", "Applicable_Tax_Rate", "Source", "IRN", "IRN_Date"
+    ]
+
+    # Define correct column names for GSTR-CDNR
+    gstr_cdnr_df.columns = [
+        "GSTIN", "Trade_Legal_Name", "Invoice_No", "Note_Type", "Note_Supply_Type",
+        "Note_Date", "Invoice_Value", "Place_of_Supply", "Supply_Attract_Reverse_Charge", "Taxable_Value",
+        "Integrated_Tax", "Central_Tax", "State_UT_Tax", "Cess", "GSTR_1_IFF_GSTR_5_Period",
+        "GSTR_1_IFF_GSTR_5_Filing_Date", "ITC_Availability", "Reason", "Applicable_Tax_Rate",
+        "Source", "IRN", "IRN_Date"
+    ]
+
+    # Ensure 'Note_Type' exists and filter only "Debit Note" records
+    if "Note_Type" in gstr_cdnr_df.columns:
+        debit_note_df = gstr_cdnr_df[gstr_cdnr_df["Note_Type"].str.contains("Debit Note", case=False, na=False)]
+    else:
+        debit_note_df = pd.DataFrame(columns=gstr_cdnr_df.columns)
+
+    # Remove entries where both GSTIN and Invoice No are missing
+    tally_df.dropna(subset=["GSTIN", "Supplier_Invoice_No"], how="all", inplace=True)
+    gstr_df.dropna(subset=["GSTIN", "Invoice_No"], how="all", inplace=True)
+    debit_note_df.dropna(subset=["GSTIN", "Invoice_No"], how="all", inplace=True)
+
+    # Convert relevant numeric columns to float
+    tally_numeric_cols = ["Gross_Total", "Purchase_Accounts", "Fixed_Assets",
+                          "Direct_Expenses", "Indirect_Expenses", "IGST", "CGST", "SGST"]
+    gstr_numeric_cols = ["Invoice_Value", "Taxable_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"]
+
+    for col in tally_numeric_cols:
+        tally_df[col] = pd.to_numeric(tally_df[col], errors="coerce").fillna(0)
+
+    for col in gstr_numeric_cols:
+        gstr_df[col] = pd.to_numeric(gstr_df[col], errors="coerce").fillna(0)
+        if col in debit_note_df.columns:
+            debit_note_df[col] = pd.to_numeric(debit_note_df[col], errors="coerce").fillna(0)
+
+    # Compute total expense in Tally
+    tally_df["Total_Expense"] = tally_df[["Purchase_Accounts", "Fixed_Assets", "Direct_Expenses", "Indirect_Expenses"]].sum(axis=1)
+
+    # Merge Tally with GSTR-2B
+    reconciliation_df_b2b = pd.merge(
+        tally_df, gstr_df,
+        left_on=["Supplier_Invoice_No", "GSTIN"],
+        right_on=["Invoice_No", "GSTIN"],
+        how="outer",
+        suffixes=("_Tally", "_GSTR"),
+        indicator=True
+    )
+
+    # Merge Tally with GSTR-CDNR (Debit Note Only)
+    reconciliation_df_cdnr = pd.merge(
+        tally_df, debit_note_df,
+        left_on=["Supplier_Invoice_No", "GSTIN"],
+        right_on=["Invoice_No", "GSTIN"],
+        how="outer",
+        suffixes=("_Tally", "_GSTR"),
+        indicator=True
+    )
+
+    # Ensure B2B-CDNR (Debit Note) records are retained
+    if "Note_Type" in reconciliation_df_cdnr.columns:
+        reconciliation_df_cdnr = reconciliation_df_cdnr[reconciliation_df_cdnr["Note_Type"].str.contains("Debit Note", case=False, na=False)]
+
+    # Define ₹2 tolerance threshold
+    tolerance = 2.00
+
+    # Identify Reconciliation Status
+    def get_status(row):
+        if row["_merge"] == "right_only":  # Exists only in GSTR (Missing in Tally)
+            return "Missing in Tally"
+        elif row["_merge"] == "left_only":  # Exists only in Tally (Missing in GSTR)
+            return "Missing in GSTR"
+        # Convert to numeric before comparison, handling potential errors
+        gross_total = pd.to_numeric(row["Gross_Total"], errors="coerce")
+        invoice_value = pd.to_numeric(row["Invoice_Value"], errors="coerce")
+        total_expense = pd.to_numeric(row["Total_Expense"], errors="coerce")
+        taxable_value = pd.to_numeric(row["Taxable_Value"], errors="coerce")
+        igst = pd.to_numeric(row["IGST"], errors="coerce")
+        integrated_tax = pd.to_numeric(row["Integrated_Tax"], errors="coerce")
+        cgst = pd.to_numeric(row["CGST"], errors="coerce")
+        central_tax = pd.to_numeric(row["Central_Tax"], errors="coerce")
+        sgst = pd.to_numeric(row["SGST"], errors="coerce")
+        state_ut_tax = pd.to_numeric(row["State_UT_Tax"], errors="coerce")
+
+        # Perform the comparisons after conversion
+        if (abs(gross_total - invoice_value) > tolerance or
+              abs(total_expense - taxable_value) > tolerance or
+              abs(igst - integrated_tax) > tolerance or
+              abs(cgst - central_tax) > tolerance or
+              abs(sgst - state_ut_tax) > tolerance):
+            return "Mismatch"
+        else:
+            return "Matched"
+
+    # Apply reconciliation logic
+    reconciliation_df_b2b["Status"] = reconciliation_df_b2b.apply(get_status, axis=1)
+    reconciliation_df_cdnr["Status"] = reconciliation_df_cdnr.apply(get_status, axis=1)
+
+    # Remove rows where "Invoice_No" is "invoice number" and status is "Missing in Tally"
+    reconciliation_df_b2b = reconciliation_df_b2b[~((reconciliation_df_b2b["Invoice_No"].str.lower() == "invoice number") & (reconciliation_df_b2b["Status"] == "Missing in Tally"))]
+
+    # Drop merge indicator column
+    reconciliation_df_b2b.drop(columns=["_merge"], inplace=True)
+    reconciliation_df_cdnr.drop(columns=["_merge"], inplace=True)
+
+    # Select only required columns
+    output_df_b2b = reconciliation_df_b2b[[
+        "GSTIN", "Supplier_Invoice_No", "Gross_Total",
+         "Total_Expense", "IGST", "CGST",  "SGST", "Invoice_No",
+         "Invoice_Value","Taxable_Value","Integrated_Tax","Central_Tax","State_UT_Tax", "Status"
+    ]]
+
+    output_df_cdnr = reconciliation_df_cdnr[[
+        "GSTIN", "Supplier_Invoice_No", "Gross_Total",
+         "Total_Expense", "IGST", "CGST",  "SGST", "Invoice_No",
+         "Invoice_Value","Taxable_Value","Integrated_Tax","Central_Tax","State_UT_Tax", "Status"
+    ]]
+
+    # Combine both DataFrames into one for GSTR-2B + CDNR (Debit Note)
+    combined_df = pd.concat([output_df_b2b, output_df_cdnr], ignore_index=True)
+
+    return Report(combined_df, GST_REPORT_FILE, sheet_name="GSTR-2B")
+
+
+def reconcile_debit_notes(debit_file, gstr_file):
+    """Build the Debit Note Reconciliation Report as the original app did."""
+    # Read Debit Note Register
+    debit_df = pd.read_excel(debit_file, skiprows=9, dtype=str).iloc[:-1]
+
+    # Read GSTR-CDNR data with correct header row
+    gstr_cdnr_df = pd.read_excel(gstr_file, sheet_name="B2B-CDNR", skiprows=5, dtype=str)
+
+    # Define correct column names for Debit Note Register
+    debit_df.columns = [
+        "Date", "Particulars", "Supplier_Invoice_No", "Credit Note Date", "Voucher Type", "Voucher_No",
+        "Voucher Ref. No.", "Voucher Ref. Date", "GSTIN", "Gross_Total", "Purchase_Accounts",
+        "Fixed_Assets", "IGST", "CGST", "SGST", "Round Off"
+    ]
+
+    # Define correct column names for GSTR-CDNR
+    gstr_cdnr_df.columns = [
+        "GSTIN_of_Supplier", "Trade_Legal_Name", "Invoice_Number", "Note_Type", "Note_Supply_Type",
+        "Note_Date", "Invoice_Value", "Place_of_Supply", "Supply_Attract_Reverse_Charge", "Taxable_Value",
+        "Integrated_Tax", "Central_Tax", "State_UT_Tax", "Cess", "GSTR_1_IFF_GSTR_5_Period",
+        "GSTR_1_IFF_GSTR_5_Filing_Date", "ITC_Availability", "Reason", "Applicable_Tax_Rate",
+        "Source", "IRN", "IRN_Date"
+    ]
+
+    # Convert only relevant numeric columns to float in debit_df
+    debit_numeric_cols = ["Gross_Total", "Purchase_Accounts", "Fixed_Assets", "IGST", "CGST", "SGST"]
+    debit_df[debit_numeric_cols] = debit_df[debit_numeric_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
+
+    # Convert only relevant numeric columns to float in gstr_cdnr_df
+    gstr_numeric_cols = ["Invoice_Value", "Taxable_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"]
+    gstr_cdnr_df[gstr_numeric_cols] = gstr_cdnr_df[gstr_numeric_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
+
+    # Remove entries where Gross_Total and Purchase_Accounts are exactly 1.00
+    debit_df = debit_df[~((debit_df['Gross_Total'] == 1.00) & (debit_df['Purchase_Accounts'] == 1.00))]
+
+    # Calculate Total_Expense in Debit Note Register
+    debit_df["Total_Expense"] = debit_df[['Purchase_Accounts', 'Fixed_Assets']].sum(axis=1)
+
+    # Perform a full outer merge based on GSTIN + Invoice No.
+    reconciliation_df = pd.merge(
+        debit_df, gstr_cdnr_df,
+        left_on=['Supplier_Invoice_No', 'GSTIN'],
+        right_on=['Invoice_Number', 'GSTIN_of_Supplier'],
+        how='outer',
+        suffixes=('_DEBIT', '_GSTR'),
+        indicator=True
+    )
+
+    # Fill NaN values with 0 for numeric columns
+    comparison_cols = ["Gross_Total", "Invoice_Value", "Total_Expense", "Taxable_Value",
+                       "IGST", "Integrated_Tax", "CGST", "Central_Tax", "SGST", "State_UT_Tax"]
+    reconciliation_df[comparison_cols] = reconciliation_df[comparison_cols].fillna(0)
+
+    # Define ₹2 tolerance threshold
+    tolerance = 2.00
+
+    # Identify Reconciliation Status with ₹2 tolerance
+    def get_status(row):
+        if row["_merge"] == "right_only":  # Exists only in GSTR (Missing in Tally)
+            return "Missing in Tally"
+        elif row["_merge"] == "left_only":  # Exists only in Tally (Missing in GSTR)
+            return "Missing in GSTR"
+        elif (abs(row["Gross_Total"] - row["Invoice_Value"]) > tolerance or
+              abs(row["Total_Expense"] - row["Taxable_Value"]) > tolerance or
+              abs(row["IGST"] - row["Integrated_Tax"]) > tolerance or
+              abs(row["CGST"] - row["Central_Tax"]) > tolerance or
+              abs(row["SGST"] - row["State_UT_Tax"]) > tolerance):
+            return "Mismatch"
+        else:
+            return "Matched"
+
+    reconciliation_df["Status"] = reconciliation_df.apply(get_status, axis=1)
+
+    # Drop the merge indicator column
+    reconciliation_df.drop(columns=["_merge"], inplace=True)
+
+    # Select only required columns
+    output_df = reconciliation_df[[
+        "GSTIN", "Supplier_Invoice_No",  "Gross_Total",
+         "Total_Expense", "IGST",
+        "CGST",  "SGST", "Invoice_Number", "Invoice_Value","Taxable_Value",
+        "Integrated_Tax","Central_Tax","State_UT_Tax", "Status"
+    ]]
+
+    return Report(output_df, DEBIT_NOTE_REPORT_FILE)
+
+
+def reconcile_combined(tally_file, gstr_file, debit_file):
+    """Build the Combined GST Reconciliation Report as the original app did."""
+    # Read Tally Purchase Register
+    tally_df = pd.read_excel(tally_file, skiprows=9, dtype=str)
+
+    # Read GSTR-2B data
+    gstr_df = pd.read_excel(gstr_file, skiprows=5, dtype=str)
+
+    # Read Debit Note Register
+    debit_df = pd.read_excel(debit_file, skiprows=9, dtype=str)
+
+    # Read GSTR-CDNR data with correct header row
+    gstr_cdnr_df = pd.read_excel(gstr_file, sheet_name="B2B-CDNR", skiprows=5, dtype=str)
+
+    # Define correct column names for Tally Purchase Register
+    tally_df.columns = [
+        "Date", "Particulars", "Voucher_Type", "Voucher_No", "Supplier_Invoice_No",
+        "Supplier_Invoice_Date", "GSTIN", "Gross_Total", "Purchase_Accounts",
+        "Fixed_Assets", "Direct_Expenses", "Indirect_Expenses", "IGST", "CGST", "SGST"
+    ]
+
+    # Define correct column names for GSTR-2B
+    gstr_df.columns = [
+        "GSTIN", "Trade_Name", "Invoice_No", "Invoice_Type", "Invoice_Date",
+        "Invoice_Value", "Place_of_Supply", "Reverse_Charge", "Taxable_Value", "Integrated_Tax",
+        "Central_Tax", "State_UT_Tax", "Cess", "GSTR_IFF_Period", "GSTR_IFF_Filing_Date",
+        "ITC_Availability", "Reason", "Applicable_Tax_Rate", "Source", "IRN", "IRN_Date"
+    ]
+
+    # Define correct column names for Debit Note Register
+    debit_df.columns = [
+        "Date", "Particulars", "Supplier_Invoice_No", "Credit Note Date", "Voucher Type", "Voucher_No",
+        "Voucher Ref. No.", "Voucher Ref. Date", "GSTIN", "Gross_Total", "Purchase_Accounts",
+        "Fixed_Assets", "IGST", "CGST", "SGST", "Round Off"
+    ]
+
+    # Define correct column names for GSTR-CDNR
+    gstr_cdnr_df.columns = [
+        "GSTIN_of_Supplier", "Trade_Legal_Name", "Invoice_Number", "Note_Type", "Note_Supply_Type",
+        "Note_Date", "Invoice_Value", "Place_of_Supply", "Supply_Attract_Reverse_Charge", "Taxable_Value",
+        "Integrated_Tax", "Central_Tax", "State_UT_Tax", "Cess", "GSTR_1_IFF_GSTR_5_Period",
+        "GSTR_1_IFF_GSTR_5_Filing_Date", "ITC_Availability", "Reason", "Applicable_Tax_Rate",
+        "Source", "IRN", "IRN_Date"
+    ]
+
+    # Convert numeric columns to float
+    numeric_cols_tally = ["Gross_Total", "Purchase_Accounts", "Fixed_Assets", "Direct_Expenses",
+                          "Indirect_Expenses", "IGST", "CGST", "SGST"]
+    numeric_cols_gstr = ["Invoice_Value", "Taxable_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"]
+    numeric_cols_debit = ["Gross_Total", "IGST", "CGST", "SGST"]
+
+    for col in numeric_cols_tally:
+        tally_df[col] = pd.to_numeric(tally_df[col], errors='coerce').fillna(0)
+
+    for col in numeric_cols_gstr:
+        gstr_df[col] = pd.to_numeric(gstr_df[col], errors='coerce').fillna(0)
+
+    for col in numeric_cols_debit:
+        debit_df[col] = pd.to_numeric(debit_df[col], errors='coerce').fillna(0)
+
+    # Aggregate Data by GSTIN & Trade Name
+    tally_agg = tally_df.groupby("GSTIN").agg({
+        "Particulars": lambda x: ', '.join(x.dropna().unique()),  # Concatenate unique names
+        "Gross_Total": "sum",
+        "IGST": "sum",
+        "CGST": "sum",
+        "SGST": "sum"
+    }).reset_index()
+
+    # Aggregate GSTR data by GSTIN while concatenating multiple Trade Names
+    gstr_agg = gstr_df.groupby("GSTIN").agg({
+        "Trade_Name": lambda x: ', '.join(x.dropna().unique()),  # Concatenate unique names
+        "Invoice_Value": "sum",
+        "Integrated_Tax": "sum",
+        "Central_Tax": "sum",
+        "State_UT_Tax": "sum"
+    }).reset_index()
+
+    # Aggregate Debit Note data by GSTIN while concatenating multiple Particulars
+    debit_agg = debit_df.groupby("GSTIN").agg({
+        "Particulars": lambda x: ', '.join(set(x)),  # Combine different Particulars
+        "Gross_Total": "sum",
+        "IGST": "sum",
+        "CGST": "sum",
+        "SGST": "sum",
+    }).reset_index()
+
+    # Aggregate GSTR-CDNR data by GSTIN while concatenating multiple Trade Names
+    gstr_cdnr_agg = gstr_cdnr_df.groupby("GSTIN_of_Supplier").agg({
+        "Trade_Legal_Name": lambda x: ', '.join(set(x)),  # Combine different Trade Names
+        "Invoice_Value": "sum",
+        "Integrated_Tax": "sum",
+        "Central_Tax": "sum",
+        "State_UT_Tax": "sum",
+    }).reset_index()
+
+    # Perform reconciliation based on GSTIN
+    reconciliation_df = pd.merge(
+        tally_agg, gstr_agg,
+        left_on=["GSTIN"],
+        right_on=["GSTIN"],
+        how="outer",
+        suffixes=("_Tally", "_GSTR"),
+        indicator=True
+    )
+
+    # List of columns to fill NaN with 0 (excluding "Particulars" and "Trade Name")
+    columns_to_fill = ["IGST", "CGST", "SGST", "Integrated_Tax", "Central_Tax", "State_UT_Tax"]
+
+    # Fill NaN only for selected numeric columns
+    reconciliation_df[columns_to_fill] = reconciliation_df[columns_to_fill].fillna(0)
+
+    # Define ₹2 tolerance
+    tolerance = 2.00
+
+    # Calculate Differences
+    reconciliation_df["Diff_IGST"] = reconciliation_df["IGST"] - reconciliation_df["Integrated_Tax"]
+    reconciliation_df["Diff_CGST"] = reconciliation_df["CGST"] - reconciliation_df["Central_Tax"]
+    reconciliation_df["Diff_SGST"] = reconciliation_df["SGST"] - reconciliation_df["State_UT_Tax"]
+
+    # Determine Status
+    def get_status(row):
+        if row["_merge"] == "right_only":
+            return "Missing in Tally"
+        elif row["_merge"] == "left_only":
+            return "Missing in GSTR"
+        elif (abs(row["Diff_IGST"]) > tolerance or abs(row["Diff_CGST"]) > tolerance or abs(row["Diff_SGST"]) > tolerance):
+            return "Mismatch"
+        else:
+            return "Matched"
+
+    reconciliation_df["Remarks"] = reconciliation_df.apply(get_status, axis=1)
+
+    # Drop unnecessary columns
+    reconciliation_df.drop(columns=["_merge"], inplace=True)
+
+    # Reorder columns to match output format
+    final_dfg = reconciliation_df[
+        [
+            "GSTIN",
+            "Particulars",
+            "IGST",
+            "CGST",
+            "SGST",
+            "Trade_Name",
+            "Integrated_Tax",
+            "Central_Tax",
+            "State_UT_Tax",
+            "Diff_IGST",
+            "Diff_CGST",
+            "Diff_SGST",
+            "Remarks",
+        ]
+    ]
+    # Sort entries alphabetically by Particulars (Tally) and Trade Name (GSTR)
+    # Convert Particulars to string and sort alphabetically
+    final_dfg["Particulars"] = final_dfg["Particulars"].astype(str)
+    final_dfg = final_dfg.sort_values(by=["Particulars"], ascending=True)
+
+    # Perform reconciliation for Debit Note Register
+    reconciliation_df_debit = pd.merge(
+        debit_agg,
+        gstr_cdnr_agg,
+        left_on="GSTIN",
+        right_on="GSTIN_of_Supplier",
+        how="outer",
+        suffixes=("_DEBIT", "_GSTR"),
+        indicator=True,
+    )
+
+    # Convert relevant columns to numeric before calculating differences
+    reconciliation_df_debit["IGST"] = pd.to_numeric(
+        reconciliation_df_debit["IGST"], errors="coerce"
+    ).fillna(0)
+    reconciliation_df_debit["Integrated_Tax"] = pd.to_numeric(
+        reconciliation_df_debit["Integrated_Tax"], errors="coerce"
+    ).fillna(0)
+    reconciliation_df_debit["CGST"] = pd.to_numeric(
+        reconciliation_df_debit["CGST"], errors="coerce"
+    ).fillna(0)
+    reconciliation_df_debit["Central_Tax"] = pd.to_numeric(
+        reconciliation_df_debit["Central_Tax"], errors="coerce"
+    ).fillna(0)
+    reconciliation_df_debit["SGST"] = pd.to_numeric(
+        reconciliation_df_debit["SGST"], errors="coerce"
+    ).fillna(0)
+    reconciliation_df_debit["State_UT_Tax"] = pd.to_numeric(
+        reconciliation_df_debit["State_UT_Tax"], errors="coerce"
+    ).fillna(0)
+
+    # Calculate differences
+    reconciliation_df_debit["Diff_IGST"] = (
+        reconciliation_df_debit["IGST"] - reconciliation_df_debit["Integrated_Tax"]
+    )
+    reconciliation_df_debit["Diff_CGST"] = (
+        reconciliation_df_debit["CGST"] - reconciliation_df_debit["Central_Tax"]
+    )
+    reconciliation_df_debit["Diff_SGST"] = (
+        reconciliation_df_debit["SGST"] - reconciliation_df_debit["State_UT_Tax"]
+    )
+
+    def get_status_debit(row):
+        if row["_merge"] == "right_only":
+            return "Missing in Tally"
+        elif row["_merge"] == "left_only":
+            return "Missing in GSTR"
+        elif (
+            abs(row["Diff_IGST"]) > tolerance
+            or abs(row["Diff_CGST"]) > tolerance
+            or abs(row["Diff_SGST"]) > tolerance
+        ):
+            return "Mismatch"
+        else:
+            return "Matched"
+
+    reconciliation_df_debit["Status"] = reconciliation_df_debit.apply(
+        get_status_debit, axis=1
+    )
+    reconciliation_df_debit.drop(columns=["_merge"], inplace=True)
+
+    # Reorder columns
+    final_dfd = reconciliation_df_debit[
+        [
+            "GSTIN",
+            "Particulars",
+            "IGST",
+            "CGST",
+            "SGST",
+            "Trade_Legal_Name",
+            "Integrated_Tax",
+            "Central_Tax",
+            "State_UT_Tax",
+            "Diff_IGST",
+            "Diff_CGST",
+            "Diff_SGST",
+            "Status",
+        ]
+    ]
+
+    # Convert numeric columns to float and negate debit values
+    numeric_cols = [
+        "IGST",
+        "CGST",
+        "SGST",
+        "Integrated_Tax",
+        "Central_Tax",
+        "State_UT_Tax",
+        "Diff_IGST",
+        "Diff_CGST",
+        "Diff_SGST",
+    ]
+    for col in numeric_cols:
+        final_dfg[col] = pd.to_numeric(final_dfg[col], errors="coerce").fillna(0)
+        final_dfd[col] = -pd.to_numeric(final_dfd[col], errors="coerce").fillna(0)
+
+    # Ensure column names match
+    column_mapping = {
+        "GSTIN_of_Supplier": "GSTIN",
+        "Trade_Legal_Name": "Trade_Name",
+        "Invoice_Value": "Integrated_Tax",
+        "Gross_Total": "IGST",
+    }
+    final_dfd.rename(columns=column_mapping, inplace=True)
+
+    # Add remarks for debit notes
+    final_dfd["Remarks"] = "Debit Note"
+
+    # Combine both dataframes
+    combined_df = pd.concat([final_dfg, final_dfd], ignore_index=True)
+
+    # Sort so that debit notes appear immediately after their respective purchase entries
+    combined_df = combined_df.sort_values(by=["Particulars"], ascending=[True])
+
+    return Report(combined_df, COMBINED_REPORT_FILE, status_col="Remarks")
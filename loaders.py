@@ -0,0 +1,409 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+import weakref
+import zipfile
+from contextlib import contextmanager, suppress
+from functools import lru_cache
+from typing import NamedTuple
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+
+from profiling import stage
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional; without it normalized frames are not cached on disk
+    feather = None
+
+# Amendment sheets of a GSTR-2B workbook, read as well when the workbook has them
+GSTR_AMENDMENT_SHEETS = ("B2BA", "B2B-CDNRA")
+
+# Rows scanned from the top of a sheet for its header
+HEADER_SCAN_ROWS = 30
+
+# Most rows a header spans; GSTR-2B amendment sheets have three
+MAX_HEADER_ROWS = 3
+
+# Number of parsed workbooks kept in memory
+CACHE_ENTRIES = 16
+
+# Directory of the on-disk cache of normalized input frames
+CACHE_DIR = os.environ.get("RECONCILIATION_CACHE_DIR", os.path.join(tempfile.gettempdir(), "reconciliation_cache"))
+
+# Most bytes of normalized frames kept in the on-disk cache; the least recently used are removed first
+CACHE_MAX_BYTES = int(os.environ.get("RECONCILIATION_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# Bump whenever the normalization of an input changes, invalidating cached frames
+SCHEMA_VERSION = 4
+
+# Registers at least this large are read with the streaming reader
+STREAMING_MIN_BYTES = 10 * 1024 * 1024
+
+# Rows converted at a time by the streaming reader
+CHUNK_ROWS = 50_000
+
+# Text read_excel treats as missing by default
+NA_TEXT = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
+def file_bytes(file):
+    """Return the contents of an uploaded file or a path on disk."""
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    if hasattr(file, "read"):
+        return file.read()
+    with open(file, "rb") as f:
+        return f.read()
+
+
+def file_size(file):
+    """Return the size in bytes of an uploaded file or a path on disk."""
+    if hasattr(file, "getbuffer"):
+        with file.getbuffer() as view:
+            return view.nbytes
+    if isinstance(file, (str, os.PathLike)):
+        return os.path.getsize(file)
+    return len(file_bytes(file))
+
+
+def content_hash(data):
+    """Return the SHA-256 hex digest of file contents."""
+    return hashlib.sha256(data).hexdigest()
+
+
+# Digest of every file object hashed so far, dropped with the file
+_file_digests = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=CACHE_ENTRIES)
+def _path_digest(path, mtime_ns, size):
+    # Cached on the modification time and size too, so a file rewritten in place is hashed again
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def file_digest(file):
+    """Return the SHA-256 hex digest of an uploaded file or a path on disk, hashing each file only once.
+
+    Uploads are hashed in place, without copying their contents; paths
+    are hashed again only when the file has changed on disk.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        stat = os.stat(file)
+        return _path_digest(os.fspath(file), stat.st_mtime_ns, stat.st_size)
+    try:
+        return _file_digests[file]
+    except (KeyError, TypeError):
+        pass
+    if hasattr(file, "getbuffer"):
+        with file.getbuffer() as view:
+            digest = hashlib.sha256(view).hexdigest()
+    else:
+        digest = content_hash(file_bytes(file))
+    try:
+        _file_digests[file] = digest
+    except TypeError:  # Not weakly referenceable; hashed again next time
+        pass
+    return digest
+
+
+def workbook_source(file):
+    """Return what a workbook reader should open: a path as it is, or the upload rewound to its start."""
+    if isinstance(file, (str, os.PathLike)):
+        return file
+    if hasattr(file, "seek"):
+        file.seek(0)
+        return file
+    return io.BytesIO(file_bytes(file))
+
+
+class SheetLayout(NamedTuple):
+    """Where the data of a sheet starts and the positions of the columns read from it."""
+    sheet: object  # Sheet name, or position for the first sheet
+    data_start: int  # Index of the first row below the header
+    positions: tuple  # Position of each column read
+    columns: tuple  # Name given to each column read
+
+
+def header_key(label):
+    """Return a header label reduced to lowercase letters and digits, so spacing, punctuation and ₹ don't matter."""
+    return re.sub(r"[^0-9a-z]", "", str(label).lower())
+
+
+def header_labels(rows, end):
+    """Return the label of every column of a header ending at row ``end``.
+
+    A column's label is its lowest non-blank cell within the last
+    ``MAX_HEADER_ROWS`` rows, so a grouped header like "Invoice Details"
+    over "Invoice number" labels the column "Invoice number".
+    """
+    labels = {}
+    for row in rows[max(0, end - MAX_HEADER_ROWS + 1):end + 1]:
+        for position, value in enumerate(row):
+            if value is not None and str(value).strip():
+                labels[position] = header_key(value)
+    return labels
+
+
+def locate_header(rows, headers, sheet):
+    """Return the ``SheetLayout`` of a sheet from its first ``rows``, or None if no header names every column.
+
+    ``headers`` maps each column to read to the labels it may have. The
+    header is the first row (with the rows above it) that names every
+    column. A label found more than once maps to its last column, since
+    amendment sheets list the original document before the revised one.
+    """
+    wanted = {column: {header_key(label) for label in labels} for column, labels in headers.items()}
+    for end in range(len(rows)):
+        positions = {}
+        for position, key in sorted(header_labels(rows, end).items()):
+            for column, keys in wanted.items():
+                if key in keys:
+                    positions[column] = position
+        if len(positions) == len(wanted):
+            return SheetLayout(sheet, end + 1, tuple(positions[column] for column in headers), tuple(headers))
+    return None
+
+
+class WorkbookReader:
+    """An input workbook opened on first use and kept open for every sheet read from it until closed.
+
+    openpyxl reads the size of every sheet when it opens a workbook, which
+    means reading the whole of any sheet that doesn't state its size, so
+    scanning headers and parsing sheets share one open workbook.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self._excel = None
+
+    @property
+    def excel(self):
+        """The ``pd.ExcelFile`` of the workbook, opened on first use."""
+        if self._excel is None:
+            self._excel = pd.ExcelFile(workbook_source(self.file), engine="openpyxl")
+        return self._excel
+
+    def close(self):
+        if self._excel is not None:
+            self._excel.close()
+            self._excel = None
+
+
+@contextmanager
+def open_workbook(file, reader=None):
+    """Yield a ``WorkbookReader`` of ``file``, or ``reader`` when one is given, closing only one opened here."""
+    if reader is not None:
+        yield reader
+        return
+    reader = WorkbookReader(file)
+    try:
+        yield reader
+    finally:
+        reader.close()
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def _scan_sheets(digest, _reader, sheets):
+    # Cached on the content hash; only the first rows of each sheet are read
+    wb = _reader.excel.book
+    scanned = {}
+    for sheet in sheets:
+        ws = wb.worksheets[sheet] if isinstance(sheet, int) else wb[sheet]
+        scanned[sheet] = list(ws.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True))
+    return scanned
+
+
+def sheet_layouts(file, headers, optional=(), reader=None):
+    """Locate the header of every sheet in ``headers`` and return the layout of each sheet.
+
+    ``headers`` maps sheets to the column labels expected in them, as for
+    ``locate_header``. Only the first ``HEADER_SCAN_ROWS`` rows of each
+    sheet are read. Sheets in ``optional`` are left out when the workbook
+    doesn't have them or no header is found; any other sheet without a
+    header raises ValueError naming the columns that were not found.
+    ``reader`` is a ``WorkbookReader`` of ``file`` to read with.
+    """
+    names = sheet_names(file)
+    sheets = tuple(sheet for sheet in headers if sheet not in optional or sheet in names)
+    with open_workbook(file, reader) as reader:
+        scanned = _scan_sheets(file_digest(file), reader, sheets)
+    layouts = {}
+    for sheet in sheets:
+        layout = locate_header(scanned[sheet], headers[sheet], sheet)
+        if layout is not None:
+            layouts[sheet] = layout
+        elif sheet not in optional:
+            found = {header_key(value) for row in scanned[sheet] for value in row if value is not None}
+            missing = [labels[0] for labels in headers[sheet].values() if not {header_key(label) for label in labels} & found]
+            name = names[sheet] if isinstance(sheet, int) else sheet
+            raise ValueError(
+                f"No header found in sheet {name!r} within its first {HEADER_SCAN_ROWS} rows"
+                + (f"; missing columns: {', '.join(missing)}" if missing else "")
+            )
+    return layouts
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def _parse_sheet(digest, _reader, layout):
+    # Cached on the content hash and layout of one sheet; the file itself is not hashed
+    df = _reader.excel.parse(
+        layout.sheet, header=None, skiprows=layout.data_start, usecols=list(layout.positions), dtype=str,
+    )
+    df = df.reindex(columns=list(layout.positions))
+    df.columns = list(layout.columns)
+    return df
+
+
+def load_sheets(file, layouts, reader=None):
+    """Parse the mapped columns of the given sheet layouts and return a frame per sheet.
+
+    Rows below the header are read as text, like ``read_excel(dtype=str)``.
+    Each sheet is parsed only when asked for and cached by content hash
+    and layout, so the same upload is only parsed once across reports,
+    and a report reading one sheet doesn't pay for the others.
+    ``reader`` is a ``WorkbookReader`` of ``file`` to read with.
+    """
+    digest = file_digest(file)
+    with open_workbook(file, reader) as reader:
+        return {layout.sheet: _parse_sheet(digest, reader, layout) for layout in layouts}
+
+
+def sheet_names(file):
+    """Return the sheet names of a workbook, read from its workbook part alone."""
+    with zipfile.ZipFile(workbook_source(file)) as zf:
+        root = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+    return [sheet.get("name") for sheet in root.findall("{*}sheets/{*}sheet")]
+
+
+def cached_frame(name, file, build):
+    """Return the normalized frame ``name`` of ``file``, calling ``build()`` on a cache miss.
+
+    Normalized frames are stored as uncompressed Feather files keyed by the
+    file's content hash and ``SCHEMA_VERSION``. Later runs on the same file
+    memory-map the cached frame instead of parsing the workbook again.
+    Writing a frame prunes the cache back to ``CACHE_MAX_BYTES``.
+    """
+    if feather is None:
+        return build()
+
+    key = content_hash(f"{SCHEMA_VERSION}:{name}:{file_digest(file)}".encode())
+    path = os.path.join(CACHE_DIR, f"{key}.feather")
+    if os.path.exists(path):
+        with stage("read") as record:
+            df = feather.read_table(path, memory_map=True).to_pandas()
+            record["rows"] = len(df)
+        with suppress(OSError):
+            os.utime(path)  # Mark as recently used for pruning
+        return df
+
+    df = build().reset_index(drop=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    feather.write_feather(df, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)  # Atomic, so concurrent runs never read a partial file
+    prune_cache(keep=path)
+    return df
+
+
+def prune_cache(max_bytes=None, keep=None):
+    """Remove the least recently used frames of the on-disk cache until it holds at most ``max_bytes``.
+
+    ``max_bytes`` defaults to ``CACHE_MAX_BYTES``. The frame at ``keep``,
+    the one just written, is never removed. Files that other runs remove
+    meanwhile, or that can't be removed, are skipped.
+    """
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    frames = []
+    with suppress(FileNotFoundError), os.scandir(CACHE_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith(".feather"):
+                with suppress(OSError):
+                    stat = entry.stat()
+                    frames.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in frames)
+    for _, size, path in sorted(frames):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        with suppress(OSError):
+            os.remove(path)
+            total -= size
+
+
+def cell_text(value):
+    """Convert a cell value to text the way ``read_excel(dtype=str)`` does."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value)
+    return None if text in NA_TEXT or text in ERROR_CODES else text
+
+
+def _chunk_frame(rows, layout, numeric_cols, categories):
+    # Convert the mapped columns of a chunk of raw rows into typed arrays; categorical
+    # columns are kept as integer codes into the categories seen so far
+    data = {}
+    for i, col in zip(layout.positions, layout.columns):
+        values = [row[i] if i < len(row) else None for row in rows]
+        if col in numeric_cols:
+            # Parsed from text like the dtype=str path, so amounts round identically
+            values = pd.Series([cell_text(v) for v in values], dtype=object)
+            data[col] = pd.to_numeric(values, errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+        elif col in categories:
+            codes = categories[col]
+            texts = [cell_text(v) for v in values]
+            data[col] = np.array([-1 if t is None else codes.setdefault(t, len(codes)) for t in texts], dtype=np.int32)
+        else:
+            data[col] = pd.Series([cell_text(v) for v in values], dtype=object)
+    return pd.DataFrame(data)
+
+
+def stream_sheet(file, layout, numeric_cols=(), categorical_cols=(), chunk_rows=CHUNK_ROWS):
+    """Read the mapped columns of the first sheet of a workbook row by row into typed columns.
+
+    Rows below the header of ``layout`` are streamed from openpyxl's
+    read-only reader and converted ``chunk_rows`` at a time, so only one
+    chunk of raw cell values is held in memory. Amounts in
+    ``numeric_cols`` become float64 with blanks and text as 0, and
+    ``categorical_cols`` become categoricals. Text columns and blank rows
+    follow ``load_sheets``.
+    """
+    categories = {col: {} for col in categorical_cols}
+    wb = load_workbook(workbook_source(file), read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(min_row=layout.data_start + 1, values_only=True)
+        chunks, chunk, blank_rows = [], [], []
+        for row in rows:
+            # Hold back blank rows until a non-blank row follows, since trailing ones are dropped
+            if all(value is None for value in row):
+                blank_rows.append(row)
+                continue
+            chunk.extend(blank_rows)
+            blank_rows = []
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                chunks.append(_chunk_frame(chunk, layout, numeric_cols, categories))
+                chunk = []
+        chunks.append(_chunk_frame(chunk, layout, numeric_cols, categories))
+    finally:
+        wb.close()
+
+    df = pd.concat(chunks, ignore_index=True)
+    for col, codes in categories.items():
+        df[col] = pd.Categorical.from_codes(df[col].to_numpy(), categories=list(codes))
+    return df
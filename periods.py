@@ -0,0 +1,272 @@
+"""Reconcile a financial year: monthly GSTR-2B returns against one annual Tally register.
+
+The Tally register is partitioned by the month of each invoice and every
+month is matched against the GSTR-2B of that period, with the periods
+running in parallel in a process pool. Suppliers often file late, so an
+invoice booked in one month can appear in a later month's GSTR-2B. A
+cross-period pass therefore pairs the invoices left unmatched in one
+period with those left unmatched in the others; only this residue is
+compared again. The result is one workbook with a summary sheet and a
+sheet per period.
+
+    python periods.py tally.xlsx 2024-04=gstr_apr.xlsx 2024-05=gstr_may.xlsx --output annual.xlsx
+"""
+import argparse
+import logging
+import re
+
+import pandas as pd
+
+from inputs import B2B_SCHEMA, empty_frame, read_tally
+from profiling import add_records, record_stages, stage
+from reports import (
+    AMOUNT_COLUMNS, Report, gst_report, match_documents, read_gstr_documents, sort_rows, stack_sources, write_reports,
+)
+from status import MISSING_IN_GSTR, MISSING_IN_TALLY, TOLERANCE, classify_status, to_paise
+from workers import process_pool, quiet_cache_warnings
+
+# Default file name of the consolidated report
+PERIOD_REPORT_FILE = "GST_Reconciliation_Report_Periods.xlsx"
+
+# Period of Tally invoices without a readable date
+UNDATED = "Undated"
+
+# Columns of the Tally side of a GST report row; the rest, except GSTIN and Status, come from GSTR-2B
+TALLY_SIDE_COLUMNS = ["Supplier_Invoice_No", "Gross_Total", "Total_Expense", "IGST", "CGST", "SGST"]
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+# Periods in file names: 2024-04, 042024 (as in GSTR-2B downloads) or Apr-24 / April 2024
+PERIOD_PATTERNS = [
+    (re.compile(r"(?<!\d)(20\d\d)[-_ ]?(0[1-9]|1[0-2])(?!\d)"), lambda m: (m[1], m[2])),
+    (re.compile(r"(?<!\d)(0[1-9]|1[0-2])[-_ ]?(20\d\d)(?!\d)"), lambda m: (m[2], m[1])),
+    (re.compile(r"(?i)(?<![a-z])(" + "|".join(MONTHS) + r")[a-z]*[-_' ]*(20\d\d|\d\d)(?!\d)"),
+     lambda m: (m[2] if len(m[2]) == 4 else "20" + m[2], f"{MONTHS.index(m[1].lower()) + 1:02d}")),
+]
+
+logger = logging.getLogger("periods")
+
+
+def parse_dates(values):
+    """Parse dates as Tally exports them: ISO text first, anything else day first."""
+    iso = pd.to_datetime(values, errors="coerce", format="ISO8601")
+    return iso.fillna(pd.to_datetime(values.where(iso.isna()), errors="coerce", format="mixed", dayfirst=True))
+
+
+def invoice_periods(tally_df):
+    """Return the month (YYYY-MM) of each Tally invoice, from its supplier invoice date or else its voucher date."""
+    dates = parse_dates(tally_df["Supplier_Invoice_Date"]).fillna(parse_dates(tally_df["Date"]))
+    return dates.dt.strftime("%Y-%m").fillna(UNDATED)
+
+
+def period_from_name(name):
+    """Return the period (YYYY-MM) named in a file name, or None if it names none."""
+    for pattern, parts in PERIOD_PATTERNS:
+        match = pattern.search(name or "")
+        if match:
+            return "-".join(parts(match))
+    return None
+
+
+def check_period(period):
+    """Raise ValueError unless ``period`` is a month written as YYYY-MM."""
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", period):
+        raise ValueError(f"Period {period!r} is not a month written as YYYY-MM")
+
+
+def period_months(periods):
+    """Return each period (YYYY-MM) as a number of months, NaN for undated invoices."""
+    dates = pd.to_datetime(periods.where(periods != UNDATED), format="%Y-%m", errors="coerce")
+    return dates.dt.year * 12 + dates.dt.month
+
+
+def empty_documents(paise=False):
+    """Return GSTR-2B documents without rows, for a period without a GSTR-2B file."""
+    return stack_sources({"B2B": empty_frame(B2B_SCHEMA, paise)})
+
+
+def reconcile_period(tally_df, gstr_file, fuzzy=False, tolerance=TOLERANCE, paise=False):
+    """Reconcile one period's Tally invoices against its GSTR-2B; runs in a worker process.
+
+    Without a ``gstr_file`` every invoice is "Missing in GSTR". Returns the
+    invoice and debit note rows and the stage records of the run.
+    """
+    with record_stages() as records:
+        if gstr_file is None:
+            documents_df = empty_documents(paise)
+        else:
+            documents_df = pd.concat(read_gstr_documents(gstr_file, paise), ignore_index=True)
+        output_df_b2b, output_df_cdnr = match_documents(tally_df, documents_df, fuzzy, tolerance, paise)
+    return output_df_b2b, output_df_cdnr, records
+
+
+def match_across_periods(sections, tolerance=TOLERANCE, paise=False):
+    """Pair the invoices each period left unmatched with those left unmatched in other periods.
+
+    ``sections`` maps each period to its invoice rows, with the period of
+    their Tally side in ``Tally_Period``. A Tally invoice "Missing in GSTR"
+    is paired with a GSTR-2B invoice "Missing in Tally" of another period
+    on the same GSTIN and invoice number, and the pair is classified again
+    and moved to the period of the GSTR-2B invoice. Each row is paired at
+    most once, with the closest period, the earlier one on a tie. Returns the new
+    sections and the number of pairs per GSTR-2B period.
+    """
+    periods = list(sections)
+    left = pd.concat(
+        {period: rows[rows["Status"] == MISSING_IN_GSTR] for period, rows in sections.items()}, names=["_left_period", "_left_row"]
+    ).reset_index()
+    right = pd.concat(
+        {period: rows[rows["Status"] == MISSING_IN_TALLY] for period, rows in sections.items()}, names=["_right_period", "_right_row"]
+    ).reset_index()
+    tally_columns = ["_left_period", "_left_row", "GSTIN", "Tally_Period"] + TALLY_SIDE_COLUMNS
+    gstr_columns = ["GSTIN"] + [col for col in right.columns if col not in tally_columns + ["Status", "Match_Score"]]
+
+    with stage("merge", len(left) + len(right)):
+        pairs = pd.merge(
+            left[tally_columns], right[gstr_columns],
+            left_on=["Supplier_Invoice_No", "GSTIN"],
+            right_on=["Invoice_No", "GSTIN"],
+        )
+        pairs = pairs[pairs["_left_period"] != pairs["_right_period"]]
+
+        # An invoice left over in several periods is paired once, with the closest period
+        distance = (period_months(pairs["_left_period"]) - period_months(pairs["_right_period"])).abs()
+        pairs = pairs.assign(_distance=distance).sort_values(["_distance", "_right_period"], kind="stable", na_position="last")
+        pairs = pairs.drop_duplicates(["_left_period", "_left_row"]).drop_duplicates(["_right_period", "_right_row"])
+        pairs = pairs.drop(columns="_distance")
+
+    with stage("classify", len(pairs)):
+        status_df = pairs.assign(_merge="both")
+        if paise:
+            # Report amounts are rupees again; compare them as the paise they were read as
+            for col in AMOUNT_COLUMNS:
+                status_df[col] = to_paise(status_df[col])
+        pairs["Status"] = classify_status(status_df, tolerance=tolerance, paise=paise)
+
+    # Move each pair into the period of its GSTR-2B invoice, dropping both unmatched rows
+    new_sections, matches = {}, {}
+    for period in periods:
+        rows = sections[period]
+        paired = (
+            pairs["_left_row"][pairs["_left_period"] == period].tolist()
+            + pairs["_right_row"][pairs["_right_period"] == period].tolist()
+        )
+        moved = pairs[pairs["_right_period"] == period].reindex(columns=rows.columns)
+        matches[period] = len(moved)
+        new_sections[period] = sort_rows(pd.concat([rows.drop(index=paired), moved], ignore_index=True)) if len(moved) or paired else rows
+    return new_sections, matches
+
+
+def period_summary(periods, gstr_files, sections, note_sections, matches):
+    """Return the rows per status, and the cross-period pairs, of every period."""
+    counts = pd.DataFrame({
+        period: pd.concat([sections[period]["Status"], note_sections[period]["Status"]]).value_counts()
+        for period in periods
+    }).T.fillna(0).astype(int)
+    summary = pd.DataFrame({
+        "Period": periods,
+        "GSTR_2B": ["Yes" if period in gstr_files else "No" for period in periods],
+    })
+    for status in counts.columns:
+        summary[status] = counts[status].reindex(periods).to_numpy()
+    summary["Cross_Period_Matches"] = [matches[period] for period in periods]
+    return summary
+
+
+def reconcile_periods(tally_file, gstr_files, fuzzy=False, tolerance=TOLERANCE, paise=False, workers=None):
+    """Reconcile an annual Tally register against the GSTR-2B of several periods.
+
+    ``gstr_files`` maps each period (YYYY-MM) to its GSTR-2B file. Tally
+    invoices are assigned to the month of their supplier invoice date, or
+    of their voucher date, and matched within that period; months without
+    a GSTR-2B file, and undated invoices, get a period of their own. The
+    periods run in parallel on up to ``workers`` processes; with one
+    worker they run in this process. Invoices left unmatched are then
+    paired across periods, see ``match_across_periods``. Returns a
+    summary report followed by one GST report per period, each with the
+    Tally month of its rows in ``Tally_Period``.
+    """
+    for period in gstr_files:
+        check_period(period)
+
+    tally_df = read_tally(tally_file, paise)
+    with stage("normalize", len(tally_df)):
+        tally_df = tally_df.dropna(subset=["GSTIN", "Supplier_Invoice_No"], how="all")
+        tally_df["Total_Expense"] = tally_df[["Purchase_Accounts", "Fixed_Assets", "Direct_Expenses", "Indirect_Expenses"]].sum(axis=1)
+        tally_periods = invoice_periods(tally_df)
+
+    periods = sorted(set(gstr_files) | set(tally_periods), key=lambda period: (period == UNDATED, period))
+    tasks = [(tally_df[tally_periods == period], gstr_files.get(period), fuzzy, tolerance, paise) for period in periods]
+    if workers == 1 or len(gstr_files) < 2:
+        results = [reconcile_period(*task) for task in tasks]
+    else:
+        with process_pool(workers) as pool:
+            results = list(pool.map(reconcile_period, *zip(*tasks)))
+
+    sections, note_sections = {}, {}
+    for period, (output_df_b2b, output_df_cdnr, records) in zip(periods, results):
+        add_records(records)
+        output_df_b2b.insert(output_df_b2b.columns.get_loc("Status") + 1, "Tally_Period",
+                             output_df_b2b["Status"].ne(MISSING_IN_TALLY).map({True: period, False: None}))
+        output_df_cdnr.insert(output_df_cdnr.columns.get_loc("Status") + 1, "Tally_Period",
+                              output_df_cdnr["Status"].ne(MISSING_IN_TALLY).map({True: period, False: None}))
+        sections[period], note_sections[period] = output_df_b2b, output_df_cdnr
+
+    sections, matches = match_across_periods(sections, tolerance, paise)
+    logger.info("%d invoices matched across periods", sum(matches.values()))
+
+    summary = Report(period_summary(periods, gstr_files, sections, note_sections, matches), PERIOD_REPORT_FILE, sheet_name="Summary")
+    period_reports = []
+    for period in periods:
+        report = gst_report(sections[period], note_sections[period])
+        report.file_name, report.sheet_name = PERIOD_REPORT_FILE, period
+        period_reports.append(report)
+    return [summary] + period_reports
+
+
+def generate_period_report(tally_file, gstr_files, output_file=None, fuzzy=False, tolerance=TOLERANCE, paise=False,
+                           workers=None):
+    """Generate the consolidated multi-period report, as bytes unless ``output_file`` is given."""
+    return write_reports(reconcile_periods(tally_file, gstr_files, fuzzy, tolerance, paise, workers), output_file)
+
+
+def parse_gstr_argument(value):
+    """Parse a ``PERIOD=PATH`` argument, taking the period from the file name when only a path is given."""
+    period, sep, path = value.rpartition("=")
+    if not sep:
+        period = period_from_name(path)
+        if period is None:
+            raise argparse.ArgumentTypeError(f"no period in {path!r}; pass it as YYYY-MM={path}")
+    try:
+        check_period(period)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return period, path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcile an annual Tally register against monthly GSTR-2B files.")
+    parser.add_argument("tally", help="Tally Purchase Register covering every period")
+    parser.add_argument("gstr", nargs="+", type=parse_gstr_argument,
+                        help="GSTR-2B file of each period, as YYYY-MM=PATH or a path naming its period")
+    parser.add_argument("--output", default=PERIOD_REPORT_FILE, help="workbook to write")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="pair unmatched invoices whose numbers differ only in formatting as Probable Match")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="largest difference in rupees still matched")
+    parser.add_argument("--exact", action="store_true",
+                        help="read amounts as integer paise so sums and tolerance checks are exact")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    quiet_cache_warnings()
+
+    gstr_files = dict(args.gstr)
+    if len(gstr_files) < len(args.gstr):
+        parser.error("every period may have only one GSTR-2B file")
+    generate_period_report(args.tally, gstr_files, args.output, args.fuzzy, args.tolerance, args.exact, args.workers)
+    print(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Timing and memory use of the stages of a report run.
+
+The reconciliation code marks its stages with ``stage(name, rows)``.
+Outside of ``record_stages()`` this costs nothing; inside it every stage
+appends a record of its name, wall time, rows processed and the peak RSS
+of the process so far to the collected list. A run can also pass
+``on_stage``, which is called with the name of every stage as it starts;
+background jobs use it to report progress and to stop a cancelled run.
+"""
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then not recorded
+    resource = None
+
+# Records of the run being profiled, if any
+_records = ContextVar("stage_records", default=None)
+# Called with the name of every stage as it starts, if set
+_on_stage = ContextVar("stage_listener", default=None)
+
+logger = logging.getLogger("profiling")
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MiB, or None where unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextmanager
+def record_stages(on_stage=None):
+    """Collect the stages run inside the block as a list of stage records.
+
+    ``on_stage`` is called with the name of each stage before it runs; an
+    exception it raises aborts the run.
+    """
+    records = []
+    token = _records.set(records)
+    listener_token = _on_stage.set(on_stage)
+    try:
+        yield records
+    finally:
+        _on_stage.reset(listener_token)
+        _records.reset(token)
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Time the block as stage ``name`` of the run being profiled.
+
+    ``rows`` is the number of rows the stage processes. The record is
+    yielded, so a stage that only knows its rows at the end, like a read,
+    can set ``record["rows"]`` itself.
+    """
+    records = _records.get()
+    record = {"stage": name, "seconds": None, "rows": rows, "peak_rss_mb": None}
+    if records is None:
+        yield record
+        return
+    on_stage = _on_stage.get()
+    if on_stage is not None:
+        on_stage(name)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        record["peak_rss_mb"] = peak_rss_mb()
+        records.append(record)
+
+
+def add_records(records):
+    """Add stage records collected elsewhere, such as in a worker process, to the run being profiled."""
+    current = _records.get()
+    if current is not None:
+        current.extend(records)
+
+
+def stage_totals(records):
+    """Return the total seconds per stage name, in order of first appearance."""
+    totals = {}
+    for record in records:
+        totals[record["stage"]] = totals.get(record["stage"], 0.0) + record["seconds"]
+    return totals
+
+
+def log_stages(records, **context):
+    """Log every stage record as one JSON object, tagged with ``context`` such as the report name."""
+    for record in records:
+        logger.info("%s", json.dumps({**context, **record, "seconds": round(record["seconds"], 4)}))
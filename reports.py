@@ -0,0 +1,724 @@
+import io
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from openpyxl.styles import PatternFill
+
+from excel_writer import write_excel, write_excel_sheets
+from fuzzy import match_residue
+from inputs import (
+    B2BA_SCHEMA, CDNRA_SCHEMA, GSTR_NUMERIC_COLS, TALLY_NUMERIC_COLS,
+    read_debit_register, read_gstr_amendments, read_gstr_b2b, read_gstr_cdnr, read_tally,
+)
+from profiling import add_records, record_stages, stage
+from splits import aggregate_lines, match_splits, number_groups
+from suppliers import load_master, update_master
+from status import AMOUNT_PAIRS, PAISE_PER_RUPEE, TAX_PAIRS, TOLERANCE, classify_status, to_rupees
+from workers import process_pool
+
+# Default report file names
+GST_REPORT_FILE = "GST_Reconciliation_Report_Combined.xlsx"
+DEBIT_NOTE_REPORT_FILE = "DebitNoteReconciliation_Report.xlsx"
+COMBINED_REPORT_FILE = "GST_Reconciliation_Summary.xlsx"
+
+# Columns of the GST Reconciliation Report
+GST_REPORT_COLUMNS = [
+    "GSTIN", "Supplier_Invoice_No", "Gross_Total",
+    "Total_Expense", "IGST", "CGST", "SGST", "Invoice_No",
+    "Invoice_Value", "Taxable_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax", "Status"
+]
+
+# Amount columns of the GST and Debit Note Reconciliation Reports
+AMOUNT_COLUMNS = [col for pair in AMOUNT_PAIRS for col in pair]
+
+# GSTR-2B sheets reconciled in the invoice and debit note sections of the GST report
+INVOICE_SOURCES = ["B2B", "B2BA"]
+DEBIT_NOTE_SOURCES = ["B2B-CDNR", "B2B-CDNRA"]
+AMENDMENT_SOURCES = ["B2BA", "B2B-CDNRA"]
+
+# Define color for highlighting "Mismatch" and "Debit Note"
+mismatch_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
+debit_note_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+red_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")  # Define red_fill
+yellow_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")  # Define yellow_fill
+
+
+@dataclass
+class Report:
+    """A reconciliation result and how to highlight it in Excel."""
+    df: pd.DataFrame
+    file_name: str
+    sheet_name: str = "Sheet1"
+    status_col: str = "Status"
+    highlights: list = field(default_factory=list)
+
+    def status_counts(self):
+        """Return the number of rows per reconciliation status."""
+        return self.df[self.status_col].value_counts().to_dict()
+
+
+def write_report(report, output_file=None):
+    """Write a report to Excel with its highlighting.
+
+    ``output_file`` may be a path or a binary file object, and is returned.
+    Without one the workbook is built in memory and returned as bytes, so
+    nothing is written to the working directory.
+    """
+    if output_file is None:
+        buffer = io.BytesIO()
+        write_excel(report.df, buffer, report.sheet_name, report.highlights)
+        return buffer.getvalue()
+    write_excel(report.df, output_file, report.sheet_name, report.highlights)
+    return output_file
+
+
+def write_reports(reports, output_file=None):
+    """Write several reports as the sheets of one workbook, like ``write_report``.
+
+    Every report needs its own ``sheet_name``.
+    """
+    sheets = [(report.df, report.sheet_name, report.highlights) for report in reports]
+    if output_file is None:
+        buffer = io.BytesIO()
+        write_excel_sheets(sheets, buffer)
+        return buffer.getvalue()
+    write_excel_sheets(sheets, output_file)
+    return output_file
+
+
+def stack_sources(frames):
+    """Stack the frames of several GSTR-2B sheets, tagging each row with its sheet in ``Source``.
+
+    ``frames`` maps sheet names to frames; sheets after the first are
+    left out when they have no rows.
+    """
+    first, *others = frames
+    stacked = [frames[first].assign(Source=first)]
+    stacked += [frames[source].assign(Source=source) for source in others if len(frames[source])]
+    return pd.concat(stacked, ignore_index=True) if len(stacked) > 1 else stacked[0]
+
+
+def sort_rows(rows):
+    """Order report rows by invoice number and GSTIN, as the outer merge does."""
+    invoice_no = rows["Supplier_Invoice_No"].astype(object).fillna(rows["Invoice_No"].astype(object))
+    order = pd.DataFrame({"invoice_no": invoice_no.to_numpy(), "gstin": rows["GSTIN"].astype(object).to_numpy()})
+    order = order.sort_values(["invoice_no", "gstin"], kind="stable", na_position="last").index
+    return rows.iloc[order].reset_index(drop=True)
+
+
+def read_gstr_documents(gstr_file, paise=False):
+    """Read the GSTR-2B invoices and debit notes reconciled in the GST report.
+
+    Invoices come from B2B and debit notes from B2B-CDNR, together with
+    their amendments in B2BA and B2B-CDNRA when the workbook has them.
+    Each row names its sheet in ``Source``. Amounts are int64 paise with
+    ``paise``.
+    """
+    # Read GSTR-2B data
+    gstr_df = stack_sources({
+        "B2B": read_gstr_b2b(gstr_file, paise=paise),
+        "B2BA": read_gstr_amendments(gstr_file, "B2BA", B2BA_SCHEMA, paise=paise),
+    })
+
+    # Read GSTR-CDNR data
+    gstr_cdnr_df = stack_sources({
+        "B2B-CDNR": read_gstr_cdnr(gstr_file, paise=paise),
+        "B2B-CDNRA": read_gstr_amendments(gstr_file, "B2B-CDNRA", CDNRA_SCHEMA, paise=paise),
+    }).rename(
+        columns={"GSTIN_of_Supplier": "GSTIN", "Invoice_Number": "Invoice_No"}
+    )
+
+    with stage("normalize", len(gstr_df) + len(gstr_cdnr_df)):
+        # Ensure 'Note_Type' exists and filter only "Debit Note" records
+        if "Note_Type" in gstr_cdnr_df.columns:
+            debit_note_df = gstr_cdnr_df[gstr_cdnr_df["Note_Type"].str.contains("Debit Note", case=False, na=False)]
+        else:
+            debit_note_df = pd.DataFrame(columns=gstr_cdnr_df.columns)
+
+        # Remove entries where both GSTIN and Invoice No are missing
+        gstr_df.dropna(subset=["GSTIN", "Invoice_No"], how="all", inplace=True)
+        debit_note_df = debit_note_df.dropna(subset=["GSTIN", "Invoice_No"], how="all")
+
+    return gstr_df, debit_note_df
+
+
+def read_gst_inputs(tally_file, gstr_file, paise=False):
+    """Read the Tally invoices, GSTR-2B invoices and GSTR-2B debit notes for the GST report.
+
+    See ``read_gstr_documents`` for the GSTR-2B side. Amounts are int64
+    paise with ``paise``.
+    """
+    # Read Tally Purchase Register
+    tally_df = read_tally(tally_file, paise)
+
+    gstr_df, debit_note_df = read_gstr_documents(gstr_file, paise)
+
+    with stage("normalize", len(tally_df)):
+        # Remove entries where both GSTIN and Invoice No are missing
+        tally_df.dropna(subset=["GSTIN", "Supplier_Invoice_No"], how="all", inplace=True)
+
+        # Compute total expense in Tally
+        tally_df["Total_Expense"] = tally_df[["Purchase_Accounts", "Fixed_Assets", "Direct_Expenses", "Indirect_Expenses"]].sum(axis=1)
+
+    return tally_df, gstr_df, debit_note_df
+
+
+def match_documents(tally_df, documents_df, fuzzy=False, tolerance=TOLERANCE, paise=False, with_source=None,
+                    aggregate=False):
+    """Reconcile Tally invoices against GSTR-2B invoices and debit notes in a single merge.
+
+    ``documents_df`` stacks the GSTR-2B documents of every sheet with their
+    ``Source``. Tally is joined against all of them at once, so its keys are
+    hashed only once, and the result is split into two sections, each the
+    same as an outer merge against that section's sheets alone:
+
+    - invoices (B2B, B2BA), where Tally invoices without a GSTR-2B invoice
+      are "Missing in GSTR";
+    - debit notes (B2B-CDNR, B2B-CDNRA), keeping only debit note rows.
+
+    With ``fuzzy`` unmatched invoices whose numbers differ only in
+    formatting, and whose amounts agree within ``tolerance``, are paired as
+    "Probable Match" rows with a ``Match_Score``. With ``aggregate`` the lines of each invoice are summed on both sides
+    before the merge, and unmatched invoices of a supplier that add up to
+    one another are "Split Match" rows with a ``Match_Group``, see
+    ``splits.py``. A ``Source`` column is added when amendments were
+    reconciled, or as ``with_source`` says when it is given. Amounts
+    differing by more than ``tolerance`` rupees are a "Mismatch"; with
+    ``paise`` the inputs are in int64 paise, compared exactly, and the
+    rows returned are converted back to rupees. Returns the rows of the
+    invoice and debit note sections.
+    """
+    # Sum the ledger lines of every invoice, so the merge matches one row per key
+    if aggregate:
+        with stage("aggregate", len(tally_df) + len(documents_df)):
+            tally_df = aggregate_lines(tally_df, ["Supplier_Invoice_No", "GSTIN"], TALLY_NUMERIC_COLS + ["Total_Expense"])
+            documents_df = aggregate_lines(documents_df, ["Invoice_No", "GSTIN", "Source"], GSTR_NUMERIC_COLS)
+
+    # Merge Tally with all GSTR-2B documents, remembering the Tally row of each match
+    with stage("merge", len(tally_df) + len(documents_df)):
+        reconciliation_df = pd.merge(
+            tally_df.assign(_tally_row=np.arange(len(tally_df))), documents_df,
+            left_on=["Supplier_Invoice_No", "GSTIN"],
+            right_on=["Invoice_No", "GSTIN"],
+            how="outer",
+            suffixes=("_Tally", "_GSTR"),
+            indicator=True
+        )
+        source = reconciliation_df["Source"]
+
+        # Tally invoices matched by no GSTR-2B invoice get one "left_only" row in the
+        # invoice section, placed where their first match (or non-match) is
+        tally_row = reconciliation_df["_tally_row"]
+        is_invoice = source.isin(INVOICE_SOURCES)
+        unmatched = tally_row.notna() & ~tally_row.duplicated() & ~tally_row.isin(tally_row[is_invoice])
+        missing_df = (
+            tally_df.iloc[tally_row[unmatched].to_numpy(dtype=np.int64)]
+            .set_axis(reconciliation_df.index[unmatched])
+            .assign(_merge="left_only")
+        )
+        reconciliation_df_b2b = pd.concat([reconciliation_df[is_invoice], missing_df]).sort_index()
+        reconciliation_df_cdnr = reconciliation_df[source.isin(DEBIT_NOTE_SOURCES)]
+
+    with stage("classify", len(reconciliation_df_b2b) + len(reconciliation_df_cdnr)):
+        # Identify Reconciliation Status
+        reconciliation_df_b2b["Status"] = classify_status(reconciliation_df_b2b, tolerance=tolerance, paise=paise)
+        reconciliation_df_cdnr["Status"] = classify_status(reconciliation_df_cdnr, tolerance=tolerance, paise=paise)
+
+        # Remove rows where "Invoice_No" is "invoice number" and status is "Missing in Tally"
+        reconciliation_df_b2b = reconciliation_df_b2b[~((reconciliation_df_b2b["Invoice_No"].str.lower() == "invoice number") & (reconciliation_df_b2b["Status"] == "Missing in Tally"))]
+
+    # Select only required columns
+    if with_source is None:
+        with_source = source.isin(AMENDMENT_SOURCES).any()
+    columns = GST_REPORT_COLUMNS + (["Source"] if with_source else [])
+    match_columns = []
+
+    # Pair invoices whose numbers differ only in formatting
+    if fuzzy:
+        with stage("fuzzy", len(reconciliation_df_b2b)):
+            reconciliation_df_b2b = match_residue(
+                reconciliation_df_b2b, ("GSTIN", "Supplier_Invoice_No"), ("GSTIN", "Invoice_No"),
+                [col for col in documents_df.columns if col != "GSTIN"], tolerance=tolerance, paise=paise,
+            )
+        match_columns.append("Match_Score")
+
+    # Match invoices split across several invoice numbers
+    if aggregate:
+        with stage("splits", len(reconciliation_df_b2b)):
+            reconciliation_df_b2b = match_splits(reconciliation_df_b2b, tolerance, paise)
+        match_columns.append("Match_Group")
+
+    output_df_b2b, output_df_cdnr = reconciliation_df_b2b[columns + match_columns], reconciliation_df_cdnr[columns]
+
+    if paise:
+        return to_rupees(output_df_b2b, AMOUNT_COLUMNS), to_rupees(output_df_cdnr, AMOUNT_COLUMNS)
+    return output_df_b2b, output_df_cdnr
+
+
+def shard_ids(gstin, shards):
+    """Return the shard of every row from a hash of its GSTIN; rows without a GSTIN share one shard."""
+    hashes = pd.util.hash_pandas_object(gstin.astype(object), index=False).to_numpy()
+    return (hashes % np.uint64(shards)).astype(np.int64)
+
+
+def match_shard(tally_df, documents_df, fuzzy, tolerance, paise, with_source, aggregate):
+    # Runs in a worker process; returns the stage records with the rows
+    with record_stages() as records:
+        output_df_b2b, output_df_cdnr = match_documents(tally_df, documents_df, fuzzy, tolerance, paise, with_source,
+                                                        aggregate)
+    return output_df_b2b, output_df_cdnr, records
+
+
+def match_documents_sharded(tally_df, documents_df, shards, fuzzy=False, tolerance=TOLERANCE, paise=False, workers=None,
+                            aggregate=False):
+    """Reconcile like ``match_documents``, split into ``shards`` by GSTIN and matched in worker processes.
+
+    Documents only ever match, and are only ever fuzzy paired, within one
+    GSTIN, so each shard is reconciled on its own. The shards are matched
+    on up to ``workers`` processes, or in this process with one worker.
+    Their rows are put back in the order of the outer merge, so the result
+    is the same as ``match_documents`` on the whole frames.
+    """
+    with stage("partition", len(tally_df) + len(documents_df)):
+        with_source = documents_df["Source"].isin(AMENDMENT_SOURCES).any()
+        tally_shards, document_shards = shard_ids(tally_df["GSTIN"], shards), shard_ids(documents_df["GSTIN"], shards)
+        tasks = [
+            (tally_df[tally_shards == shard], documents_df[document_shards == shard], fuzzy, tolerance, paise, with_source,
+             aggregate)
+            for shard in range(shards)
+        ]
+    if workers == 1:
+        results = [match_shard(*task) for task in tasks]
+    else:
+        with process_pool(workers) as pool:
+            results = list(pool.map(match_shard, *zip(*tasks)))
+
+    for _, _, records in results:
+        add_records(records)
+    with stage("concat", sum(len(output_df_b2b) + len(output_df_cdnr) for output_df_b2b, output_df_cdnr, _ in results)):
+        if aggregate:
+            # Keep the split groups of different shards apart, then number them across shards
+            offset = 0
+            for output_df_b2b, _, _ in results:
+                output_df_b2b["Match_Group"] += offset
+                offset = np.nanmax(output_df_b2b["Match_Group"].to_numpy(), initial=offset)
+        output_df_b2b = sort_rows(pd.concat([output_df_b2b for output_df_b2b, _, _ in results], ignore_index=True))
+        output_df_cdnr = sort_rows(pd.concat([output_df_cdnr for _, output_df_cdnr, _ in results], ignore_index=True))
+        if aggregate:
+            output_df_b2b["Match_Group"] = number_groups(output_df_b2b["Match_Group"])
+    return output_df_b2b, output_df_cdnr
+
+
+def match_invoices(tally_df, gstr_df, fuzzy=False, tolerance=TOLERANCE, with_source=None):
+    """Reconcile Tally invoices against GSTR-2B invoices, see ``match_documents``."""
+    return match_documents(tally_df, gstr_df, fuzzy, tolerance, with_source=with_source)[0]
+
+
+def match_debit_notes(tally_df, debit_note_df, tolerance=TOLERANCE, with_source=None):
+    """Reconcile Tally invoices against GSTR-2B debit notes, keeping only debit note rows."""
+    return match_documents(tally_df, debit_note_df, tolerance=tolerance, with_source=with_source)[1]
+
+
+def gst_report(output_df_b2b, output_df_cdnr):
+    """Build the GST Reconciliation Report from its invoice and debit note rows."""
+    # Combine both DataFrames into one for GSTR-2B + CDNR (Debit Note)
+    combined_df = pd.concat([output_df_b2b, output_df_cdnr], ignore_index=True)
+
+    # Highlight mismatch rows in red and Debit Note rows in yellow
+    is_debit_note = np.arange(len(combined_df)) >= len(output_df_b2b)  # These rows come from B2B-CDNR (Debit Note)
+    return Report(combined_df, GST_REPORT_FILE, sheet_name="GSTR-2B", highlights=[
+        (combined_df["Status"] == "Mismatch", None, mismatch_fill),
+        (is_debit_note, None, debit_note_fill),
+    ])
+
+
+def reconcile_gst(tally_file, gstr_file, fuzzy=False, tolerance=TOLERANCE, paise=False, shards=1, workers=None,
+                  aggregate=False):
+    """Reconcile a Tally Purchase Register against GSTR-2B invoices and debit notes, including amendments.
+
+    Amounts differing by more than ``tolerance`` rupees are a "Mismatch".
+    With ``paise`` amounts are read as int64 paise and compared exactly.
+    With more than one of ``shards`` the documents are matched per GSTIN
+    shard on up to ``workers`` processes, see ``match_documents_sharded``.
+    With ``aggregate`` invoice lines are summed and split invoices matched.
+    """
+    tally_df, gstr_df, debit_note_df = read_gst_inputs(tally_file, gstr_file, paise)
+    documents_df = pd.concat([gstr_df, debit_note_df], ignore_index=True)
+    if shards > 1:
+        return gst_report(*match_documents_sharded(tally_df, documents_df, shards, fuzzy, tolerance, paise, workers,
+                                                   aggregate))
+    return gst_report(*match_documents(tally_df, documents_df, fuzzy, tolerance, paise, aggregate=aggregate))
+
+
+def reconcile_debit_notes(debit_file, gstr_file, fuzzy=False, tolerance=TOLERANCE, paise=False):
+    """Reconcile a Debit Note Register against GSTR-2B B2B-CDNR notes.
+
+    With ``fuzzy`` unmatched notes whose numbers differ only in formatting,
+    and whose amounts agree within ``tolerance``, are paired as "Probable
+    Match" rows with a ``Match_Score``. Amounts
+    differing by more than ``tolerance`` rupees are a "Mismatch"; with
+    ``paise`` they are read as int64 paise and compared exactly.
+    """
+    # Read Debit Note Register, dropping the closing total row
+    debit_df = read_debit_register(debit_file, paise).iloc[:-1]
+
+    # Read GSTR-CDNR data with correct header row
+    gstr_cdnr_df = read_gstr_cdnr(gstr_file, paise=paise)
+
+    with stage("normalize", len(debit_df) + len(gstr_cdnr_df)):
+        # Filter records where Note_Type contains 'Credit Note' (case insensitive)
+        credit_note_df = gstr_cdnr_df[gstr_cdnr_df["Note_Type"].str.contains("Credit Note", case=False, na=False)]
+
+        # Remove entries where Gross_Total and Purchase_Accounts are exactly 1.00
+        one = PAISE_PER_RUPEE if paise else 1.00
+        debit_df = debit_df[~((debit_df['Gross_Total'] == one) & (debit_df['Purchase_Accounts'] == one))]
+
+        # Calculate Total_Expense in Debit Note Register
+        debit_df["Total_Expense"] = debit_df[['Purchase_Accounts', 'Fixed_Assets']].sum(axis=1)
+
+    # Perform a full outer merge based on GSTIN + Invoice No.
+    with stage("merge", len(debit_df) + len(gstr_cdnr_df)):
+        reconciliation_df = pd.merge(
+            debit_df, gstr_cdnr_df,
+            left_on=['Supplier_Invoice_No', 'GSTIN'],
+            right_on=['Invoice_Number', 'GSTIN_of_Supplier'],
+            how='outer',
+            suffixes=('_DEBIT', '_GSTR'),
+            indicator=True
+        )
+
+    with stage("classify", len(reconciliation_df)):
+        # Fill NaN values with 0 for numeric columns
+        comparison_cols = ["Gross_Total", "Invoice_Value", "Total_Expense", "Taxable_Value",
+                           "IGST", "Integrated_Tax", "CGST", "Central_Tax", "SGST", "State_UT_Tax"]
+        reconciliation_df[comparison_cols] = reconciliation_df[comparison_cols].fillna(0)
+
+        # Identify Reconciliation Status with ₹2 tolerance
+        reconciliation_df["Status"] = classify_status(reconciliation_df, tolerance=tolerance, paise=paise)
+
+    # Pair notes whose numbers differ only in formatting
+    if fuzzy:
+        with stage("fuzzy", len(reconciliation_df)):
+            reconciliation_df = match_residue(
+                reconciliation_df, ("GSTIN", "Supplier_Invoice_No"), ("GSTIN_of_Supplier", "Invoice_Number"),
+                list(gstr_cdnr_df.columns), tolerance=tolerance, paise=paise,
+            )
+
+    # Drop the merge indicator column
+    reconciliation_df.drop(columns=["_merge"], inplace=True)
+
+    # Select only required columns
+    output_df = reconciliation_df[[ 
+        "GSTIN", "Supplier_Invoice_No",  "Gross_Total",
+         "Total_Expense", "IGST",
+        "CGST",  "SGST", "Invoice_Number", "Invoice_Value","Taxable_Value", 
+        "Integrated_Tax","Central_Tax","State_UT_Tax", "Status"
+    ] + (["Match_Score"] if fuzzy else [])]
+    if paise:
+        output_df = to_rupees(output_df, AMOUNT_COLUMNS)
+
+    # Columns to check for mismatch highlighting
+    columns_to_check = {
+        "Invoice_Value": "Gross_Total",
+        "Taxable_Value": "Total_Expense",
+        "Integrated_Tax": "IGST",
+        "Central_Tax": "CGST",
+        "State_UT_Tax": "SGST"
+    }
+
+    # Highlight mismatches
+    return Report(output_df, DEBIT_NOTE_REPORT_FILE, highlights=[
+        (output_df["Status"] == "Mismatch", [*columns_to_check.keys(), *columns_to_check.values()], red_fill),
+    ])
+
+
+def aggregate_by_gstin(df, gstin_col, name_col, amount_cols, master=None, kind="name"):
+    """Sum ``amount_cols`` per GSTIN and join the distinct names of each GSTIN.
+
+    Same as ``groupby(gstin_col).agg`` with a ``', '.join`` of the unique
+    names and ``"sum"`` of each amount, done in one pass: the amounts are
+    summed by one groupby over integer GSTIN codes, and names are joined
+    from the distinct (GSTIN, name) pairs in order of first appearance, so
+    the result is the same on every run. Blank names are skipped.
+
+    With a ``SupplierMaster`` the amounts are summed per supplier ID
+    instead, and each GSTIN takes the master's canonical name, or its
+    trade name when ``kind`` is "trade_name"; blank when it has none.
+    """
+    if master is not None:
+        positions = master.positions(df[gstin_col])
+        present = positions >= 0
+        sums = df[amount_cols][present].groupby(positions[present]).sum()
+        names = pd.Series(master.names if kind == "name" else master.trade_names, dtype=object).fillna("")
+        agg = pd.DataFrame({gstin_col: master.gstins[sums.index], name_col: names.to_numpy()[sums.index]})
+        for col in amount_cols:
+            agg[col] = sums[col].to_numpy()
+        return agg
+
+    codes, gstins = pd.factorize(df[gstin_col], sort=True)
+    present = codes >= 0  # Rows without a GSTIN are left out, as groupby does
+    codes = codes[present]
+    sums = df[amount_cols][present].groupby(codes).sum()
+
+    # Join the names of each GSTIN from its distinct (GSTIN, name) pairs
+    pairs = pd.DataFrame({"code": codes, "name": df[name_col].to_numpy()[present]})
+    pairs = pairs.dropna().drop_duplicates()
+    pairs = pairs.iloc[np.argsort(pairs["code"].to_numpy(), kind="stable")]
+    names = np.full(len(gstins), "", dtype=object)
+    if len(pairs):
+        pair_codes, pair_names = pairs["code"].to_numpy(), pairs["name"].astype(str).tolist()
+        bounds = np.r_[0, np.flatnonzero(np.diff(pair_codes)) + 1, len(pair_codes)]
+        names[pair_codes[bounds[:-1]]] = [", ".join(pair_names[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    agg = pd.DataFrame({gstin_col: gstins, name_col: names})
+    for col in amount_cols:
+        agg[col] = sums[col].to_numpy()
+    return agg
+
+
+def reconcile_combined(tally_file, gstr_file, debit_file, tolerance=TOLERANCE, paise=False, suppliers_db=None,
+                       client=""):
+    """Summarise purchases and debit notes against GSTR-2B per supplier GSTIN.
+
+    Tax totals differing by more than ``tolerance`` rupees are a
+    "Mismatch". With ``paise`` every amount is read as int64 paise, so
+    the totals, differences and tolerance checks are exact; the B2B-CDNR
+    amounts are then summed as numbers too.
+
+    With ``suppliers_db`` the suppliers of the upload are added to the
+    supplier master of ``client`` in that database, see ``suppliers.py``.
+    Names then come from the master instead of being joined per run, and
+    rows are sorted by supplier, with each supplier's debit notes right
+    after its purchases.
+    """
+    # Read Tally Purchase Register
+    tally_df = read_tally(tally_file, paise)
+
+    # Read GSTR-2B data
+    gstr_df = read_gstr_b2b(gstr_file, paise=paise)
+
+    # Read Debit Note Register
+    debit_df = read_debit_register(debit_file, paise)
+
+    # Read GSTR-CDNR data with correct header row (amounts are aggregated as read)
+    gstr_cdnr_df = read_gstr_cdnr(gstr_file, numeric=paise, paise=paise)
+
+    master = None
+    if suppliers_db:
+        with stage("suppliers", len(tally_df) + len(gstr_df) + len(debit_df) + len(gstr_cdnr_df)):
+            update_master([
+                (tally_df, "GSTIN", "Particulars", "name"),
+                (debit_df, "GSTIN", "Particulars", "name"),
+                (gstr_df, "GSTIN", "Trade_Name", "trade_name"),
+                (gstr_cdnr_df, "GSTIN_of_Supplier", "Trade_Legal_Name", "trade_name"),
+            ], client, suppliers_db)
+            master = load_master(client, suppliers_db)
+
+    with stage("aggregate", len(tally_df) + len(gstr_df) + len(debit_df) + len(gstr_cdnr_df)):
+        # Aggregate Data by GSTIN & Trade Name
+        tally_agg = aggregate_by_gstin(tally_df, "GSTIN", "Particulars", ["Gross_Total", "IGST", "CGST", "SGST"], master)
+
+        # Aggregate GSTR data by GSTIN while concatenating multiple Trade Names
+        gstr_agg = aggregate_by_gstin(gstr_df, "GSTIN", "Trade_Name",
+                                      ["Invoice_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"], master, "trade_name")
+
+        # Aggregate Debit Note data by GSTIN while concatenating multiple Particulars
+        debit_agg = aggregate_by_gstin(debit_df, "GSTIN", "Particulars", ["Gross_Total", "IGST", "CGST", "SGST"], master)
+
+        # Aggregate GSTR-CDNR data by GSTIN while concatenating multiple Trade Names
+        gstr_cdnr_agg = aggregate_by_gstin(gstr_cdnr_df, "GSTIN_of_Supplier", "Trade_Legal_Name",
+                                           ["Invoice_Value", "Integrated_Tax", "Central_Tax", "State_UT_Tax"], master,
+                                           "trade_name")
+
+    with stage("merge", len(tally_agg) + len(gstr_agg)):
+        # Perform reconciliation based on GSTIN
+        reconciliation_df = pd.merge(
+            tally_agg, gstr_agg,
+            left_on=["GSTIN"],
+            right_on=["GSTIN"],
+            how="outer",
+            suffixes=("_Tally", "_GSTR"),
+            indicator=True
+        )
+
+    with stage("classify", len(reconciliation_df)):
+        # List of columns to fill NaN with 0 (excluding "Particulars" and "Trade Name")
+        columns_to_fill = ["IGST", "CGST", "SGST", "Integrated_Tax", "Central_Tax", "State_UT_Tax"]
+
+        # Fill NaN only for selected numeric columns
+        reconciliation_df[columns_to_fill] = reconciliation_df[columns_to_fill].fillna(0)
+        if paise:
+            reconciliation_df[columns_to_fill] = reconciliation_df[columns_to_fill].astype(np.int64)
+
+        # Calculate Differences
+        reconciliation_df["Diff_IGST"] = reconciliation_df["IGST"] - reconciliation_df["Integrated_Tax"]
+        reconciliation_df["Diff_CGST"] = reconciliation_df["CGST"] - reconciliation_df["Central_Tax"]
+        reconciliation_df["Diff_SGST"] = reconciliation_df["SGST"] - reconciliation_df["State_UT_Tax"]
+
+        # Determine Status
+        reconciliation_df["Remarks"] = classify_status(reconciliation_df, TAX_PAIRS, tolerance, paise=paise)
+
+    # Drop unnecessary columns
+    reconciliation_df.drop(columns=["_merge"], inplace=True)
+
+    # Reorder columns to match output format
+    final_dfg = reconciliation_df[
+        [
+            "GSTIN",
+            "Particulars",
+            "IGST",
+            "CGST",
+            "SGST",
+            "Trade_Name",
+            "Integrated_Tax",
+            "Central_Tax",
+            "State_UT_Tax",
+            "Diff_IGST",
+            "Diff_CGST",
+            "Diff_SGST",
+            "Remarks",
+        ]
+    ]
+    # Sort entries alphabetically by Particulars (Tally) and Trade Name (GSTR)
+    # Convert Particulars to string and sort alphabetically
+    final_dfg["Particulars"] = final_dfg["Particulars"].astype(str)
+    if master is None:
+        final_dfg = final_dfg.sort_values(by=["Particulars"], ascending=True)
+
+    with stage("merge", len(debit_agg) + len(gstr_cdnr_agg)):
+        # Perform reconciliation for Debit Note Register
+        reconciliation_df_debit = pd.merge(
+            debit_agg,
+            gstr_cdnr_agg,
+            left_on="GSTIN",
+            right_on="GSTIN_of_Supplier",
+            how="outer",
+            suffixes=("_DEBIT", "_GSTR"),
+            indicator=True,
+        )
+
+    with stage("classify", len(reconciliation_df_debit)):
+        # Convert relevant columns to numeric before calculating differences
+        reconciliation_df_debit["IGST"] = pd.to_numeric(
+            reconciliation_df_debit["IGST"], errors="coerce"
+        ).fillna(0)
+        reconciliation_df_debit["Integrated_Tax"] = pd.to_numeric(
+            reconciliation_df_debit["Integrated_Tax"], errors="coerce"
+        ).fillna(0)
+        reconciliation_df_debit["CGST"] = pd.to_numeric(
+            reconciliation_df_debit["CGST"], errors="coerce"
+        ).fillna(0)
+        reconciliation_df_debit["Central_Tax"] = pd.to_numeric(
+            reconciliation_df_debit["Central_Tax"], errors="coerce"
+        ).fillna(0)
+        reconciliation_df_debit["SGST"] = pd.to_numeric(
+            reconciliation_df_debit["SGST"], errors="coerce"
+        ).fillna(0)
+        reconciliation_df_debit["State_UT_Tax"] = pd.to_numeric(
+            reconciliation_df_debit["State_UT_Tax"], errors="coerce"
+        ).fillna(0)
+        if paise:
+            tax_cols = [col for pair in TAX_PAIRS for col in pair]
+            reconciliation_df_debit[tax_cols] = reconciliation_df_debit[tax_cols].astype(np.int64)
+
+        # Calculate differences
+        reconciliation_df_debit["Diff_IGST"] = (
+            reconciliation_df_debit["IGST"] - reconciliation_df_debit["Integrated_Tax"]
+        )
+        reconciliation_df_debit["Diff_CGST"] = (
+            reconciliation_df_debit["CGST"] - reconciliation_df_debit["Central_Tax"]
+        )
+        reconciliation_df_debit["Diff_SGST"] = (
+            reconciliation_df_debit["SGST"] - reconciliation_df_debit["State_UT_Tax"]
+        )
+
+        reconciliation_df_debit["Status"] = classify_status(reconciliation_df_debit, TAX_PAIRS, tolerance, paise=paise)
+    reconciliation_df_debit.drop(columns=["_merge"], inplace=True)
+
+    # Reorder columns
+    final_dfd = reconciliation_df_debit[
+        [
+            "GSTIN",
+            "Particulars",
+            "IGST",
+            "CGST",
+            "SGST",
+            "Trade_Legal_Name",
+            "Integrated_Tax",
+            "Central_Tax",
+            "State_UT_Tax",
+            "Diff_IGST",
+            "Diff_CGST",
+            "Diff_SGST",
+            "Status",
+        ]
+    ]
+
+    # Convert numeric columns to float and negate debit values
+    numeric_cols = [
+        "IGST",
+        "CGST",
+        "SGST",
+        "Integrated_Tax",
+        "Central_Tax",
+        "State_UT_Tax",
+        "Diff_IGST",
+        "Diff_CGST",
+        "Diff_SGST",
+    ]
+    for col in numeric_cols:
+        final_dfg[col] = pd.to_numeric(final_dfg[col], errors="coerce").fillna(0)
+        final_dfd[col] = -pd.to_numeric(final_dfd[col], errors="coerce").fillna(0)
+    if paise:
+        to_rupees(final_dfg, numeric_cols)
+        to_rupees(final_dfd, numeric_cols)
+
+    # Ensure column names match
+    column_mapping = {
+        "GSTIN_of_Supplier": "GSTIN",
+        "Trade_Legal_Name": "Trade_Name",
+        "Invoice_Value": "Integrated_Tax",
+        "Gross_Total": "IGST",
+    }
+    final_dfd.rename(columns=column_mapping, inplace=True)
+
+    # Add remarks for debit notes
+    final_dfd["Remarks"] = "Debit Note"
+
+    # Combine both dataframes
+    combined_df = pd.concat([final_dfg, final_dfd], ignore_index=True)
+
+    # Sort so that debit notes appear immediately after their respective purchase entries
+    if master is None:
+        combined_df = combined_df.sort_values(by=["Particulars"], ascending=[True])
+    else:
+        # By supplier, taking the GSTIN of debit notes found only in GSTR-2B from B2B-CDNR
+        debit_gstin = reconciliation_df_debit["GSTIN"].astype(object).fillna(
+            reconciliation_df_debit["GSTIN_of_Supplier"].astype(object))
+        rank = np.r_[master.rank_of(final_dfg["GSTIN"]), master.rank_of(debit_gstin)]
+        combined_df = combined_df.iloc[np.argsort(rank, kind="stable")]
+
+    # Highlight debit notes
+    return Report(combined_df, COMBINED_REPORT_FILE, status_col="Remarks", highlights=[
+        (combined_df["Remarks"] == "Debit Note", numeric_cols, yellow_fill),
+    ])
+
+
+def generate_gst_report(tally_file, gstr_file, output_file=None, fuzzy=False, tolerance=TOLERANCE, paise=False, shards=1,
+                        workers=None, aggregate=False):
+    """Generate the GST Reconciliation Report, as bytes unless ``output_file`` is given."""
+    return write_report(reconcile_gst(tally_file, gstr_file, fuzzy, tolerance, paise, shards, workers, aggregate),
+                        output_file)
+
+
+def generate_debit_note_report(debit_file, gstr_file, output_file=None, fuzzy=False, tolerance=TOLERANCE, paise=False):
+    """Generate the Debit Note Reconciliation Report, as bytes unless ``output_file`` is given."""
+    return write_report(reconcile_debit_notes(debit_file, gstr_file, fuzzy, tolerance, paise), output_file)
+
+
+def generate_combined_report(tally_file, gstr_file, debit_file, output_file=None, tolerance=TOLERANCE, paise=False,
+                             suppliers_db=None, client=""):
+    """Generate the Combined GST Reconciliation summary, as bytes unless ``output_file`` is given."""
+    return write_report(reconcile_combined(tally_file, gstr_file, debit_file, tolerance, paise, suppliers_db, client),
+                        output_file)
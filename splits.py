@@ -0,0 +1,132 @@
+"""Per-invoice aggregation and matching of invoices split across several documents.
+
+Tally books one invoice over several ledger lines, such as one line under
+Purchase_Accounts and one under Direct_Expenses, all with the same invoice
+number. An outer merge on (invoice number, GSTIN) pairs every line with
+every GSTR-2B row of the invoice, so the rows multiply and each compares a
+single line against the whole invoice, a false "Mismatch". Aggregating
+both sides first leaves one row per key, whose amounts are the sums of its
+lines, and the merge then matches sums against sums.
+
+Some invoices are split across invoice numbers instead: one GSTR-2B
+invoice booked in Tally as two or three bills, or the reverse. After the
+merge, the unmatched rows of each GSTIN are searched for a few rows of one
+side whose amounts add up to a single row of the other. The search is
+bounded by ``MAX_CANDIDATES`` rows per side of a GSTIN and ``MAX_PARTS``
+rows per split. Every row of a split is kept, with the "Split Match"
+status and a ``Match_Group`` number shared by the rows of that split,
+numbered in the order of the split's first row.
+"""
+from functools import lru_cache
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from status import AMOUNT_PAIRS, MISSING_IN_GSTR, MISSING_IN_TALLY, PAISE_PER_RUPEE, SPLIT_MATCH, TOLERANCE
+
+# Most rows one invoice is split into
+MAX_PARTS = 4
+
+# Most unmatched rows per side of a GSTIN searched for splits, in row order
+MAX_CANDIDATES = 12
+
+
+def aggregate_lines(df, keys, amount_cols):
+    """Return ``df`` with the rows sharing ``keys`` summed into one row per key.
+
+    Amounts in ``amount_cols`` are summed; every other column keeps the
+    value of the key's first row, and rows stay in the order of their
+    first row. Rows missing any key are left as they are.
+    """
+    has_key = df[keys].notna().all(axis=1).to_numpy()
+    group = df.groupby(keys, sort=False, observed=True, dropna=False).ngroup().to_numpy(dtype=np.int64)
+    # Rows without a key each get a group of their own
+    group = np.where(has_key, group, group.max(initial=-1) + 1 + np.arange(len(df)))
+    if not pd.Index(group).has_duplicates:
+        return df
+
+    grouped = df.groupby(group, sort=False)
+    first = grouped.head(1)
+    sums = grouped[amount_cols].sum()
+    return first.assign(**{col: sums[col].to_numpy() for col in amount_cols})
+
+
+@lru_cache(maxsize=None)
+def subsets(n, k):
+    """Return every subset of ``k`` of ``n`` positions as rows of an array, in lexicographic order."""
+    return np.array(list(combinations(range(n), k)), dtype=np.intp).reshape(-1, k)
+
+
+def find_split(target, parts, limit, max_parts=MAX_PARTS):
+    """Return the positions of the fewest ``parts`` adding up to ``target``, or None.
+
+    ``target`` holds the amounts of one row and ``parts`` those of the
+    candidate rows, one row each. A subset matches when every amount of
+    its sum is within ``limit`` of the target's.
+    """
+    for k in range(2, min(max_parts, len(parts)) + 1):
+        candidates = subsets(len(parts), k)
+        matched = (np.abs(parts[candidates].sum(axis=1) - target) <= limit).all(axis=1)
+        if matched.any():
+            return candidates[matched.argmax()]
+    return None
+
+
+def match_splits(df, tolerance=TOLERANCE, paise=False, gstin_col="GSTIN", pairs=AMOUNT_PAIRS,
+                 max_parts=MAX_PARTS, max_candidates=MAX_CANDIDATES):
+    """Match unmatched Tally and GSTR rows of a classified outer merge that are one invoice split in parts.
+
+    ``pairs`` are the amount columns of the Tally and GSTR sides. A GSTR
+    row is matched first to Tally rows of the same GSTIN whose amounts add
+    up to its own within ``tolerance`` rupees, then a Tally row to GSTR
+    rows. The rows of each split get the "Split Match" status and the same
+    ``Match_Group``. With ``paise`` amounts are int64 paise compared
+    exactly.
+    """
+    df = df.reset_index(drop=True)
+    df["Match_Group"] = np.nan
+    limit = round(tolerance * PAISE_PER_RUPEE) if paise else tolerance
+    gstin = df[gstin_col].astype(object)
+    status = df["Status"].to_numpy()
+    left_rows = np.flatnonzero((status == MISSING_IN_GSTR) & gstin.notna().to_numpy())
+    right_rows = np.flatnonzero((status == MISSING_IN_TALLY) & gstin.notna().to_numpy())
+    if not len(left_rows) or not len(right_rows):
+        return df
+
+    def amounts(cols):
+        return np.nan_to_num(df[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float))
+
+    left_amounts, right_amounts = amounts([left for left, _ in pairs]), amounts([right for _, right in pairs])
+    left_groups = pd.Series(left_rows).groupby(gstin.to_numpy()[left_rows], sort=False).indices
+    right_groups = pd.Series(right_rows).groupby(gstin.to_numpy()[right_rows], sort=False).indices
+
+    groups = []
+    for key, left_positions in left_groups.items():
+        if key not in right_groups:
+            continue
+        left = list(left_rows[left_positions[:max_candidates]])
+        right = list(right_rows[right_groups[key][:max_candidates]])
+        # Several Tally rows making up one GSTR row, then the reverse
+        for targets, parts, target_amounts, part_amounts in ((right, left, right_amounts, left_amounts),
+                                                             (left, right, left_amounts, right_amounts)):
+            for target in list(targets):
+                found = find_split(target_amounts[target], part_amounts[parts], limit, max_parts)
+                if found is not None:
+                    split = [parts[i] for i in found]
+                    groups.append([target] + split)
+                    targets.remove(target)
+                    for row in split:
+                        parts.remove(row)
+
+    for number, rows in enumerate(groups, start=1):
+        df.loc[rows, "Status"] = SPLIT_MATCH
+        df.loc[rows, "Match_Group"] = number
+    df["Match_Group"] = number_groups(df["Match_Group"])
+    return df
+
+
+def number_groups(match_group):
+    """Number the split groups of report rows 1, 2, ... in the order of their first row."""
+    codes, _ = pd.factorize(match_group)
+    return pd.Series(np.where(codes >= 0, codes + 1.0, np.nan), index=match_group.index)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Reconciliation status labels
+MATCHED = "Matched"
+MISMATCH = "Mismatch"
+MISSING_IN_TALLY = "Missing in Tally"
+MISSING_IN_GSTR = "Missing in GSTR"
+PROBABLE_MATCH = "Probable Match"  # Set by the fuzzy second pass, see fuzzy.py
+SPLIT_MATCH = "Split Match"  # Set by split invoice matching, see splits.py
+
+# Define ₹2 tolerance threshold
+TOLERANCE = 2.00
+
+# Amounts in paise mode are int64 counts of paise
+PAISE_PER_RUPEE = 100
+
+# Tax columns in Tally / Debit Note Register and their GSTR-2B counterparts
+TAX_PAIRS = [
+    ("IGST", "Integrated_Tax"),
+    ("CGST", "Central_Tax"),
+    ("SGST", "State_UT_Tax"),
+]
+
+# All amount columns compared at invoice level
+AMOUNT_PAIRS = [
+    ("Gross_Total", "Invoice_Value"),
+    ("Total_Expense", "Taxable_Value"),
+] + TAX_PAIRS
+
+
+def to_paise(values):
+    """Return amounts in rupees as int64 paise, rounded to the nearest paisa, with blanks and text as 0."""
+    rupees = pd.to_numeric(values, errors="coerce").fillna(0).to_numpy(dtype=float)
+    return np.rint(rupees * PAISE_PER_RUPEE).astype(np.int64)
+
+
+def to_rupees(df, columns):
+    """Convert the paise ``columns`` of ``df`` back to rupees, in place, and return ``df``."""
+    for col in columns:
+        df[col] = df[col] / PAISE_PER_RUPEE
+    return df
+
+
+def paise_diff(left, right):
+    """Return ``left - right`` of two paise columns as int64, and where both sides are present."""
+    left, right = pd.to_numeric(left, errors="coerce"), pd.to_numeric(right, errors="coerce")
+    present = (left.notna() & right.notna()).to_numpy()
+    diff = left.fillna(0).to_numpy(dtype=np.int64) - right.fillna(0).to_numpy(dtype=np.int64)
+    return diff, present
+
+
+def classify_status(df, pairs=AMOUNT_PAIRS, tolerance=TOLERANCE, merge_col="_merge", paise=False):
+    """Return the reconciliation status of every row of an outer-merged frame.
+
+    Rows only in GSTR are "Missing in Tally", rows only in Tally are
+    "Missing in GSTR", and matched rows are "Mismatch" when any of the
+    column ``pairs`` differs by more than ``tolerance`` rupees, else
+    "Matched". The checks run on whole columns instead of row by row.
+    With ``paise`` the amounts are int64 paise and are compared exactly
+    in integer arithmetic.
+    """
+    merge = df[merge_col].astype(object).to_numpy()
+
+    # Flag rows where any pair of amounts differs beyond the tolerance
+    mismatch = np.zeros(len(df), dtype=bool)
+    for left, right in pairs:
+        if paise:
+            diff, present = paise_diff(df[left], df[right])
+            mismatch |= present & (np.abs(diff) > round(tolerance * PAISE_PER_RUPEE))
+        else:
+            diff = pd.to_numeric(df[left], errors="coerce") - pd.to_numeric(df[right], errors="coerce")
+            mismatch |= np.abs(diff.to_numpy(dtype=float)) > tolerance
+
+    status = np.select(
+        [merge == "right_only", merge == "left_only", mismatch],
+        [MISSING_IN_TALLY, MISSING_IN_GSTR, MISMATCH],
+        default=MATCHED,
+    )
+    return pd.Series(status, index=df.index, dtype=object)
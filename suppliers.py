@@ -0,0 +1,134 @@
+"""Persistent supplier master: one integer ID, canonical names and aliases per GSTIN of a client.
+
+Every upload reconciled with the master adds the suppliers and names it
+has not seen before. Each client has its own master, as the names come
+from the client's own books. A supplier keeps the ID it was first given, the
+first name it was booked under in Tally as its canonical name, the first
+GSTR-2B trade name as its trade name, and every other spelling as an
+alias. Reports load the master once into ``SupplierMaster`` lookup
+tables and resolve the names and sort position of whole GSTIN columns
+at once, instead of joining the names of every GSTIN on every
+run and sorting by the joined text.
+"""
+import os
+from contextlib import closing
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import database
+
+# Database file; kept outside the cache directory, which may be cleared at any time
+SUPPLIER_DB = os.environ.get(
+    "RECONCILIATION_SUPPLIER_DB", os.path.join(os.path.expanduser("~"), ".reconciliation", "suppliers.sqlite")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suppliers (
+    supplier_id INTEGER PRIMARY KEY,
+    client TEXT NOT NULL,
+    gstin TEXT NOT NULL,
+    name TEXT,
+    trade_name TEXT,
+    UNIQUE (client, gstin)
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    supplier_id INTEGER NOT NULL REFERENCES suppliers (supplier_id),
+    alias TEXT NOT NULL,
+    PRIMARY KEY (supplier_id, alias)
+);
+"""
+
+# Name columns of each input: Tally and debit note names are books names, GSTR-2B names are trade names
+NAME_KINDS = ("name", "trade_name")
+
+
+class SupplierMaster(NamedTuple):
+    """Lookup tables of a client's supplier master, one entry per supplier in ID order."""
+    gstins: pd.Index  # GSTIN of each supplier
+    ids: np.ndarray  # Supplier ID, int64
+    names: np.ndarray  # Canonical name, or NaN
+    trade_names: np.ndarray  # GSTR-2B trade name, or NaN
+    ranks: np.ndarray  # Position when sorted by name, int64
+
+    def positions(self, gstin):
+        """Return the position of the supplier of every GSTIN, or -1 where the master doesn't have it."""
+        return self.gstins.get_indexer(pd.Index(pd.Series(gstin).astype(object)))
+
+    def rank_of(self, gstin):
+        """Return the sort position of the supplier of every GSTIN; unknown GSTINs sort last."""
+        return np.append(self.ranks, len(self.ranks))[self.positions(gstin)]
+
+
+def connect(db_path=None):
+    """Open the supplier master, creating its tables on first use."""
+    return database.connect(db_path or SUPPLIER_DB, SCHEMA)
+
+
+def name_pairs(df, gstin_col, name_col):
+    """Return the distinct (GSTIN, name) pairs of an input in order of first appearance, blank names as None."""
+    pairs = pd.DataFrame({
+        "gstin": df[gstin_col].astype(object).to_numpy(),
+        "name": df[name_col].astype(object).to_numpy(),
+    })
+    pairs = pairs[pairs["gstin"].notna()].drop_duplicates()
+    pairs["name"] = pairs["name"].where(pairs["name"].notna() & (pairs["name"].astype(str).str.strip() != ""), None)
+    return pairs
+
+
+def update_master(sources, client, db_path=None):
+    """Add the suppliers and names of an upload to the master of ``client``.
+
+    ``sources`` is a sequence of ``(df, gstin_col, name_col, kind)``,
+    where ``kind`` is "name" for names from the books or "trade_name" for
+    GSTR-2B names. New GSTINs get the next supplier IDs in GSTIN order;
+    a supplier's first name of each kind becomes its canonical one, and
+    every name is kept as an alias. Only the distinct pairs of each input
+    are written, so a large upload adds only a few rows.
+    """
+    with closing(connect(db_path)) as conn, conn:
+        for df, gstin_col, name_col, kind in sources:
+            if kind not in NAME_KINDS:
+                raise ValueError(f"Unknown name kind {kind!r}")
+            pairs = name_pairs(df, gstin_col, name_col)
+            conn.executemany(
+                "INSERT OR IGNORE INTO suppliers (client, gstin) VALUES (?, ?)",
+                [(client, gstin) for gstin in sorted(pairs["gstin"].unique())],
+            )
+            named = pairs[pairs["name"].notna()]
+            first = named.drop_duplicates("gstin")
+            conn.executemany(
+                f"UPDATE suppliers SET {kind} = ? WHERE client = ? AND gstin = ? AND {kind} IS NULL",
+                [(name, client, gstin) for name, gstin in zip(first["name"], first["gstin"])],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO aliases SELECT supplier_id, ? FROM suppliers WHERE client = ? AND gstin = ?",
+                [(name, client, gstin) for name, gstin in zip(named["name"], named["gstin"])],
+            )
+
+
+def load_master(client, db_path=None):
+    """Load the supplier master of ``client`` into ``SupplierMaster`` lookup tables."""
+    with closing(connect(db_path)) as conn:
+        suppliers = pd.read_sql_query(
+            "SELECT supplier_id, gstin, name, trade_name FROM suppliers WHERE client = ? ORDER BY supplier_id", conn,
+            params=(client,),
+        )
+
+    names = suppliers["name"].to_numpy(dtype=object)
+    trade_names = suppliers["trade_name"].to_numpy(dtype=object)
+    # Sort by canonical name, falling back to the trade name, then by ID
+    display = pd.Series(names, dtype=object).fillna(pd.Series(trade_names, dtype=object)).fillna("").to_numpy()
+    order = np.lexsort((suppliers["supplier_id"].to_numpy(), display))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+
+    return SupplierMaster(
+        gstins=pd.Index(suppliers["gstin"].to_numpy(dtype=object)),
+        ids=suppliers["supplier_id"].to_numpy(dtype=np.int64),
+        names=names,
+        trade_names=trade_names,
+        ranks=ranks,
+    )
+
@@ -0,0 +1,242 @@
+"""Synthetic Tally, Debit Note Register and GSTR-2B workbooks for benchmarks.
+
+The workbooks follow the layouts the readers in inputs.py expect: nine
+title rows above the header of the Tally and Debit Note Registers, and a
+GSTR-2B workbook whose B2B (first) and B2B-CDNR sheets have four title
+rows above a two-row header. A share of the invoices is booked on only one
+side and a share of the matched ones differs in amount, so every status
+occurs. Optionally a share of the GSTR-2B documents is reported as
+amendments in B2BA and B2B-CDNRA sheets, with three header rows.
+
+    python synthetic.py inputs --rows 100000 --mismatch-rate 0.05
+"""
+import argparse
+import os
+
+import numpy as np
+from openpyxl import Workbook
+
+# File names of the generated inputs
+TALLY_FILE = "tally_purchase_register.xlsx"
+GSTR_FILE = "gstr_2b.xlsx"
+DEBIT_FILE = "debit_note_register.xlsx"
+
+# Header rows as exported by Tally and the GST portal
+TALLY_HEADER = [
+    "Date", "Particulars", "Voucher Type", "Voucher No.", "Supplier Invoice No.", "Supplier Invoice Date",
+    "GSTIN/UIN", "Gross Total", "Purchase Accounts", "Fixed Assets", "Direct Expenses", "Indirect Expenses",
+    "IGST", "CGST", "SGST",
+]
+DEBIT_HEADER = [
+    "Date", "Particulars", "Supplier Invoice No.", "Credit Note Date", "Voucher Type", "Voucher No.",
+    "Voucher Ref. No.", "Voucher Ref. Date", "GSTIN/UIN", "Gross Total", "Purchase Accounts", "Fixed Assets",
+    "IGST", "CGST", "SGST", "Round Off",
+]
+B2B_HEADER = [
+    ["GSTIN of supplier", "Trade/Legal name", "Invoice Details", None, None, None, "Place of supply",
+     "Supply Attract Reverse Charge", "Taxable Value (₹)", "Tax Amount", None, None, None,
+     "GSTR-1/IFF/GSTR-5 Period", "GSTR-1/IFF/GSTR-5 Filing Date", "ITC Availability", "Reason",
+     "Applicable % of Tax Rate", "Source", "IRN details", None],
+    [None, None, "Invoice number", "Invoice type", "Invoice Date", "Invoice Value(₹)", None, None, None,
+     "Integrated Tax(₹)", "Central Tax(₹)", "State/UT Tax(₹)", "Cess(₹)", None, None, None, None, None, None,
+     "IRN", "IRN Date"],
+]
+CDNR_HEADER = [
+    ["GSTIN of supplier", "Trade/Legal name", "Credit note/Debit note details", None, None, None, None,
+     "Place of supply", "Supply Attract Reverse Charge", "Taxable Value (₹)", "Tax Amount", None, None, None,
+     "GSTR-1/IFF/GSTR-5 Period", "GSTR-1/IFF/GSTR-5 Filing Date", "ITC Availability", "Reason",
+     "Applicable % of Tax Rate", "Source", "IRN details", None],
+    [None, None, "Note number", "Note type", "Note Supply type", "Note date", "Note Value (₹)", None, None,
+     None, "Integrated Tax(₹)", "Central Tax(₹)", "State/UT Tax(₹)", "Cess(₹)", None, None, None, None, None,
+     None, "IRN", "IRN Date"],
+]
+
+B2BA_HEADER = [
+    ["Original details", None, "Revised details"] + [None] * 17,
+    [None, None, "GSTIN of supplier", "Trade/Legal name", "Invoice Details", None, None, None, "Place of supply",
+     "Supply Attract Reverse Charge", "Taxable Value (₹)", "Tax Amount", None, None, None,
+     "GSTR-1/IFF/GSTR-5 Period", "GSTR-1/IFF/GSTR-5 Filing Date", "ITC Availability", "Reason",
+     "Applicable % of Tax Rate"],
+    ["Invoice number", "Invoice Date", None, None, "Invoice number", "Invoice type", "Invoice Date",
+     "Invoice Value(₹)", None, None, None, "Integrated Tax(₹)", "Central Tax(₹)", "State/UT Tax(₹)", "Cess(₹)",
+     None, None, None, None, None],
+]
+CDNRA_HEADER = [
+    ["Original details", None, None, "Revised details"] + [None] * 18,
+    [None, None, None, "GSTIN of supplier", "Trade/Legal name", "Credit note/Debit note details", None, None, None,
+     None, "Place of supply", "Supply Attract Reverse Charge", "Taxable Value (₹)", "Tax Amount", None, None, None,
+     "GSTR-1/IFF/GSTR-5 Period", "GSTR-1/IFF/GSTR-5 Filing Date", "ITC Availability", "Reason",
+     "Applicable % of Tax Rate"],
+    ["Note type", "Note number", "Note date", None, None, "Note number", "Note type", "Note Supply type",
+     "Note date", "Note Value (₹)", None, None, None, "Integrated Tax(₹)", "Central Tax(₹)", "State/UT Tax(₹)",
+     "Cess(₹)", None, None, None, None, None],
+]
+
+
+def gstins(supplier_ids):
+    """Return a well-formed GSTIN for each supplier number."""
+    return [f"27AAAC{i:05d}{chr(65 + i % 26)}1Z{i % 10}" for i in supplier_ids]
+
+
+def tax_split(taxable, interstate):
+    """Return IGST, CGST and SGST at 18% for inter- and intra-state supplies."""
+    igst = np.where(interstate, np.round(taxable * 0.18, 2), 0.0)
+    half = np.where(interstate, 0.0, np.round(taxable * 0.09, 2))
+    return igst, half, half.copy()
+
+
+def sides(rng, n, mismatch_rate, missing_rate):
+    """Return which of ``n`` documents are in the books, in GSTR-2B and mismatched."""
+    u = rng.random(n)
+    in_books = u >= missing_rate
+    in_gstr = (u < missing_rate) | (u >= 2 * missing_rate)
+    mismatched = in_books & in_gstr & (rng.random(n) < mismatch_rate)
+    return in_books, in_gstr, mismatched
+
+
+def title_rows(ws, titles, count):
+    """Append ``count`` title rows, the first ones holding ``titles``."""
+    for i in range(count):
+        ws.append([titles[i]] if i < len(titles) else [])
+
+
+def generate_inputs(output_dir, rows, mismatch_rate=0.05, missing_rate=0.05, note_rows=None, seed=0,
+                    amendment_rate=0.0):
+    """Write a Tally register, Debit Note Register and GSTR-2B workbook to ``output_dir``.
+
+    ``rows`` purchase invoices and ``note_rows`` notes (a tenth of ``rows``
+    by default) are generated. ``missing_rate`` of the documents are only
+    in the books and as many only in GSTR-2B; ``mismatch_rate`` of the
+    documents on both sides differ in amount. ``amendment_rate`` of the
+    GSTR-2B documents are reported as amendments of an earlier document
+    instead. Returns the paths keyed like a batch manifest (``tally``,
+    ``gstr``, ``debit``).
+    """
+    rng = np.random.default_rng(seed)
+    amendment_rng = np.random.default_rng([seed, 1])  # Kept apart, so other draws don't depend on it
+    note_rows = max(1, rows // 10) if note_rows is None else note_rows
+    suppliers = max(3, rows // 20)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Purchase invoices
+    supplier = rng.integers(0, suppliers, rows)
+    gstin = gstins(supplier)
+    invoice_no = [f"INV/{i:07d}" for i in range(rows)]
+    taxable = np.round(rng.uniform(100, 100_000, rows), 2)
+    igst, cgst, sgst = tax_split(taxable, supplier % 2 == 0)
+    gross = np.round(taxable + igst + cgst + sgst, 2)
+    in_books, in_gstr, mismatched = sides(rng, rows, mismatch_rate, missing_rate)
+    gstr_gross = np.where(mismatched, gross + rng.choice([5.0, 100.0, 1000.0], rows), gross)
+
+    tally = Workbook(write_only=True)
+    ws = tally.create_sheet("Purchase Register")
+    title_rows(ws, ["Synthetic Traders Pvt Ltd", None, "Purchase Register", "1-Apr-24 to 31-Mar-25"], 9)
+    ws.append(TALLY_HEADER)
+    for i in np.flatnonzero(in_books).tolist():
+        ws.append([
+            "2024-04-01", f"Supplier {supplier[i]} Pvt Ltd", "Purchase", str(i + 1), invoice_no[i], "2024-04-01",
+            gstin[i], gross[i], taxable[i], 0.0, 0.0, 0.0, igst[i], cgst[i], sgst[i],
+        ])
+    ws.append([None, "Grand Total", None, None, None, None, None, round(float(gross[in_books].sum()), 2)])
+
+    gstr = Workbook(write_only=True)
+    b2b = gstr.create_sheet("B2B")
+    title_rows(b2b, ["Goods and Services Tax - GSTR-2B", "Taxpayer's B2B invoices"], 4)
+    for header in B2B_HEADER:
+        b2b.append(header)
+    amended = in_gstr & (amendment_rng.random(rows) < amendment_rate)
+    for i in np.flatnonzero(in_gstr & ~amended).tolist():
+        b2b.append([
+            gstin[i], f"SUPPLIER {supplier[i]} PRIVATE LIMITED", invoice_no[i], "Regular", "01/04/2024",
+            gstr_gross[i], "Maharashtra", "No", taxable[i], igst[i], cgst[i], sgst[i], 0.0, "Apr'24",
+            "11/05/2024", "Yes", None, None, "GSTR-1", None, None,
+        ])
+    if amendment_rate:
+        b2ba = gstr.create_sheet("B2BA")
+        title_rows(b2ba, ["Goods and Services Tax - GSTR-2B", "Taxpayer's amended B2B invoices"], 4)
+        for header in B2BA_HEADER:
+            b2ba.append(header)
+        for i in np.flatnonzero(amended).tolist():
+            b2ba.append([
+                f"{invoice_no[i]}-O", "15/03/2024", gstin[i], f"SUPPLIER {supplier[i]} PRIVATE LIMITED",
+                invoice_no[i], "Regular", "01/04/2024", gstr_gross[i], "Maharashtra", "No", taxable[i], igst[i],
+                cgst[i], sgst[i], 0.0, "Apr'24", "11/05/2024", "Yes", None, None,
+            ])
+
+    # Credit and debit notes; the Debit Note Register records both kinds against GSTR-2B B2B-CDNR
+    supplier = rng.integers(0, suppliers, note_rows)
+    gstin = gstins(supplier)
+    note_no = [f"DN/{i:06d}" for i in range(note_rows)]
+    note_type = rng.choice(["Credit Note", "Debit Note"], note_rows)
+    taxable = np.round(rng.uniform(10, 10_000, note_rows), 2)
+    igst, cgst, sgst = tax_split(taxable, supplier % 2 == 0)
+    gross = np.round(taxable + igst + cgst + sgst, 2)
+    in_books, in_gstr, mismatched = sides(rng, note_rows, mismatch_rate, missing_rate)
+    gstr_igst = np.where(mismatched & (igst > 0), igst + 10.0, igst)
+    gstr_cgst = np.where(mismatched & (igst == 0), cgst + 10.0, cgst)
+
+    cdnr = gstr.create_sheet("B2B-CDNR")
+    title_rows(cdnr, ["Goods and Services Tax - GSTR-2B", "Taxpayer's B2B credit/debit notes"], 4)
+    for header in CDNR_HEADER:
+        cdnr.append(header)
+    amended = in_gstr & (amendment_rng.random(note_rows) < amendment_rate)
+    for i in np.flatnonzero(in_gstr & ~amended).tolist():
+        cdnr.append([
+            gstin[i], f"SUPPLIER {supplier[i]} PRIVATE LIMITED", note_no[i], note_type[i], "Regular",
+            "01/04/2024", gross[i], "Maharashtra", "No", taxable[i], gstr_igst[i], gstr_cgst[i], sgst[i], 0.0,
+            "Apr'24", "11/05/2024", "Yes", None, None, "GSTR-1", None, None,
+        ])
+    if amendment_rate:
+        cdnra = gstr.create_sheet("B2B-CDNRA")
+        title_rows(cdnra, ["Goods and Services Tax - GSTR-2B", "Taxpayer's amended B2B credit/debit notes"], 4)
+        for header in CDNRA_HEADER:
+            cdnra.append(header)
+        for i in np.flatnonzero(amended).tolist():
+            cdnra.append([
+                note_type[i], f"{note_no[i]}-O", "15/03/2024", gstin[i], f"SUPPLIER {supplier[i]} PRIVATE LIMITED",
+                note_no[i], note_type[i], "Regular", "01/04/2024", gross[i], "Maharashtra", "No", taxable[i],
+                gstr_igst[i], gstr_cgst[i], sgst[i], 0.0, "Apr'24", "11/05/2024", "Yes", None, None,
+            ])
+
+    debit = Workbook(write_only=True)
+    ws = debit.create_sheet("Debit Note Register")
+    title_rows(ws, ["Synthetic Traders Pvt Ltd", None, "Debit Note Register", "1-Apr-24 to 31-Mar-25"], 9)
+    ws.append(DEBIT_HEADER)
+    for i in np.flatnonzero(in_books).tolist():
+        ws.append([
+            "2024-04-03", f"Supplier {supplier[i]} Pvt Ltd", note_no[i], "2024-04-03", "Debit Note", str(i + 1),
+            None, None, gstin[i], gross[i], taxable[i], 0.0, igst[i], cgst[i], sgst[i], 0.0,
+        ])
+    ws.append([None, "Grand Total", None, None, None, None, None, None, None, round(float(gross[in_books].sum()), 2)])
+
+    paths = {
+        "tally": os.path.join(output_dir, TALLY_FILE),
+        "gstr": os.path.join(output_dir, GSTR_FILE),
+        "debit": os.path.join(output_dir, DEBIT_FILE),
+    }
+    tally.save(paths["tally"])
+    gstr.save(paths["gstr"])
+    debit.save(paths["debit"])
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic reconciliation inputs.")
+    parser.add_argument("output_dir", help="directory to write the three workbooks into")
+    parser.add_argument("--rows", type=int, default=10_000, help="number of purchase invoices")
+    parser.add_argument("--note-rows", type=int, default=None, help="number of credit/debit notes (default: rows / 10)")
+    parser.add_argument("--mismatch-rate", type=float, default=0.05, help="share of matched documents whose amounts differ")
+    parser.add_argument("--missing-rate", type=float, default=0.05, help="share of documents missing on each side")
+    parser.add_argument("--amendment-rate", type=float, default=0.0,
+                        help="share of GSTR-2B documents reported in the B2BA / B2B-CDNRA amendment sheets")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args(argv)
+
+    paths = generate_inputs(args.output_dir, args.rows, args.mismatch_rate, args.missing_rate, args.note_rows, args.seed,
+                            args.amendment_rate)
+    for path in paths.values():
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from fuzzy import match_residue
+from status import AMOUNT_PAIRS, MISSING_IN_GSTR, MISSING_IN_TALLY, PROBABLE_MATCH, to_paise
+
+TALLY_COLUMNS = [left for left, _ in AMOUNT_PAIRS]
+GSTR_COLUMNS = [right for _, right in AMOUNT_PAIRS]
+
+
+def residue_rows(tally, gstr):
+    """Return classified merge rows for unmatched Tally and GSTR invoices of (number, gross amount)."""
+    rows = []
+    for invoice_no, amount in tally:
+        rows.append({"GSTIN": "G1", "Supplier_Invoice_No": invoice_no, "Invoice_No": None, "Status": MISSING_IN_GSTR,
+                     **dict.fromkeys(TALLY_COLUMNS, 0.0), "Gross_Total": amount})
+    for invoice_no, amount in gstr:
+        rows.append({"GSTIN": "G1", "Supplier_Invoice_No": None, "Invoice_No": invoice_no, "Status": MISSING_IN_TALLY,
+                     **dict.fromkeys(GSTR_COLUMNS, 0.0), "Invoice_Value": amount})
+    return pd.DataFrame(rows)
+
+
+def test_probable_matches_need_agreeing_amounts():
+    df = residue_rows([("INV/001", 1000.0), ("INV/002", 500.0)], [("INV-1", 1001.5), ("INV-2", 900.0)])
+    result = match_residue(df, ("GSTIN", "Supplier_Invoice_No"), ("GSTIN", "Invoice_No"), ["Invoice_No"] + GSTR_COLUMNS)
+
+    assert result[["Supplier_Invoice_No", "Invoice_No", "Status"]].fillna("").values.tolist() == [
+        ["INV/001", "INV-1", PROBABLE_MATCH],
+        ["INV/002", "", MISSING_IN_GSTR],
+        ["", "INV-2", MISSING_IN_TALLY],
+    ]
+
+    # The same pairs in paise, with a tolerance the first pair is outside of
+    for col in TALLY_COLUMNS + GSTR_COLUMNS:
+        df[col] = to_paise(df[col])
+    result = match_residue(df, ("GSTIN", "Supplier_Invoice_No"), ("GSTIN", "Invoice_No"), ["Invoice_No"] + GSTR_COLUMNS,
+                           tolerance=1.0, paise=True)
+    assert PROBABLE_MATCH not in result["Status"].tolist()
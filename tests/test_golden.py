@@ -0,0 +1,19 @@
+import golden
+from synthetic import generate_inputs
+
+
+def test_engines_match_the_original_generators(tmp_path):
+    paths = generate_inputs(tmp_path, 300, note_rows=40, seed=3)
+    results = golden.run_golden({"synthetic": paths}, engine_names=("pipeline", "paise", "fuzzy", "aggregate"))
+    assert {(result["report"], result["engine"]) for result in results} >= {
+        ("gst", "pipeline"), ("debit_note", "pipeline"), ("combined", "pipeline"), ("gst", "aggregate"),
+    }
+    assert [result for result in results if not result["equal"]] == []
+
+
+def test_totals_catch_a_lost_row(tmp_path):
+    paths = generate_inputs(tmp_path, 100, note_rows=10, seed=3)
+    expected, _ = golden.run_legacy("gst", paths)
+    actual, _ = golden.run_engine("gst", paths, golden.ENGINES["aggregate"])
+    actual.df = actual.df.iloc[1:]
+    assert not golden.compare_totals(expected, actual, golden.DOCUMENT_COLUMNS["gst"])["equal"]
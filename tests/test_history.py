@@ -0,0 +1,57 @@
+import sqlite3
+
+import pandas as pd
+
+import history
+
+
+def report_rows(statuses):
+    return pd.DataFrame({
+        "GSTIN": ["27AAAC00001B1Z1"] * len(statuses),
+        "Supplier_Invoice_No": [f"INV/{i}" for i in range(len(statuses))],
+        "Invoice_No": [f"INV/{i}" for i in range(len(statuses))],
+        "Gross_Total": 100.0,
+        "Invoice_Value": 100.0,
+        "Status": statuses,
+    })
+
+
+def query_plan(db_path, function, *args):
+    captured = {}
+    original = history.query
+    history.query = lambda sql, params=(), db_path=None: captured.update(sql=sql, params=params) or (None, 0)
+    try:
+        function(*args)
+    finally:
+        history.query = original
+    with sqlite3.connect(db_path) as conn:
+        return [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + captured["sql"], captured["params"])]
+
+
+def test_streaks_count_only_the_latest_run_of_each_period(tmp_path):
+    db_path = str(tmp_path / "history.sqlite")
+    for period in ("2024-04", "2024-05", "2024-06"):
+        history.save_run("gst", [(None, report_rows(["Missing in GSTR", "Matched"]))], client="acme", period=period,
+                         db_path=db_path)
+    # A later run of May where the first invoice was found
+    history.save_run("gst", [(None, report_rows(["Matched", "Matched"]))], client="acme", period="2024-05",
+                     db_path=db_path)
+
+    streaks, _ = history.status_streaks("Missing in GSTR", 1, "acme", db_path=db_path)
+    assert streaks[["invoice_no", "first_period", "last_period"]].values.tolist() == [
+        ["INV/0", "2024-04", "2024-04"], ["INV/0", "2024-06", "2024-06"],
+    ]
+    found, _ = history.invoice_history("27AAAC00001B1Z1", "INV/0", db_path=db_path)
+    assert found["status"].tolist() == ["Missing in GSTR", "Missing in GSTR", "Matched", "Missing in GSTR"]
+
+
+def test_lookups_use_the_result_indexes(tmp_path):
+    db_path = str(tmp_path / "history.sqlite")
+    history.connect(db_path).close()
+    plans = [
+        query_plan(db_path, history.invoice_history, "27AAAC00001B1Z1", None, None, db_path),
+        query_plan(db_path, history.invoice_history, None, "INV/0", "acme", db_path),
+        query_plan(db_path, history.status_streaks, "Missing in GSTR", 3, "acme", None, db_path),
+    ]
+    for plan in plans:
+        assert not [step for step in plan if step.split()[:2] in (["SCAN", "s"], ["SCAN", "results"])], plan
@@ -0,0 +1,35 @@
+import openpyxl
+import pandas as pd
+
+import incremental
+import loaders
+from reports import reconcile_gst
+from synthetic import generate_inputs
+
+
+def cells(df):
+    return df.reset_index(drop=True).astype(object).where(df.reset_index(drop=True).notna(), None)
+
+
+def test_incremental_run_with_amendments_matches_full_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental, "STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setattr(loaders, "CACHE_DIR", str(tmp_path / "cache"))
+    paths = generate_inputs(tmp_path, 400, note_rows=60, seed=4, amendment_rate=0.1)
+    incremental.reconcile_gst_incremental(paths["tally"], paths["gstr"], "client")
+
+    # Change the amount of one Tally invoice, so only its key is matched again
+    wb = openpyxl.load_workbook(paths["tally"])
+    ws = wb.active
+    header_row, column = next(
+        (cell.row, cell.column) for row in ws.iter_rows(max_row=30) for cell in row
+        if str(cell.value).startswith("Gross Total")
+    )
+    ws.cell(header_row + 5, column).value = 777.0
+    tally_file = tmp_path / "tally_changed.xlsx"
+    wb.save(tally_file)
+
+    report, delta = incremental.reconcile_gst_incremental(tally_file, paths["gstr"], "client")
+    full = reconcile_gst(tally_file, paths["gstr"]).df
+    assert len(delta.df) > 0
+    assert "Source" in report.df.columns
+    pd.testing.assert_frame_equal(cells(report.df), cells(full))
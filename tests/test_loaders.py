@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+import pytest
+
+import loaders
+
+
+@pytest.mark.skipif(loaders.feather is None, reason="pyarrow is not installed")
+def test_cache_drops_the_least_recently_used_frames(tmp_path, monkeypatch):
+    cache_dir, inputs = tmp_path / "cache", tmp_path / "inputs"
+    inputs.mkdir()
+    monkeypatch.setattr(loaders, "CACHE_DIR", str(cache_dir))
+    frame = pd.DataFrame({"amount": range(1000)})
+
+    def cache(name, when=None):
+        before = set(cache_dir.glob("*.feather"))
+        (inputs / name).write_text(name)
+        loaders.cached_frame("frame", str(inputs / name), lambda: frame)
+        path, = set(cache_dir.glob("*.feather")) - before
+        if when is not None:
+            os.utime(path, (when, when))
+        return path
+
+    first, second, third = cache("first", 1), cache("second", 2), cache("third", 3)
+    # Reading the first frame again makes it the most recently used
+    loaders.cached_frame("frame", str(inputs / "first"), lambda: pytest.fail("the cached frame was not read"))
+
+    monkeypatch.setattr(loaders, "CACHE_MAX_BYTES", 2 * first.stat().st_size)
+    fourth = cache("fourth")
+    assert set(cache_dir.glob("*.feather")) == {first, fourth}
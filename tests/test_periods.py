@@ -0,0 +1,45 @@
+import pandas as pd
+
+from periods import match_across_periods
+from reports import GST_REPORT_COLUMNS
+from status import MATCHED, MISSING_IN_GSTR, MISSING_IN_TALLY
+
+
+def section(rows):
+    df = pd.DataFrame(rows, columns=GST_REPORT_COLUMNS)
+    df.insert(df.columns.get_loc("Status") + 1, "Tally_Period", None)
+    return df
+
+
+def tally_row(invoice_no):
+    return ["27AAAC00001B1Z1", invoice_no, 118.0, 100.0, 18.0, 0.0, 0.0, None, None, None, None, None, None,
+            MISSING_IN_GSTR]
+
+
+def gstr_row(invoice_no):
+    return ["27AAAC00001B1Z1", None, None, None, None, None, None, invoice_no, 118.0, 100.0, 18.0, 0.0, 0.0,
+            MISSING_IN_TALLY]
+
+
+def test_tally_row_is_paired_with_one_period_only():
+    may = section([tally_row("INV/1")])
+    may["Tally_Period"] = "2024-05"
+    sections = {"2024-04": section([gstr_row("INV/1")]), "2024-05": may, "2024-06": section([gstr_row("INV/1")])}
+
+    sections, matches = match_across_periods(sections)
+
+    assert matches == {"2024-04": 1, "2024-05": 0, "2024-06": 0}
+    assert sections["2024-04"]["Status"].tolist() == [MATCHED]
+    assert sections["2024-04"]["Tally_Period"].tolist() == ["2024-05"]
+    assert sections["2024-05"].empty
+    assert sections["2024-06"]["Status"].tolist() == [MISSING_IN_TALLY]
+
+
+def test_closest_period_is_preferred():
+    july = section([tally_row("INV/1")])
+    july["Tally_Period"] = "2024-07"
+    sections = {"2024-04": section([gstr_row("INV/1")]), "2024-06": section([gstr_row("INV/1")]), "2024-07": july}
+
+    _, matches = match_across_periods(sections)
+
+    assert matches == {"2024-04": 0, "2024-06": 1, "2024-07": 0}
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from splits import aggregate_lines
+
+
+def test_aggregate_lines_sums_lines_and_keeps_keyless_rows():
+    df = pd.DataFrame({
+        "Supplier_Invoice_No": ["A", "B", "A", None, None, "C", "B"],
+        "GSTIN": ["G1", "G1", "G1", "G1", "G2", None, "G1"],
+        "Particulars": ["a1", "b1", "a2", "x", "y", "z", "b2"],
+        "Gross_Total": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0],
+    })
+    agg = aggregate_lines(df, ["Supplier_Invoice_No", "GSTIN"], ["Gross_Total"])
+
+    keyless = df[["Supplier_Invoice_No", "GSTIN"]].isna().any(axis=1)
+    distinct_keys = len(df[~keyless].drop_duplicates(["Supplier_Invoice_No", "GSTIN"]))
+    assert len(agg) == distinct_keys + keyless.sum()
+    assert agg["Particulars"].tolist() == ["a1", "b1", "x", "y", "z"]
+    assert agg["Gross_Total"].tolist() == [4.0, 9.0, 4.0, 5.0, 6.0]
+    assert np.isclose(agg["Gross_Total"].sum(), df["Gross_Total"].sum())
@@ -0,0 +1,62 @@
+"""Parity of the column-wise ``classify_status`` with the row-wise rule the reports used before."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from status import AMOUNT_PAIRS, TAX_PAIRS, TOLERANCE, classify_status, to_paise
+
+
+def get_status(row, pairs=AMOUNT_PAIRS, tolerance=TOLERANCE):
+    # The row-wise rule of the original GST report, applied with DataFrame.apply(axis=1)
+    if row["_merge"] == "right_only":  # Exists only in GSTR (Missing in Tally)
+        return "Missing in Tally"
+    elif row["_merge"] == "left_only":  # Exists only in Tally (Missing in GSTR)
+        return "Missing in GSTR"
+    for left, right in pairs:
+        if abs(pd.to_numeric(row[left], errors="coerce") - pd.to_numeric(row[right], errors="coerce")) > tolerance:
+            return "Mismatch"
+    return "Matched"
+
+
+def merged_rows(pairs):
+    """Return merged rows covering every merge state, differences at and around the tolerance and blanks."""
+    differences = [0.0, TOLERANCE, -TOLERANCE, TOLERANCE + 0.01, -(TOLERANCE + 0.01), 0.01, np.nan]
+    rows = []
+    for merge in ("both", "left_only", "right_only"):
+        for column in range(len(pairs)):
+            for difference in differences:
+                row = {"_merge": merge}
+                for i, (left, right) in enumerate(pairs):
+                    row[left] = 1000.25
+                    row[right] = 1000.25 - (difference if i == column else 0.0)
+                rows.append(row)
+    # A side that is blank altogether, as after an outer merge
+    rows.append({"_merge": "both", **{left: 10.5 for left, _ in pairs}, **{right: np.nan for _, right in pairs}})
+    df = pd.DataFrame(rows)
+    df["_merge"] = pd.Categorical(df["_merge"], categories=["left_only", "right_only", "both"])
+    return df
+
+
+@pytest.mark.parametrize("pairs", [AMOUNT_PAIRS, TAX_PAIRS])
+def test_classify_status_matches_row_wise_rule(pairs):
+    df = merged_rows(pairs)
+    expected = df.apply(get_status, axis=1, pairs=pairs)
+    assert classify_status(df, pairs).tolist() == expected.tolist()
+    assert set(expected) == {"Matched", "Mismatch", "Missing in Tally", "Missing in GSTR"}
+
+
+@pytest.mark.parametrize("pairs", [AMOUNT_PAIRS, TAX_PAIRS])
+def test_classify_status_paise_matches_row_wise_rule(pairs):
+    df = merged_rows(pairs)
+    expected = df.apply(get_status, axis=1, pairs=pairs)
+    paise_df = df.copy()
+    for col in [col for pair in pairs for col in pair]:
+        # Blank amounts stay blank, as on the side an outer merge leaves empty
+        paise_df[col] = pd.Series(to_paise(df[col]), dtype="Int64").where(df[col].notna())
+    assert classify_status(paise_df, pairs, paise=True).tolist() == expected.tolist()
+
+
+def test_classify_status_tolerance():
+    df = merged_rows(TAX_PAIRS)
+    expected = df.apply(get_status, axis=1, pairs=TAX_PAIRS, tolerance=0.0)
+    assert classify_status(df, TAX_PAIRS, tolerance=0.0).tolist() == expected.tolist()
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from reports import aggregate_by_gstin
+from suppliers import load_master, update_master
+
+
+def test_each_client_has_its_own_master(tmp_path):
+    db_path = str(tmp_path / "suppliers.sqlite")
+    tally = pd.DataFrame({"GSTIN": ["G1", "G2"], "Particulars": ["Acme Traders", None], "Gross_Total": [1.0, 2.0]})
+    update_master([(tally, "GSTIN", "Particulars", "name")], "first", db_path)
+    renamed = tally.assign(Particulars=["ACME TRADERS PVT LTD", "Beta Stores"])
+    update_master([(renamed, "GSTIN", "Particulars", "name")], "second", db_path)
+
+    first, second = load_master("first", db_path), load_master("second", db_path)
+    assert pd.isna(first.names[1]) and first.names[0] == "Acme Traders"
+    assert second.names.tolist() == ["ACME TRADERS PVT LTD", "Beta Stores"]
+    assert len(load_master("third", db_path).gstins) == 0
+
+    # A supplier without a name is blank in reports, not "None"
+    agg = aggregate_by_gstin(tally, "GSTIN", "Particulars", ["Gross_Total"], first)
+    assert agg["Particulars"].tolist() == ["Acme Traders", ""]
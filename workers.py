@@ -0,0 +1,31 @@
+"""Running reports outside the Streamlit server and in worker processes.
+
+Batch runs, benchmarks and the report code's own process pools run
+without a Streamlit server, where the workbook cache falls back to
+memory. Worker processes are spawned rather than forked: the pools are
+started from job threads of the multi-threaded Streamlit server, whose
+pyarrow thread pools may hold locks a forked child would inherit and
+never see released.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def quiet_cache_warnings():
+    """Silence Streamlit's warning that its cache runs without a server.
+
+    Outside a Streamlit server the workbook cache falls back to memory,
+    which is what we want. Call this before importing the modules that
+    declare cached functions, since they warn as they are imported.
+    """
+    import streamlit  # noqa: F401  (configures its loggers, so adjust them after)
+
+    logging.getLogger("streamlit.runtime.caching.cache_data_api").setLevel(logging.ERROR)
+
+
+def process_pool(workers=None):
+    """Return a pool of up to ``workers`` spawned processes, each started with cache warnings silenced."""
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=quiet_cache_warnings,
+    )